@@ -26,6 +26,17 @@ from .model import (
     Surface,
     Vector,
 )
-from .output import OutputReader
+from .airfoils import AirfoilRegistry, default_registry
+from .parsecache import ParseCache, default_parse_cache
+from .output import ElementStripReader, OutputReader, ResultRecord
+from .preflight import RuntimeModel, default_runtime_model, panel_count
+from .profiling import Profiler
+from .retention import RunArchive, RunArchiver
+from .scheduling import CostModel, default_cost_model
 from .session import Session
-from .tools import create_sweep_cases, partitioned_cases, show_image
+from .executors import BrokerExecutor, Executor, FuturesExecutor
+from .plotting import PlotExporter
+from .convergence import MeshConvergence, refined_geometry
+from .doe import Halton, LatinHypercube, Sobol, create_doe_cases, run_doe
+from .sweeps import AdaptiveSweep
+from .tools import create_sweep_cases, partitioned_cases, show_image, unique_cases
@@ -0,0 +1,226 @@
+""" Process-wide registry for external airfoil and body profile files
+"""
+import copy
+from dataclasses import dataclass
+import hashlib
+import os
+import shutil
+import threading
+from typing import List, Optional
+
+from avlwrapper import logger
+from avlwrapper.model import BodyProfile, DataAirfoil, FileAirfoil
+from avlwrapper.tools import line_to_floats
+
+STAGING_MODES = ("link", "symlink", "copy", "inline")
+
+
+@dataclass
+class AirfoilEntry:
+    """Resolved airfoil file
+
+    :param str path: absolute path to the file
+    :param str digest: SHA-1 hash of the file content
+    :param int mtime: modification time (ns) at the time of hashing
+    :param int size: file size at the time of hashing
+    """
+
+    path: str
+    digest: str
+    mtime: int
+    size: int
+    x_data: Optional[List[float]] = None
+    z_data: Optional[List[float]] = None
+
+
+class AirfoilRegistry:
+    """Resolves, hashes and stages airfoil files.
+
+    Every file is read and hashed once; subsequent lookups only stat the file
+    to detect changes. Files are staged into working directories with
+    hard links, falling back to symbolic links and finally to copies.
+    """
+
+    def __init__(self):
+        self._entries = dict()
+        self._lock = threading.Lock()
+
+    def resolve(self, path):
+        """Returns the registry entry of an airfoil file
+
+        :param str path: path to the airfoil file
+        :rtype: AirfoilEntry
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if (
+                entry is None
+                or entry.mtime != stat.st_mtime_ns
+                or entry.size != stat.st_size
+            ):
+                entry = AirfoilEntry(
+                    path=path,
+                    digest=_file_digest(path),
+                    mtime=stat.st_mtime_ns,
+                    size=stat.st_size,
+                )
+                self._entries[path] = entry
+        return entry
+
+    def restore(self, entry):
+        """Adds a previously resolved entry, e.g. from a parse cache, if the
+        file is unchanged. An entry of the registry is kept.
+
+        :param AirfoilEntry entry: resolved file
+        :returns: True if the entry was added
+        :rtype: bool
+        """
+        stat = os.stat(entry.path)
+        if entry.mtime != stat.st_mtime_ns or entry.size != stat.st_size:
+            return False
+        with self._lock:
+            current = self._entries.get(entry.path)
+            if current is not None and (
+                current.mtime == entry.mtime and current.size == entry.size
+            ):
+                return False
+            self._entries[entry.path] = entry
+        return True
+
+    def geometry_files(self, geometry):
+        """Maps the file names used in the geometry to the resolved files
+
+        :param avlwrapper.Aircraft geometry: AVL geometry
+        :rtype: Dict[str, AirfoilEntry]
+        """
+        if geometry._from_file is None:
+            af_dir = os.getcwd()
+        else:
+            af_dir, _ = os.path.split(geometry._from_file)
+
+        files = dict()
+        for airfoil in _file_airfoils(geometry):
+            if airfoil.filename not in files:
+                path = os.path.join(af_dir, airfoil.filename)
+                files[airfoil.filename] = self.resolve(path)
+        return files
+
+    def stage(self, filename, entry, target_dir, mode="link", overwrite=False):
+        """Makes a resolved file available in a working directory
+
+        :param str filename: file name as referenced in the geometry
+        :param AirfoilEntry entry: resolved file
+        :param str target_dir: working directory
+        :param str mode: "link", "symlink" or "copy"
+        :param bool overwrite: replace an existing file, otherwise it is kept
+        """
+        # absolute paths are read directly by AVL
+        if os.path.isabs(filename):
+            return
+
+        target = os.path.join(target_dir, filename)
+        if os.path.lexists(target):
+            if not overwrite:
+                return
+            # removed rather than written to, it may be a link to a source file
+            os.remove(target)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+
+        if mode == "link":
+            try:
+                os.link(entry.path, target)
+                return
+            except OSError:
+                mode = "symlink"
+        if mode == "symlink":
+            try:
+                os.symlink(entry.path, target)
+                return
+            except OSError:
+                logger.info(f"Linking {entry.path} failed, copying instead")
+        shutil.copy(entry.path, target)
+
+    def get_coordinates(self, entry):
+        """Returns the (cached) coordinates of an airfoil file
+
+        :param AirfoilEntry entry: resolved file
+        :rtype: Tuple[List[float], List[float]]
+        """
+        if entry.x_data is None:
+            with open(entry.path, "r") as fp:
+                lines = fp.readlines()
+            x_data, z_data = [], []
+            for line in lines:
+                try:
+                    values = line_to_floats(line, limit=2)
+                except ValueError:
+                    # name line
+                    continue
+                if len(values) == 2:
+                    x_data.append(values[0])
+                    z_data.append(values[1])
+            entry.x_data, entry.z_data = x_data, z_data
+        return entry.x_data, entry.z_data
+
+    def inline(self, geometry):
+        """Returns a copy of the geometry with airfoil files replaced
+        by DataAirfoil objects. Body profiles can only be defined by a file
+        and are kept.
+
+        :param avlwrapper.Aircraft geometry: AVL geometry
+        :rtype: avlwrapper.Aircraft
+        """
+        files = self.geometry_files(geometry)
+        inlined = copy.deepcopy(geometry)
+        for surface in inlined.surfaces:
+            for section in surface.sections:
+                airfoil = section.airfoil
+                if isinstance(airfoil, FileAirfoil):
+                    x_data, z_data = self.get_coordinates(files[airfoil.filename])
+                    section.airfoil = DataAirfoil(
+                        x_data=list(x_data),
+                        z_data=list(z_data),
+                        x1=airfoil.x1,
+                        x2=airfoil.x2,
+                    )
+        return inlined
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def relocate_airfoils(geometry, directory):
+    """Prefixes the relative airfoil and body profile file names of a
+    geometry with a directory (in place)
+
+    :param avlwrapper.Aircraft geometry: AVL geometry
+    :param str directory: directory relative to the AVL working directory
+    """
+    for airfoil in _file_airfoils(geometry):
+        if not os.path.isabs(airfoil.filename):
+            airfoil.filename = os.path.join(directory, airfoil.filename)
+
+
+def _file_airfoils(geometry, include_bodies=True):
+    for surface in geometry.surfaces:
+        for section in surface.sections:
+            if isinstance(section.airfoil, FileAirfoil):
+                yield section.airfoil
+    if include_bodies:
+        for body in geometry.bodies:
+            if isinstance(body.body_section, BodyProfile):
+                yield body.body_section
+
+
+def _file_digest(path):
+    digest = hashlib.sha1()
+    with open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+default_registry = AirfoilRegistry()
@@ -0,0 +1,282 @@
+""" Memory-mapped archives of element and strip force results
+
+Requires NumPy, which is not a dependency of the core package.
+"""
+import json
+import os
+
+import numpy as np
+
+ARCHIVE_VERSION = 1
+INDEX_FILE = "index.json"
+
+# result keys of the archived output files
+ELEMENT_RESULTS = "ElementForces"
+STRIP_RESULTS = "StripForces"
+
+
+class ArchiveWriter:
+    """Writes the element and strip forces of many cases to an archive
+    directory. Every column of every surface is a separate `.npy` file
+    with a row per case; the elements of a surface are stored strip after
+    strip, so a strip of a case is a contiguous block. An index
+    (index.json) maps the surfaces, strips and columns to the files.
+
+    The layout is taken from the first case; all cases must have the same
+    discretisation. Cases are written as they are added, e.g. from
+    `Session.iter_case_results`, and are not kept in memory.
+
+    Example:
+    ```
+    with ArchiveWriter("campaign", n_cases=len(session.cases)) as writer:
+        for number, results in session.iter_case_results():
+            writer.add(number, results)
+    ```
+    """
+
+    def __init__(self, path, n_cases):
+        """
+        :param str path: archive directory, created if it does not exist
+        :param int n_cases: number of cases of the archive
+        """
+        self.path = path
+        self.n_cases = n_cases
+        self.case_numbers = []
+        self._index = None
+        self._arrays = dict()
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add(self, number, results):
+        """Writes the element and strip forces of a case
+
+        :param int number: case number
+        :param dict results: results of the case, with the "ElementForces"
+            and/or "StripForces" output
+        """
+        row = len(self.case_numbers)
+        if row >= self.n_cases:
+            raise ValueError(f"The archive is limited to {self.n_cases} cases")
+        if self._index is None:
+            self._create(results)
+
+        for surface, layout in self._index["elements"].items():
+            strips = results[ELEMENT_RESULTS][surface]
+            for column, file_name in layout["files"].items():
+                target = self._arrays[file_name]
+                for strip, (start, stop) in layout["strips"].items():
+                    values = strips[int(strip)][column]
+                    if len(values) != stop - start:
+                        raise ValueError(
+                            f"Discretisation of {surface}, strip {strip} differs "
+                            f"from the first case"
+                        )
+                    target[row, start:stop] = values
+
+        for surface, layout in self._index["strips"].items():
+            surface_results = results[STRIP_RESULTS][surface]
+            for column, file_name in layout["files"].items():
+                values = surface_results[column]
+                if len(values) != layout["rows"]:
+                    raise ValueError(
+                        f"Discretisation of {surface} differs from the first case"
+                    )
+                self._arrays[file_name][row, :] = values
+
+        self.case_numbers.append(number)
+
+    def close(self):
+        """Flushes the data and writes the index. An archive with fewer
+        cases than announced is valid, the remaining rows are unused."""
+        if self._index is None:
+            return
+        for target in self._arrays.values():
+            target.flush()
+        self._arrays.clear()
+        self._index["cases"] = list(self.case_numbers)
+        with open(os.path.join(self.path, INDEX_FILE), "w") as fp:
+            json.dump(self._index, fp, indent=2)
+
+    def _create(self, results):
+        index = {"version": ARCHIVE_VERSION, "elements": dict(), "strips": dict()}
+
+        for surface_idx, (surface, strips) in enumerate(
+            results.get(ELEMENT_RESULTS, dict()).items()
+        ):
+            layout, start = {"strips": dict(), "files": dict()}, 0
+            columns = []
+            for strip, strip_results in strips.items():
+                n_elements = len(next(iter(strip_results.values()), []))
+                layout["strips"][str(strip)] = [start, start + n_elements]
+                start += n_elements
+                columns = columns or list(strip_results)
+            for column_idx, column in enumerate(columns):
+                file_name = f"elements-{surface_idx}-{column_idx}.npy"
+                layout["files"][column] = file_name
+                self._allocate(file_name, start)
+            index["elements"][surface] = layout
+
+        for surface_idx, (surface, surface_results) in enumerate(
+            results.get(STRIP_RESULTS, dict()).items()
+        ):
+            n_strips = len(next(iter(surface_results.values()), []))
+            layout = {"rows": n_strips, "files": dict()}
+            for column_idx, column in enumerate(surface_results):
+                file_name = f"strips-{surface_idx}-{column_idx}.npy"
+                layout["files"][column] = file_name
+                self._allocate(file_name, n_strips)
+            index["strips"][surface] = layout
+
+        self._index = index
+
+    def _allocate(self, file_name, n_rows):
+        self._arrays[file_name] = np.lib.format.open_memmap(
+            os.path.join(self.path, file_name),
+            mode="w+",
+            dtype=np.float64,
+            shape=(self.n_cases, n_rows),
+        )
+
+
+def write_archive(path, results):
+    """Writes the element and strip forces of all cases to an archive
+
+    :param str path: archive directory
+    :param dict results: results by case number, as returned by
+        `Session.run_all_cases`
+    """
+    with ArchiveWriter(path, n_cases=len(results)) as writer:
+        for number in sorted(results):
+            writer.add(number, results[number])
+
+
+class ResultArchive:
+    """Reads an archive written by ArchiveWriter. Files are memory-mapped
+    when first accessed; slicing a surface, strip or range of cases only
+    reads the requested data from disk.
+
+    Example:
+    ```
+    archive = ResultArchive("campaign")
+    # dCp of strip 3 of the wing for the first 100 cases, (100, n_chordwise)
+    dcp = archive.elements("Wing", "dCp", strip=3, cases=slice(0, 100))
+    cl = archive.strips("Wing", "cl")
+    ```
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: archive directory
+        """
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE), "r") as fp:
+            self._index = json.load(fp)
+        if self._index["version"] != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported archive version {self._index['version']}")
+        self._arrays = dict()
+
+    def __len__(self):
+        return len(self.case_numbers)
+
+    @property
+    def case_numbers(self):
+        """Case numbers, in order of the archive rows"""
+        return self._index["cases"]
+
+    @property
+    def element_surfaces(self):
+        return list(self._index["elements"])
+
+    @property
+    def strip_surfaces(self):
+        return list(self._index["strips"])
+
+    def element_strips(self, surface):
+        """Strip numbers of a surface in the element forces
+
+        :param str surface: surface name
+        :rtype: List[int]
+        """
+        return [int(strip) for strip in self._index["elements"][surface]["strips"]]
+
+    def element_columns(self, surface):
+        return list(self._index["elements"][surface]["files"])
+
+    def strip_columns(self, surface):
+        return list(self._index["strips"][surface]["files"])
+
+    def case_rows(self, numbers):
+        """Archive rows of case numbers, e.g. for the `cases` argument
+
+        :param typing.Iterable[int] numbers: case numbers
+        :rtype: List[int]
+        """
+        rows = {number: row for row, number in enumerate(self.case_numbers)}
+        return [rows[number] for number in numbers]
+
+    def elements(self, surface, column, strip=None, cases=slice(None)):
+        """Element values of a surface or strip
+
+        :param str surface: surface name
+        :param str column: column name, e.g. "dCp"
+        :param Optional[int] strip: (optional) strip number, all elements
+            of the surface if None
+        :param cases: archive row, slice or sequence of rows
+        :returns: array of (cases, elements), a memory-mapped view for an
+            integer or slice
+        :rtype: np.ndarray
+        """
+        layout = self._index["elements"][surface]
+        values = self._array(layout["files"][column])[self._case_rows(cases)]
+        if strip is None:
+            return values
+        start, stop = layout["strips"][str(strip)]
+        return values[..., start:stop]
+
+    def element_strip(self, surface, strip, cases=slice(None)):
+        """All columns of the elements of a strip
+
+        :rtype: Dict[str, np.ndarray]
+        """
+        return {
+            column: self.elements(surface, column, strip=strip, cases=cases)
+            for column in self.element_columns(surface)
+        }
+
+    def strips(self, surface, column, cases=slice(None)):
+        """Strip values of a surface
+
+        :param str surface: surface name
+        :param str column: column name, e.g. "cl"
+        :param cases: archive row, slice or sequence of rows
+        :returns: array of (cases, strips)
+        :rtype: np.ndarray
+        """
+        file_name = self._index["strips"][surface]["files"][column]
+        return self._array(file_name)[self._case_rows(cases)]
+
+    def _case_rows(self, cases):
+        # rows beyond the written cases are unused
+        n_cases = len(self.case_numbers)
+        if isinstance(cases, slice):
+            return slice(*cases.indices(n_cases))
+        if isinstance(cases, (int, np.integer)):
+            if not -n_cases <= cases < n_cases:
+                raise IndexError(f"Case row {cases} out of range")
+            return cases % n_cases
+        rows = np.asarray(cases, dtype=int)
+        if np.any((rows < -n_cases) | (rows >= n_cases)):
+            raise IndexError("Case rows out of range")
+        return rows % n_cases
+
+    def _array(self, file_name):
+        if file_name not in self._arrays:
+            self._arrays[file_name] = np.load(
+                os.path.join(self.path, file_name), mmap_mode="r"
+            )
+        return self._arrays[file_name]
@@ -0,0 +1,559 @@
+""" Columnar case definitions for large numbers of run cases
+
+Requires NumPy, which is not a dependency of the core package.
+"""
+import re
+from typing import Iterable, List
+
+import numpy as np
+
+from avlwrapper.model import Case, InputError, Parameter, State
+
+_SEPARATOR = " " + "-" * 45
+
+# lower case AVL names to Case keys
+_PARAMETER_KEYS = {name.lower(): key for key, name in Case.CASE_PARAMETERS.items()}
+_STATE_KEYS = {value[0].lower(): key for key, value in Case.CASE_STATES.items()}
+
+# patterns on lower case text
+_HEADER_PATTERN = re.compile(r"run case[ \t]*(\d+)[ \t]*:")
+_NAME_PATTERN = re.compile(r"\n([^\n=]*)=")
+_VALUE_PATTERN = re.compile(r"=[ \t]*(\S+)")
+
+
+class CaseTable:
+    """Run cases stored as one NumPy column per parameter, state and
+    control. A table can be used as the cases of a Session; iterating or
+    indexing it yields light-weight row views instead of Case objects.
+
+    Columns are addressed by the Case keyword names (e.g. "alpha",
+    "roll_rate", "velocity", "X_cg") or the control name. As in
+    `Case.update`, run-case parameters take precedence over states with the
+    same key; those states are available through `CaseTable.states`.
+    Undefined states (Mach, CDo, CG) are NaN until filled by the Session
+    with the geometry defaults.
+
+    Example:
+    ```
+    table = CaseTable(names="cruise", alpha=np.linspace(0, 10, 1000),
+                      elevator=Parameter("elevator", 0.0, "Cm"),
+                      velocity=50.0)
+    ```
+    """
+
+    def __init__(self, names, numbers=None, settings=None, units=None, **columns):
+        """
+        :param names: case names, a single name is used as the base name
+            of numbered cases
+        :type names: str or Sequence[str]
+        :param Optional[Sequence[int]] numbers: case numbers,
+            defaults to 1..n
+        :param Optional[dict] settings: constraint settings of parameters
+            and controls, a string or a sequence of strings per case
+            (see `Case.VALID_SETTINGS`)
+        :param Optional[Dict[str, str]] units: units of the states,
+            defaults to the Case units
+        :param columns: key-value pairs, keys should be Case.CASE_PARAMETERS,
+            Case.CASE_STATES or a control; values should be a scalar, an
+            array-like with a value per case or a Parameter
+        """
+        n_cases = self._get_length(names, numbers, columns)
+
+        if isinstance(names, str):
+            names = [f"{names}-{idx}" for idx in range(n_cases)]
+        self.names = np.asarray(names, dtype=object)
+        if numbers is None:
+            numbers = np.arange(1, n_cases + 1)
+        self.numbers = np.asarray(numbers, dtype=int)
+
+        self.units = {key: value[2] for key, value in Case.CASE_STATES.items()}
+        self.units.update(units or dict())
+
+        self.controls = []
+        self.parameters = {key: np.zeros(n_cases) for key in Case.CASE_PARAMETERS}
+        self.states = {
+            key: np.full(n_cases, np.nan if value[1] is None else value[1])
+            for key, value in Case.CASE_STATES.items()
+        }
+        self._settings = dict(Case.CASE_PARAMETERS)
+
+        settings = dict(settings or dict())
+        for key, value in columns.items():
+            if isinstance(value, Parameter):
+                settings.setdefault(key, value.setting)
+                value = value.value
+            self[key] = value
+        for key, setting in settings.items():
+            self.set_setting(key, setting)
+
+    @staticmethod
+    def _get_length(names, numbers, columns):
+        lengths = set()
+        if not isinstance(names, str):
+            lengths.add(len(names))
+        if numbers is not None:
+            lengths.add(len(numbers))
+        for value in columns.values():
+            if isinstance(value, Parameter):
+                value = value.value
+            if np.ndim(value) > 0:
+                lengths.add(len(value))
+        if not lengths:
+            return 1
+        if len(lengths) != 1:
+            raise InputError("Case names and columns should have the same length")
+        return lengths.pop()
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def __iter__(self):
+        return (CaseRow(self, idx) for idx in range(len(self)))
+
+    def __contains__(self, key):
+        return key in self.parameters or key in self.states
+
+    def __getitem__(self, item):
+        """Column by key, row view by index or sub-table by slice,
+        index array or boolean mask"""
+        if isinstance(item, str):
+            if item in self.parameters:
+                return self.parameters[item]
+            return self.states[item]
+        if isinstance(item, (int, np.integer)):
+            if item < 0:
+                item += len(self)
+            if not 0 <= item < len(self):
+                raise IndexError("Case index out of range")
+            return CaseRow(self, item)
+        return self._take(item)
+
+    def __setitem__(self, key, value):
+        column = np.array(np.broadcast_to(np.asarray(value, dtype=float), (len(self),)))
+        if key in self.parameters:
+            self.parameters[key] = column
+        elif key in self.states:
+            self.states[key] = column
+        else:
+            # unknown keys are controls, as in Case.update
+            self.controls.append(key)
+            self.parameters[key] = column
+            self._settings[key] = key
+
+    def _take(self, index):
+        table = CaseTable.__new__(CaseTable)
+        table.names = self.names[index]
+        table.numbers = self.numbers[index]
+        table.units = dict(self.units)
+        table.controls = list(self.controls)
+        table.parameters = {key: val[index] for key, val in self.parameters.items()}
+        table.states = {key: val[index] for key, val in self.states.items()}
+        table._settings = {
+            key: val if isinstance(val, str) else val[index]
+            for key, val in self._settings.items()
+        }
+        return table
+
+    def setting(self, key):
+        """Constraint setting of a parameter or control, either one string
+        for all cases or an array with a setting per case"""
+        return self._settings[key]
+
+    def set_setting(self, key, setting):
+        """Sets the constraint setting of a parameter or control
+
+        :param str key: parameter key or control name
+        :param setting: setting for all cases or a setting per case
+        :type setting: str or Sequence[str]
+        """
+        if key not in self._settings:
+            raise InputError(f"Invalid parameter: {key}")
+        if isinstance(setting, str):
+            valid = {setting}
+        else:
+            setting = np.asarray(setting, dtype=object)
+            if setting.shape != (len(self),):
+                raise InputError(f"Invalid number of settings for {key}")
+            valid = set(setting)
+        for value in valid:
+            if value not in Case.VALID_SETTINGS and value not in self.controls:
+                raise InputError(f"Invalid setting on parameter: {key}.")
+        self._settings[key] = setting
+
+    def renumber(self, start=1):
+        """Numbers the cases consecutively
+
+        :param int start: number of the first case
+        """
+        self.numbers = np.arange(start, start + len(self))
+
+    def fill_defaults(self, **values):
+        """Replaces undefined (NaN) states by a value
+
+        :param values: key-value pairs of state keys and values
+        """
+        for key, value in values.items():
+            column = self.states[key]
+            column[np.isnan(column)] = value
+
+    def unique(self, tolerance=1e-6):
+        """Finds the unique operating points, see `tools.unique_cases`
+
+        :param float tolerance: absolute tolerance of the values
+        :returns: table of the first case of every unique operating point
+            and the index of the unique case of every case
+        :rtype: Tuple[CaseTable, np.ndarray]
+        """
+        columns = []
+        for column in [*self.parameters.values(), *self.states.values()]:
+            if tolerance:
+                column = np.round(column / tolerance)
+            # NaN does not compare equal
+            columns.append(np.where(np.isnan(column), np.inf, column))
+        for setting in self._settings.values():
+            if not isinstance(setting, str):
+                columns.append(np.unique(setting, return_inverse=True)[1])
+
+        _, first, inverse = np.unique(
+            np.column_stack(columns), axis=0, return_index=True, return_inverse=True
+        )
+        # keep the order of the first occurrences
+        order = np.argsort(first)
+        rank = np.empty_like(order)
+        rank[order] = np.arange(len(order))
+        return self._take(first[order]), rank[inverse.ravel()]
+
+    @classmethod
+    def from_cases(cls, cases):
+        """Creates a table from Case objects
+
+        :param Sequence[avlwrapper.Case] cases: cases to convert
+        """
+        table = cls(
+            names=[case.name for case in cases],
+            numbers=[case.number for case in cases],
+        )
+        for key in Case.CASE_STATES:
+            values = [case.states[key].value for case in cases]
+            table.states[key] = np.array(
+                [np.nan if value is None else value for value in values], dtype=float
+            )
+        for case in cases:
+            for key, state in case.states.items():
+                table.units[key] = state.unit
+
+        settings = dict()
+        controls = _unique(control for case in cases for control in case.controls)
+        for key in list(Case.CASE_PARAMETERS) + controls:
+            name = _parameter_name(key)
+            params = [
+                case.parameters.get(name) or case.parameters.get(key) for case in cases
+            ]
+            table[key] = [0.0 if p is None else p.value for p in params]
+            settings[key] = [name if p is None else p.setting for p in params]
+        for key, case_settings in settings.items():
+            table.set_setting(key, _compact(case_settings))
+        return table
+
+    def to_cases(self):
+        """Converts the table to Case objects
+
+        :rtype: List[avlwrapper.Case]
+        """
+        return [row.to_case() for row in self]
+
+    @classmethod
+    def sweep(cls, base_case, parameters):
+        """Creates a table for a full-factorial parameter sweep,
+        analogous to `create_sweep_cases`
+
+        :param avlwrapper.Case base_case: base Case object
+        :param typing.Sequence parameters: list of a dict with keys:
+            name and values
+        """
+        if isinstance(parameters, dict):
+            parameters = [parameters]
+
+        grids = np.meshgrid(
+            *[np.asarray(p["values"], dtype=float) for p in parameters], indexing="ij"
+        )
+        n_cases = grids[0].size
+
+        table = cls.from_cases([base_case])._take(np.zeros(n_cases, dtype=int))
+        table.names = np.array(
+            [f"{base_case.name}-{idx}" for idx in range(n_cases)], dtype=object
+        )
+        table.renumber()
+        for param, grid in zip(parameters, grids):
+            table[param["name"]] = grid.ravel()
+        return table
+
+    @classmethod
+    def from_file(cls, filename):
+        """Reads a .run file
+
+        :param str filename: path to the .run file
+        """
+        with open(filename, "r") as fp:
+            return cls.from_string(fp.read())
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Parses lines in .run file format
+
+        :param Iterable[str] lines: lines of the .run file
+        """
+        return cls.from_string("\n".join(line.rstrip("\n") for line in lines))
+
+    @classmethod
+    def from_string(cls, run_str):
+        """Parses a string in .run file format. Unlike `Case.from_lines`, no
+        intermediate Case, Parameter or State objects are created. Files in
+        which all cases have the same layout (such as files written by AVL or
+        by a CaseTable) are parsed with regular expressions over the whole
+        file; other files are parsed line by line.
+
+        :param str run_str: content of the .run file
+        """
+        table = cls._from_uniform_string(run_str)
+        if table is None:
+            table = cls._from_string_lines(run_str.splitlines())
+        return table
+
+    @classmethod
+    def _from_uniform_string(cls, run_str):
+        # positions and numbers of the headers, names are read from the
+        # original text to keep their case
+        headers = [
+            (match.start(), match.end(), int(match.group(1)))
+            for match in _HEADER_PATTERN.finditer(run_str.lower())
+        ]
+        if not headers:
+            return None
+        n_cases = len(headers)
+        names = [run_str[end : run_str.find("\n", end)].strip() for _, end, _ in headers]
+
+        body_start = run_str.index("\n", headers[0][1])
+        body_end = headers[1][0] if n_cases > 1 else len(run_str)
+        first_body = run_str[body_start:body_end]
+        line_names = _NAME_PATTERN.findall(first_body)
+        n_lines = len(line_names)
+        if any(name.lstrip().startswith(("!", "#")) for name in line_names):
+            return None
+
+        # every case should have the same lines in the same order
+        all_names = _NAME_PATTERN.findall(run_str, body_start)
+        if len(all_names) != n_cases * n_lines or any(
+            len(set(all_names[idx::n_lines])) != 1 for idx in range(n_lines)
+        ):
+            return None
+        try:
+            values = np.array(
+                _VALUE_PATTERN.findall(run_str, body_start), dtype=float
+            ).reshape(n_cases, n_lines)
+        except ValueError:
+            return None
+
+        table = cls(names=names, numbers=[number for _, _, number in headers])
+        settings = dict()
+        body_lines = [line for line in first_body.splitlines() if "=" in line]
+        for idx, line in enumerate(body_lines):
+            key, setting, unit = _parse_line_names(line)
+            if setting is None:
+                table.states[key] = values[:, idx].copy()
+                table.units[key] = unit
+            else:
+                table[key] = values[:, idx]
+                settings[key] = setting
+        for key, setting in settings.items():
+            table.set_setting(key, setting)
+        return table
+
+    @classmethod
+    def _from_string_lines(cls, lines):
+        names, numbers = [], []
+        # key -> (case indices, values), per parameter and state
+        parameters, states = dict(), dict()
+        # key -> (case indices, settings)
+        settings = dict()
+        units = dict()
+
+        for line in lines:
+            line = line.strip()
+            if line.startswith("!") or line.startswith("#"):
+                continue
+            header = _HEADER_PATTERN.search(line.lower())
+            if header is not None:
+                numbers.append(int(header.group(1)))
+                names.append(line[line.index(":", header.start()) + 1 :].strip())
+            elif "=" in line:
+                case_idx = len(names) - 1
+                key, setting, unit = _parse_line_names(line)
+                value = float(line.split("=", 1)[1].split()[0])
+                columns = states if setting is None else parameters
+                idx, column = columns.setdefault(key, ([], []))
+                idx.append(case_idx)
+                column.append(value)
+                if setting is None:
+                    units.setdefault(key, unit)
+                else:
+                    idx, column = settings.setdefault(key, ([], []))
+                    idx.append(case_idx)
+                    column.append(setting)
+
+        table = cls(names=names, numbers=numbers, units=units)
+        for key, (idx, column) in parameters.items():
+            if key not in table.parameters:
+                table[key] = 0.0
+            table.parameters[key][idx] = column
+        for key, (idx, column) in states.items():
+            table.states[key][idx] = column
+        for key, (idx, column) in settings.items():
+            case_settings = np.full(len(table), _parameter_name(key), dtype=object)
+            case_settings[idx] = column
+            table.set_setting(key, _compact(case_settings))
+        return table
+
+    def _row_template(self):
+        # format string of one case, with the constant names and units included
+        template = _SEPARATOR + "\n Run case {:<2}:  {}\n\n"
+        for key in self.parameters:
+            name = _escape(_parameter_name(key))
+            setting = self._settings[key]
+            if isinstance(setting, str):
+                template += f" {name:<12} -> {_escape(setting):<12} = {{}}\n"
+            else:
+                template += f" {name:<12} -> {{:<12}} = {{}}\n"
+        template += "\n"
+        for key, value in Case.CASE_STATES.items():
+            name, unit = _escape(value[0]), _escape(self.units[key])
+            template += f" {name:<10} = {{:<10}} {unit}\n"
+        return template
+
+    def _row_fields(self):
+        fields = [self.numbers.tolist(), self.names.tolist()]
+        for key, column in self.parameters.items():
+            setting = self._settings[key]
+            if not isinstance(setting, str):
+                fields.append(setting.tolist())
+            fields.append(column.tolist())
+        for key, column in self.states.items():
+            if np.isnan(column).any():
+                raise InputError(f"Undefined state: {key}")
+            fields.append(column.tolist())
+        return fields
+
+    def write(self, fp):
+        """Writes the cases in .run file format
+
+        :param fp: file object opened for writing
+        """
+        template = self._row_template()
+        for row in zip(*self._row_fields()):
+            fp.write(template.format(*row))
+
+    def __str__(self):
+        template = self._row_template()
+        return "".join(template.format(*row) for row in zip(*self._row_fields()))
+
+
+class CaseRow:
+    """Light-weight view of one case in a CaseTable"""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table, index):
+        self.table = table
+        self.index = index
+
+    @property
+    def number(self):
+        return int(self.table.numbers[self.index])
+
+    @property
+    def name(self):
+        return self.table.names[self.index]
+
+    @property
+    def controls(self):
+        return self.table.controls
+
+    @property
+    def states(self):
+        """States of the case, as Case.states"""
+        return {
+            key: State(
+                name=value[0],
+                value=self._value(self.table.states[key]),
+                unit=self.table.units[key],
+            )
+            for key, value in Case.CASE_STATES.items()
+        }
+
+    @property
+    def parameters(self):
+        """Parameters of the case, as Case.parameters"""
+        params = dict()
+        for key, column in self.table.parameters.items():
+            setting = self.table.setting(key)
+            if not isinstance(setting, str):
+                setting = setting[self.index]
+            name = _parameter_name(key)
+            params[name] = Parameter(name=name, value=self._value(column), setting=setting)
+        return params
+
+    def _value(self, column):
+        value = float(column[self.index])
+        return None if np.isnan(value) else value
+
+    def to_case(self):
+        """Converts the row to a Case object
+
+        :rtype: avlwrapper.Case
+        """
+        case = Case(self.name, *self.states.values(), number=self.number)
+        for name, param in self.parameters.items():
+            if name in case.parameters:
+                case.parameters[name] = param
+            else:
+                case.update(**{name: param})
+        return case
+
+    def __str__(self):
+        return str(self.table[self.index : self.index + 1])
+
+    def __repr__(self):
+        return f"CaseRow(number={self.number}, name={self.name!r})"
+
+
+def _parameter_name(key):
+    return Case.CASE_PARAMETERS.get(key, key)
+
+
+def _parse_line_names(line):
+    # returns key, setting (None for states) and unit (None for parameters)
+    name, rest = line.split("=", 1)
+    if "->" in name:
+        name, setting = (s.strip() for s in name.split("->", 1))
+        return _PARAMETER_KEYS.get(name.lower(), name), setting, None
+    key = _STATE_KEYS.get(name.strip().lower())
+    if key is None:
+        raise InputError(line)
+    _, _, unit = rest.strip().partition(" ")
+    return key, None, unit.strip()
+
+
+def _escape(value):
+    return value.replace("{", "{{").replace("}", "}}")
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def _compact(settings):
+    # a single setting string if equal for all cases
+    unique = set(settings)
+    if len(unique) == 1:
+        return unique.pop()
+    return np.asarray(settings, dtype=object)
@@ -1,10 +1,13 @@
+from collections.abc import Mapping
 from configparser import ConfigParser
+import copy
 import itertools
 import logging
 import os
 import os.path
 import shutil
 import sys
+from types import MappingProxyType
 
 if os.name == "nt":
     import winreg
@@ -52,6 +55,75 @@ class Configuration:
         show_output = parser["environment"]["printoutput"]
         settings["show_stdout"] = show_output == "yes"
 
+        # staging of airfoil files
+        settings["airfoil_staging"] = parser.get(
+            "environment", "airfoilstaging", fallback="link"
+        ).lower()
+
+        # staged workspace
+        settings["staged_workspace"] = parser.getboolean(
+            "environment", "stagedworkspace", fallback=False
+        )
+        settings["staging_dir"] = (
+            parser.get("environment", "stagingdirectory", fallback="") or None
+        )
+
+        # compact result records
+        settings["typed_results"] = parser.getboolean(
+            "environment", "typedresults", fallback=False
+        )
+
+        # totals and convergence diagnostics from the standard output
+        settings["stdout_results"] = parser.getboolean(
+            "environment", "stdoutresults", fallback=False
+        )
+
+        # case deduplication
+        settings["deduplicate"] = parser.getboolean(
+            "environment", "deduplicatecases", fallback=False
+        )
+        settings["deduplication_tolerance"] = parser.getfloat(
+            "environment", "deduplicationtolerance", fallback=1e-6
+        )
+
+        # profiling
+        settings["profiling"] = {
+            "enabled": parser.getboolean("profiling", "enabled", fallback=False),
+            "memory": parser.getboolean("profiling", "memory", fallback=True),
+            "cprofile": parser.getboolean("profiling", "cprofile", fallback=False),
+            "report_dir": parser.get("profiling", "reportdirectory", fallback="")
+            or None,
+        }
+
+        # pre-flight check of AVL limits and run budgets
+        settings["limits"] = {
+            "preflight": parser.get("limits", "preflight", fallback="warn").lower(),
+            "surfaces": parser.getint("limits", "maxsurfaces", fallback=30),
+            "strips": parser.getint("limits", "maxstrips", fallback=400),
+            "vortices": parser.getint("limits", "maxvortices", fallback=5000),
+            "bodies": parser.getint("limits", "maxbodies", fallback=20),
+            "body_nodes": parser.getint("limits", "maxbodynodes", fallback=500),
+            "controls": parser.getint("limits", "maxcontrols", fallback=20),
+            "design_vars": parser.getint("limits", "maxdesignvars", fallback=20),
+            "run_time": _optional_float(parser, "limits", "maxruntime"),
+            "memory": _optional_float(parser, "limits", "maxmemory"),
+        }
+
+        # cache of parsed input files
+        settings["parse_cache"] = {
+            "enabled": parser.getboolean("cache", "parsecache", fallback=False),
+            "directory": parser.get("cache", "cachedirectory", fallback="") or None,
+        }
+
+        # compressed archives of the run files
+        settings["retention"] = {
+            "enabled": parser.getboolean("retention", "enabled", fallback=False),
+            "directory": parser.get("retention", "directory", fallback="") or None,
+            "compression": parser.get(
+                "retention", "compression", fallback="gz"
+            ).lower(),
+        }
+
         # Output files
         settings["output"] = {k: v for k, v in parser["output"].items() if v == "yes"}
 
@@ -61,6 +133,27 @@ class Configuration:
 
         return settings
 
+    def copy(self, **settings):
+        """Copy of the configuration with changed settings
+
+        :param settings: key-value pairs of settings to change
+        """
+        config = copy.copy(self)
+        # nested sections are not shared with this configuration
+        config._settings = copy.deepcopy(dict(self.settings, **settings))
+        return config
+
+    def snapshot(self):
+        """Immutable copy of the current settings, e.g. for the jobs of
+        worker processes
+
+        :rtype: FrozenConfiguration
+        """
+        config = FrozenConfiguration.__new__(FrozenConfiguration)
+        config.filepath = self.filepath
+        config._settings = copy.deepcopy(self.settings)
+        return config
+
     def local_copy(self, target=os.getcwd()):
         shutil.copy(self.filepath, target)
 
@@ -77,6 +170,45 @@ class Configuration:
         self.settings[key] = value
 
 
+class FrozenConfiguration(Configuration):
+    """Configuration snapshot, settings cannot be changed. The settings and
+    nested sections are read-only mappings. Use `copy` for a snapshot with
+    changed settings."""
+
+    def copy(self, **settings):
+        config = FrozenConfiguration.__new__(FrozenConfiguration)
+        config.filepath = self.filepath
+        config._settings = dict(self._settings, **copy.deepcopy(settings))
+        return config
+
+    def snapshot(self):
+        return self
+
+    @property
+    def settings(self):
+        # the settings are stored as plain dicts, which can be pickled
+        view = self.__dict__.get("_view")
+        if view is None:
+            view = self._view = _freeze(self._settings)
+        return view
+
+    def __setitem__(self, key, value):
+        raise TypeError("A configuration snapshot cannot be changed")
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_view", None)
+        return state
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
 def check_bin(bin_path, error_msg=""):
     # if absolute path is given, check if exits and executable
     if os.path.isabs(bin_path):
@@ -108,6 +240,11 @@ def check_bin(bin_path, error_msg=""):
     raise FileNotFoundError(error_msg)
 
 
+def _optional_float(parser, section, key):
+    value = parser.get(section, key, fallback="")
+    return float(value) if value else None
+
+
 def get_ghostscript(bin_path):
     try:
         return check_bin(bin_path)
@@ -0,0 +1,252 @@
+""" Mesh convergence studies of the AVL discretisation
+"""
+import copy
+from dataclasses import dataclass, field
+import math
+from typing import Dict, List
+
+from avlwrapper import logger
+from avlwrapper.preflight import PanelCount, panel_count
+from avlwrapper.scheduling import WorkStealingPool
+
+
+def refined_geometry(geometry, factor):
+    """Copy of a geometry with the numbers of chordwise, spanwise and body
+    panels multiplied by a factor, rounded and at least one. The spacing
+    types are kept.
+
+    :param avlwrapper.Aircraft geometry: AVL geometry
+    :param float factor: refinement factor, < 1 coarsens
+    :rtype: avlwrapper.Aircraft
+    """
+
+    def scale(n_panels):
+        return max(int(round(n_panels * factor)), 1)
+
+    refined = copy.deepcopy(geometry)
+    for surface in refined.surfaces:
+        surface.n_chordwise = scale(surface.n_chordwise)
+        if surface.n_spanwise is not None:
+            surface.n_spanwise = scale(surface.n_spanwise)
+        for section in surface.sections:
+            if section.n_spanwise is not None:
+                section.n_spanwise = scale(section.n_spanwise)
+    for body in refined.bodies:
+        body.n_body = scale(body.n_body)
+    return refined
+
+
+@dataclass
+class MeshLevel:
+    """Discretisation level of a mesh convergence study
+
+    :param float factor: refinement factor of the panel numbers
+    :param avlwrapper.Aircraft geometry: refined geometry
+    :param PanelCount panels: discretisation of the geometry
+    :param float seconds: estimated run time of the cases
+    :param Dict[str, List[float]] values: output values per case
+    :param Dict[str, List[float]] errors: absolute difference with the
+        extrapolated values per case
+    """
+
+    factor: float
+    geometry: object
+    panels: PanelCount
+    seconds: float
+    values: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, List[float]] = field(default_factory=dict)
+
+    def meets(self, tolerances):
+        """True if the errors of all outputs and cases are within the
+        tolerances"""
+        return all(
+            error <= tolerance
+            for output, tolerance in tolerances.items()
+            for error in self.errors[output]
+        )
+
+
+class MeshConvergence:
+    """Mesh convergence study. Refined and coarsened copies of the
+    geometry of a session run its (representative) cases in parallel.
+    The outputs are extrapolated to an infinitely fine mesh by Richardson
+    extrapolation of the three finest levels, with the observed order of
+    convergence and the element size taken as 1/sqrt(vortices). The
+    recommended level is the cheapest one whose outputs are within the
+    tolerances of the extrapolated values.
+
+    Example:
+    ```
+    study = MeshConvergence(session=session,
+                            outputs={'CLtot': 0.002, 'CDind': 0.0002})
+    level = study.run()
+    production_session = Session(geometry=level.geometry, cases=cases)
+    ```
+    """
+
+    def __init__(
+        self,
+        session,
+        outputs,
+        factors=(0.5, 0.7071, 1.0, 1.4142),
+        max_workers=None,
+        executor=None,
+        min_order=0.5,
+        max_order=4.0,
+    ):
+        """
+        :param avlwrapper.Session session: session with the geometry, the
+            representative cases, mass distribution and configuration
+        :param dict outputs: absolute tolerance by output. An output is a key
+            of the totals or a function returning a value from the results
+            of a case
+        :param typing.Sequence[float] factors: refinement factors of the
+            panel numbers, at least three distinct discretisations
+        :param Optional[int] max_workers: (optional) maximum number of
+            parallel AVL processes
+        :param Optional[avlwrapper.Executor] executor: (optional) executor
+            to run the levels with, one after the other
+        :param float min_order: lower bound of the observed order
+        :param float max_order: upper bound of the observed order
+        """
+        self.session = session
+        self.outputs = dict(outputs)
+        self.factors = sorted(factors)
+        self.max_workers = max_workers
+        self.executor = executor
+        self.min_order = min_order
+        self.max_order = max_order
+
+        self.levels = []
+        self.extrapolated = dict()
+        self.orders = dict()
+        self.recommended = None
+
+    def run(self):
+        """Runs all levels and recommends a discretisation
+
+        :returns: the recommended level, the finest level if no level meets
+            the tolerances
+        :rtype: MeshLevel
+        """
+        if not self.session.cases:
+            raise ValueError("A mesh convergence study requires cases")
+        self.levels = self._create_levels()
+        if len(self.levels) < 3:
+            raise ValueError("At least three distinct discretisations required")
+
+        sessions = [self._level_session(level.geometry) for level in self.levels]
+        for level, session in zip(self.levels, sessions):
+            level.seconds = session.estimate().seconds
+
+        if self.executor is not None:
+            level_results = [self._run_session(session) for session in sessions]
+        else:
+            pool = WorkStealingPool(self.max_workers)
+            level_results = pool.map(
+                self._run_session,
+                sessions,
+                costs=[level.seconds for level in self.levels],
+            )
+        for level, results in zip(self.levels, level_results):
+            level.values = {
+                output: [_output_value(r, output) for r in results]
+                for output in self.outputs
+            }
+
+        self._extrapolate()
+        meeting = [level for level in self.levels if level.meets(self.outputs)]
+        if meeting:
+            self.recommended = min(meeting, key=lambda level: level.seconds)
+        else:
+            logger.info("No discretisation meets the tolerances")
+            self.recommended = self.levels[-1]
+        return self.recommended
+
+    def _create_levels(self):
+        # levels from coarse to fine, factors which round to the same
+        # discretisation are run once
+        levels = dict()
+        for factor in self.factors:
+            geometry = refined_geometry(self.session.geometry, factor)
+            panels = panel_count(geometry)
+            key = (panels.vortices, panels.strips, panels.body_nodes)
+            levels.setdefault(key, MeshLevel(factor, geometry, panels, 0.0))
+        return [levels[key] for key in sorted(levels)]
+
+    def _level_session(self, geometry):
+        from avlwrapper.session import Session
+
+        session = self.session
+        return Session(
+            geometry=geometry,
+            cases=copy.deepcopy(session.cases),
+            mass_dist=session.mass_dist,
+            name=session.name,
+            config=session.config,
+            airfoil_staging=session.airfoil_staging,
+            staged=False,
+            profile=False,
+            stdout_results=session.stdout_results,
+            deduplicate=session.deduplicate,
+            mass_states=session.mass_states,
+        )
+
+    def _run_session(self, session):
+        results = session.run_all_cases(executor=self.executor)
+        return [results[number] for number in sorted(results)]
+
+    def _extrapolate(self):
+        fine, medium, coarse = self.levels[-1], self.levels[-2], self.levels[-3]
+        # element size ratios
+        r21 = math.sqrt(fine.panels.vortices / medium.panels.vortices)
+        r32 = math.sqrt(medium.panels.vortices / coarse.panels.vortices)
+
+        for output in self.outputs:
+            extrapolated, orders = [], []
+            for f1, f2, f3 in zip(
+                fine.values[output], medium.values[output], coarse.values[output]
+            ):
+                order = self._observed_order(f2 - f1, f3 - f2, r21, r32)
+                if order is None:
+                    extrapolated.append(f1)
+                else:
+                    extrapolated.append(f1 + (f1 - f2) / (r21**order - 1.0))
+                orders.append(order)
+            self.extrapolated[output] = extrapolated
+            self.orders[output] = orders
+
+            for level in self.levels:
+                level.errors[output] = [
+                    abs(value - exact)
+                    for value, exact in zip(level.values[output], extrapolated)
+                ]
+
+    def _observed_order(self, e21, e32, r21, r32):
+        # observed order for non-constant refinement ratios (fixed-point
+        # iteration), None if the finest levels are equal
+        if e21 == 0.0:
+            return None
+        if e32 == 0.0:
+            return self.max_order
+        sign = math.copysign(1.0, e32 / e21)
+        log_ratio = math.log(abs(e32 / e21))
+        order = abs(log_ratio) / math.log(r21)
+        for _ in range(50):
+            order = min(max(order, self.min_order), self.max_order)
+            numerator, denominator = r21**order - sign, r32**order - sign
+            if numerator <= 0.0 or denominator <= 0.0:
+                break
+            new_order = abs(log_ratio + math.log(numerator / denominator))
+            new_order /= math.log(r21)
+            if abs(new_order - order) < 1e-8:
+                order = new_order
+                break
+            order = new_order
+        return min(max(order, self.min_order), self.max_order)
+
+
+def _output_value(results, output):
+    if callable(output):
+        return output(results)
+    return results["Totals"][output]
@@ -0,0 +1,271 @@
+""" Space-filling designs of experiments over case parameters
+"""
+from abc import ABC, abstractmethod
+import copy
+import itertools
+import random
+
+# Sobol direction numbers of Joe and Kuo (new-joe-kuo-6.21201) for the
+# dimensions after the first: (degree s, coefficients a, initial m_i)
+JOE_KUO_DIRECTIONS = [
+    (1, 0, (1,)),
+    (2, 1, (1, 3)),
+    (3, 1, (1, 3, 1)),
+    (3, 2, (1, 1, 1)),
+    (4, 1, (1, 1, 3, 3)),
+    (4, 4, (1, 3, 5, 13)),
+    (5, 2, (1, 1, 5, 5, 17)),
+    (5, 4, (1, 1, 5, 5, 5)),
+    (5, 7, (1, 1, 7, 11, 19)),
+    (5, 11, (1, 1, 5, 1, 1)),
+    (5, 13, (1, 1, 1, 3, 11)),
+    (5, 14, (1, 3, 5, 5, 31)),
+    (6, 1, (1, 3, 3, 9, 7, 49)),
+    (6, 13, (1, 1, 1, 15, 21, 21)),
+    (6, 16, (1, 3, 1, 13, 27, 49)),
+    (6, 19, (1, 1, 1, 15, 7, 5)),
+    (6, 22, (1, 3, 1, 15, 13, 25)),
+    (6, 25, (1, 1, 5, 5, 19, 61)),
+    (7, 1, (1, 3, 7, 11, 23, 15, 103)),
+    (7, 4, (1, 3, 7, 13, 13, 15, 69)),
+]
+
+
+class Design(ABC):
+    """Sequence of points in the unit hypercube. Point i only depends on
+    the design settings and the seed, so a campaign can be extended by
+    generating points from the number of points already run.
+    """
+
+    def __init__(self, dimensions, seed=None):
+        """
+        :param int dimensions: number of parameters
+        :param Optional[int] seed: (optional) random seed
+        """
+        self.dimensions = dimensions
+        self.seed = seed
+
+    @abstractmethod
+    def points(self, n_points, start=0):
+        """Generates points of the design
+
+        :param int n_points: number of points
+        :param int start: index of the first point
+        :returns: generator of tuples with values in [0, 1)
+        """
+        raise NotImplementedError
+
+
+class LatinHypercube(Design):
+    """Latin hypercube design. The design consists of consecutive blocks of
+    `block_size` points, every block is a Latin hypercube of its own, so
+    extending the design adds complete blocks.
+    """
+
+    def __init__(self, dimensions, seed=None, block_size=25):
+        """
+        :param int dimensions: number of parameters
+        :param Optional[int] seed: (optional) random seed, a seed is drawn
+            (and stored in `seed`) if not given
+        :param int block_size: number of points per Latin hypercube
+        """
+        if seed is None:
+            seed = random.randrange(2**32)
+        super().__init__(dimensions, seed)
+        self.block_size = block_size
+
+    def _block(self, block_idx):
+        rng = random.Random(f"{self.seed}-{block_idx}")
+        columns = []
+        for _ in range(self.dimensions):
+            strata = list(range(self.block_size))
+            rng.shuffle(strata)
+            columns.append(
+                [(stratum + rng.random()) / self.block_size for stratum in strata]
+            )
+        return list(zip(*columns))
+
+    def points(self, n_points, start=0):
+        block_idx, idx = divmod(start, self.block_size)
+        block = self._block(block_idx)
+        for _ in range(n_points):
+            if idx == self.block_size:
+                block_idx, idx = block_idx + 1, 0
+                block = self._block(block_idx)
+            yield block[idx]
+            idx += 1
+
+
+class Halton(Design):
+    """Halton sequence using the first primes as bases. With a seed, the
+    sequence is randomised by a random shift (modulo 1) per dimension.
+    """
+
+    def __init__(self, dimensions, seed=None):
+        super().__init__(dimensions, seed)
+        self.bases = list(itertools.islice(_primes(), dimensions))
+        if seed is None:
+            self._shifts = [0.0] * dimensions
+        else:
+            rng = random.Random(seed)
+            self._shifts = [rng.random() for _ in range(dimensions)]
+
+    def points(self, n_points, start=0):
+        for idx in range(start, start + n_points):
+            yield tuple(
+                (_radical_inverse(idx, base) + shift) % 1.0
+                for base, shift in zip(self.bases, self._shifts)
+            )
+
+
+class Sobol(Design):
+    """Sobol sequence with the direction numbers of Joe and Kuo. With a seed,
+    the sequence is randomised by a random digital shift per dimension.
+    Balance properties hold for numbers of points that are powers of two.
+    """
+
+    BITS = 32
+
+    def __init__(self, dimensions, seed=None, directions=JOE_KUO_DIRECTIONS):
+        """
+        :param int dimensions: number of parameters
+        :param Optional[int] seed: (optional) random seed
+        :param directions: (optional) direction numbers (s, a, m_i) of the
+            dimensions after the first, to support more dimensions
+        """
+        if dimensions > len(directions) + 1:
+            raise ValueError(
+                f"Direction numbers are available for "
+                f"{len(directions) + 1} dimensions"
+            )
+        super().__init__(dimensions, seed)
+        self._v = [self._direction_vector(None)]
+        self._v += [self._direction_vector(d) for d in directions[: dimensions - 1]]
+        if seed is None:
+            self._shifts = [0] * dimensions
+        else:
+            rng = random.Random(seed)
+            self._shifts = [rng.getrandbits(self.BITS) for _ in range(dimensions)]
+
+    def _direction_vector(self, direction):
+        if direction is None:
+            return [1 << (self.BITS - 1 - k) for k in range(self.BITS)]
+
+        s, a, m = direction
+        v = [m[k] << (self.BITS - 1 - k) for k in range(s)]
+        for k in range(s, self.BITS):
+            value = v[k - s] ^ (v[k - s] >> s)
+            for j in range(1, s):
+                if (a >> (s - 1 - j)) & 1:
+                    value ^= v[k - j]
+            v.append(value)
+        return v
+
+    def points(self, n_points, start=0):
+        if start + n_points > 2**self.BITS:
+            raise ValueError("Sobol sequence exhausted")
+        scale = 2.0**-self.BITS
+
+        # first point from its Gray code, the next ones differ by one
+        # direction number each
+        gray = start ^ (start >> 1)
+        x = list(self._shifts)
+        for dim, v in enumerate(self._v):
+            for k in range(self.BITS):
+                if (gray >> k) & 1:
+                    x[dim] ^= v[k]
+
+        for idx in range(start, start + n_points):
+            yield tuple(value * scale for value in x)
+            bit = _lowest_zero_bit(idx)
+            for dim, v in enumerate(self._v):
+                if bit < self.BITS:
+                    x[dim] ^= v[bit]
+
+
+def create_doe_cases(base_case, parameters, design, n_cases, start=0):
+    """Creates cases from a design of experiments, lazily
+
+    :param avlwrapper.Case base_case: base Case object
+    :param typing.Sequence parameters: list of a dict with keys: name and
+        bounds (lower, upper). Names are case parameters, states or controls
+    :param Design design: design with one dimension per parameter
+    :param int n_cases: number of cases
+    :param int start: index of the first design point, to extend an
+        earlier campaign
+    :returns: generator of cases, named after the base case and point index
+
+    Example:
+    ```
+    cases = create_doe_cases(base_case=cruise_case,
+                             parameters=[{'name': 'alpha',
+                                          'bounds': (-5.0, 15.0)},
+                                         {'name': 'elevator',
+                                          'bounds': (-20.0, 20.0)}],
+                             design=Sobol(dimensions=2, seed=1),
+                             n_cases=256)
+    ```
+    """
+    # ensure input is a list if a dict (only one parameter) is given
+    if isinstance(parameters, dict):
+        parameters = [parameters]
+    if design.dimensions != len(parameters):
+        raise ValueError("The design dimensions do not match the parameters")
+
+    names = [p["name"] for p in parameters]
+    bounds = [p["bounds"] for p in parameters]
+    for idx, point in enumerate(design.points(n_cases, start), start=start):
+        values = [
+            lower + value * (upper - lower)
+            for value, (lower, upper) in zip(point, bounds)
+        ]
+        case = copy.deepcopy(base_case)
+        case.name = "{}-{}".format(base_case.name, idx)
+        case.update(**dict(zip(names, values)))
+        yield case
+
+
+def run_doe(session, cases, partition_size=None, executor=None):
+    """Runs (lazily created) cases in partitions, only one partition of
+    cases is created and kept in memory at a time
+
+    :param avlwrapper.Session session: session providing the geometry,
+        mass distribution and configuration, its cases are not used
+    :param typing.Iterable cases: cases, e.g. from `create_doe_cases`
+    :param Optional[int] partition_size: (optional) number of cases per
+        partition, defaults to Session.CASES_PER_FILE
+    :param Optional[avlwrapper.Executor] executor: (optional) executor to
+        run every partition with (see `Session.run_all_cases`)
+    :returns: generator of (case, results) tuples
+    """
+    partition_size = partition_size or session.CASES_PER_FILE
+    cases = iter(cases)
+    while True:
+        partition = list(itertools.islice(cases, partition_size))
+        if not partition:
+            break
+        partition_session = session._partition_session(partition)
+        results = partition_session.run_all_cases(executor=executor)
+        for case in partition_session.cases:
+            yield case, results[case.number]
+
+
+def _primes():
+    primes = []
+    for candidate in itertools.count(2):
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+            yield candidate
+
+
+def _radical_inverse(idx, base):
+    inverse, factor = 0.0, 1.0 / base
+    while idx > 0:
+        idx, digit = divmod(idx, base)
+        inverse += digit * factor
+        factor /= base
+    return inverse
+
+
+def _lowest_zero_bit(idx):
+    return ((~idx) & (idx + 1)).bit_length() - 1
@@ -0,0 +1,920 @@
+""" Flight-dynamics post-processing of AVL eigenmode results and linear
+flight-dynamics models built from AVL stability derivatives
+
+Requires NumPy, which is not a dependency of the core package.
+"""
+import copy
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+from avlwrapper.cases import CaseTable
+from avlwrapper.model import InputError, MassModifier, ModifierType
+
+LONGITUDINAL_STATES = ("u", "w", "q", "the")
+LATERAL_STATES = ("v", "p", "r", "phi")
+
+SHORT_PERIOD = "short_period"
+PHUGOID = "phugoid"
+DUTCH_ROLL = "dutch_roll"
+ROLL = "roll"
+SPIRAL = "spiral"
+
+
+@dataclass
+class ModeResults:
+    """Stacked eigenmode results of multiple cases
+
+    :param List[int] numbers: case numbers
+    :param List[str] names: case names
+    :param List[str] states: state names (rows/columns of A)
+    :param List[str] controls: control names (columns of B)
+    :param numpy.ndarray A: system matrices, shape (n_cases, n, n)
+    :param numpy.ndarray B: control matrices, shape (n_cases, n, m)
+    :param numpy.ndarray eigenvalues: complex eigenvalues,
+        shape (n_cases, n_modes), padded with NaN
+    :param numpy.ndarray labels: mode label per eigenvalue,
+        shape (n_cases, n_modes), empty string for padding
+    """
+
+    numbers: List[int]
+    names: List[str]
+    states: List[str]
+    controls: List[str]
+    A: np.ndarray
+    B: np.ndarray
+    eigenvalues: np.ndarray
+    labels: np.ndarray = field(default=None)
+
+    def __len__(self):
+        return len(self.numbers)
+
+    def modes(self, label):
+        """Returns the eigenvalues with the given label, NaN where absent
+
+        :param str label: mode label, e.g. "dutch_roll"
+        """
+        return np.where(self.labels == label, self.eigenvalues, np.nan)
+
+
+def system_matrices(sys_result):
+    """Converts a parsed system matrix file to arrays
+
+    :param dict sys_result: output of SystemMatrixFileReader
+    :return: state names, control names, A and B matrices
+    """
+    keys = list(sys_result.keys())
+    n_states = len(sys_result[keys[0]])
+    states, controls = keys[:n_states], keys[n_states:]
+    a_mat = np.array([sys_result[key] for key in states]).T
+    if controls:
+        b_mat = np.array([sys_result[key] for key in controls]).T
+    else:
+        b_mat = np.zeros((n_states, 0))
+    return states, controls, a_mat, b_mat
+
+
+def eigenvalue_array(eig_result):
+    """Converts a parsed eigenvalue file to a complex array per run case
+
+    :param dict eig_result: output of EigenValuesFileReader
+    :rtype: Dict[str, numpy.ndarray]
+    """
+    return {
+        case: np.array([complex(re, im) for re, im in values])
+        for case, values in eig_result.items()
+    }
+
+
+def label_modes(a_mat, states, eigenvalues):
+    """Assigns a mode name to eigenvalues of a rigid aircraft
+
+    The longitudinal (u, w, q, theta) and lateral (v, p, r, phi) blocks of the
+    system matrix are analysed separately. Longitudinal roots are split by
+    magnitude into short period and phugoid. Lateral oscillatory roots are
+    Dutch roll, the fastest remaining real root is the roll mode and the
+    slowest the spiral mode. Each eigenvalue gets the label of the nearest
+    block root.
+
+    :param numpy.ndarray a_mat: system matrix (n, n)
+    :param List[str] states: state names of the system matrix
+    :param numpy.ndarray eigenvalues: eigenvalues to be labelled
+    :rtype: numpy.ndarray
+    """
+    block_roots, block_labels = [], []
+    for block_states, labeller in [
+        (LONGITUDINAL_STATES, _label_longitudinal),
+        (LATERAL_STATES, _label_lateral),
+    ]:
+        if not all(state in states for state in block_states):
+            continue
+        idx = [states.index(state) for state in block_states]
+        roots = np.linalg.eigvals(a_mat[np.ix_(idx, idx)])
+        block_roots.extend(roots)
+        block_labels.extend(labeller(roots))
+
+    labels = np.full(len(eigenvalues), "", dtype=object)
+    if not block_roots:
+        return labels
+    block_roots = np.array(block_roots)
+    for i, value in enumerate(eigenvalues):
+        if np.isnan(value):
+            continue
+        labels[i] = block_labels[int(np.argmin(np.abs(block_roots - value)))]
+    return labels
+
+
+def _label_longitudinal(roots):
+    order = np.argsort(np.abs(roots))
+    labels = [PHUGOID] * len(roots)
+    for i in order[len(roots) // 2 :]:
+        labels[i] = SHORT_PERIOD
+    return labels
+
+
+def _label_lateral(roots):
+    labels = [""] * len(roots)
+    oscillatory = [i for i, root in enumerate(roots) if abs(root.imag) > 1e-9]
+    real = [i for i in np.argsort(np.abs(roots)) if i not in oscillatory]
+    for i in oscillatory:
+        labels[i] = DUTCH_ROLL
+    if real:
+        labels[real[0]] = SPIRAL
+        labels[real[-1]] = ROLL
+        for i in real[1:-1]:
+            labels[i] = DUTCH_ROLL
+    return labels
+
+
+def stack_mode_results(cases, mode_results):
+    """Stacks per-case eigenmode results to arrays
+
+    :param List[avlwrapper.Case] cases: analysed cases
+    :param List[dict] mode_results: per-case results with "SystemMatrix"
+        and "EigenValues" entries
+    :rtype: ModeResults
+    """
+    states, controls = None, None
+    a_mats, b_mats, eig_lists = [], [], []
+    for result in mode_results:
+        states, controls, a_mat, b_mat = system_matrices(result["SystemMatrix"])
+        a_mats.append(a_mat)
+        b_mats.append(b_mat)
+        eigs = eigenvalue_array(result["EigenValues"])
+        eig_lists.append(np.concatenate(list(eigs.values())) if eigs else [])
+
+    n_modes = max([len(e) for e in eig_lists], default=0)
+    eigenvalues = np.full((len(eig_lists), n_modes), np.nan, dtype=complex)
+    for i, eigs in enumerate(eig_lists):
+        eigenvalues[i, : len(eigs)] = eigs
+
+    results = ModeResults(
+        numbers=[case.number for case in cases],
+        names=[case.name for case in cases],
+        states=states,
+        controls=controls,
+        A=np.array(a_mats),
+        B=np.array(b_mats),
+        eigenvalues=eigenvalues,
+    )
+    results.labels = np.array(
+        [
+            label_modes(a_mat, states, eigs)
+            for a_mat, eigs in zip(results.A, results.eigenvalues)
+        ]
+    ).reshape(eigenvalues.shape)
+    return results
+
+
+# Linear flight-dynamics model
+# State order of the AVL system matrix
+STATES = ("u", "w", "q", "the", "v", "p", "r", "phi", "x", "y", "z", "psi")
+_VELOCITY_VARS = ("u", "v", "w")
+_RATE_VARS = ("p", "q", "r")
+_FORCES = ("CX", "CY", "CZ")
+_MOMENTS = ("Cl", "Cm", "Cn")
+
+# rows/columns of u, v, w and p, q, r in the system matrix
+_VELOCITY_IDX = np.array([0, 4, 1])
+_RATE_IDX = np.array([5, 2, 6])
+_BODY_IDX = np.concatenate([_VELOCITY_IDX, _RATE_IDX])
+# number of states excluding position and heading
+_N_RIGID = 8
+_INERTIA_STATES = ("Ixx", "Iyy", "Izz", "Ixy", "Iyz", "Izx")
+
+
+@dataclass
+class MassProperties:
+    """Mass properties of one or more loading configurations
+
+    Values follow the AVL run-case states: mass in mass units, CG in
+    geometry (length) units and inertias about the CG in mass * m^2. As
+    set by AVL, the products of inertia are inertia tensor components in
+    geometry axes, e.g. Ixy = -int(x y dm).
+
+    :param numpy.ndarray mass: masses, shape (n,)
+    :param numpy.ndarray cg: CG locations in geometry axes, shape (n, 3)
+    :param numpy.ndarray inertia: Ixx, Iyy, Izz, Ixy, Iyz, Izx, shape (n, 6)
+    """
+
+    mass: np.ndarray
+    cg: np.ndarray
+    inertia: np.ndarray
+
+    def __post_init__(self):
+        self.mass = np.atleast_1d(np.asarray(self.mass, dtype=float))
+        n = len(self.mass)
+        self.cg = np.broadcast_to(np.asarray(self.cg, dtype=float), (n, 3))
+        self.inertia = np.broadcast_to(np.asarray(self.inertia, dtype=float), (n, 6))
+
+    def __len__(self):
+        return len(self.mass)
+
+    @classmethod
+    def from_cases(cls, cases):
+        """Mass properties from the states of AVL cases
+
+        :param cases: cases with mass states
+        :type cases: List[avlwrapper.Case] or avlwrapper.cases.CaseTable
+        """
+        if isinstance(cases, CaseTable):
+            return cls(
+                mass=cases.states["mass"],
+                cg=np.stack([cases.states[key] for key in ["X_cg", "Y_cg", "Z_cg"]], axis=-1),
+                inertia=np.stack([cases.states[key] for key in _INERTIA_STATES], axis=-1),
+            )
+        return cls(
+            mass=[case.states["mass"].value for case in cases],
+            cg=[
+                [case.states[key].value for key in ["X_cg", "Y_cg", "Z_cg"]]
+                for case in cases
+            ],
+            inertia=[
+                [case.states[key].value for key in _INERTIA_STATES] for case in cases
+            ],
+        )
+
+    @classmethod
+    def from_items(cls, mass, position, inertia=None, mass_unit=1.0, length_unit=1.0):
+        """Mass properties of batches of mass items, computed in one call
+
+        :param numpy.ndarray mass: item masses, shape (k,) or (n, k)
+        :param numpy.ndarray position: item CG locations, shape (k, 3)
+            or (n, k, 3)
+        :param Optional[numpy.ndarray] inertia: (optional) inertias of the
+            items about their own CG in mass file order (Ixx, Iyy, Izz,
+            Ixy, Ixz, Iyz, with Ixy = int(x y dm)), shape (k, 6) or (n, k, 6)
+        :param mass_unit: mass of one table mass unit, see
+            MassDistribution.mass_scaling, a scalar or shape (n,)
+        :param length_unit: length of one table length unit in meters, see
+            MassDistribution.length_scaling, a scalar or shape (n,)
+        :rtype: MassProperties
+        """
+        mass = np.atleast_2d(np.asarray(mass, dtype=float))
+        n, k = mass.shape
+        position = np.broadcast_to(np.asarray(position, dtype=float), (n, k, 3))
+        if inertia is None:
+            inertia = np.zeros(6)
+        inertia = np.broadcast_to(np.asarray(inertia, dtype=float), (n, k, 6))
+
+        total = mass.sum(axis=1)
+        cg = np.einsum("nk,nkj->nj", mass, position) / total[:, None]
+        offset = position - cg[:, None, :]
+        # sum of m * d_i * d_j of the items about the CG, shape (n, 3, 3)
+        second = np.einsum("nk,nki,nkj->nij", mass, offset, offset)
+        own = inertia.sum(axis=1)
+
+        moments = np.stack(
+            [
+                own[:, 0] + second[:, 1, 1] + second[:, 2, 2],
+                own[:, 1] + second[:, 0, 0] + second[:, 2, 2],
+                own[:, 2] + second[:, 0, 0] + second[:, 1, 1],
+                -(own[:, 3] + second[:, 0, 1]),
+                -(own[:, 5] + second[:, 1, 2]),
+                -(own[:, 4] + second[:, 0, 2]),
+            ],
+            axis=-1,
+        )
+        inertia_unit = np.asarray(mass_unit) * np.asarray(length_unit) ** 2
+        return cls(
+            mass=total * mass_unit,
+            cg=cg,
+            inertia=moments * np.reshape(inertia_unit, (-1, 1)),
+        )
+
+    @classmethod
+    def from_distribution(cls, mass_dist, factors=None):
+        """Mass properties of loading variants of a mass distribution, e.g.
+        fuel and payload combinations
+
+        :param avlwrapper.MassDistribution mass_dist: mass distribution
+        :param factors: (optional) factors on the mass and own inertia of
+            the items (after the modifiers), shape (k,) or (n, k), or a dict
+            with factors (scalar or shape (n,)) by item index or name
+        :type factors: numpy.ndarray or dict
+        :rtype: MassProperties
+
+        Example:
+        ```
+        fuel, payload = np.meshgrid(np.linspace(0, 1, 50), np.linspace(0, 1, 40))
+        loadings = MassProperties.from_distribution(
+            mass_dist, factors={"fuel": fuel.ravel(), "PAX": payload.ravel()}
+        )
+        ```
+        """
+        names, mass, position, inertia = mass_table(mass_dist)
+        if isinstance(factors, dict):
+            factors = _item_factors(factors, names)
+        if factors is not None:
+            factors = np.atleast_2d(np.asarray(factors, dtype=float))
+            if factors.shape[1] != len(mass):
+                raise InputError("One factor per mass item required")
+            mass = factors * mass
+            inertia = factors[..., None] * inertia
+        return cls.from_items(
+            mass,
+            position,
+            inertia,
+            mass_unit=mass_dist.mass_scaling,
+            length_unit=mass_dist.length_scaling,
+        )
+
+    @classmethod
+    def from_distributions(cls, distributions):
+        """Mass properties of many mass distributions, computed in one call
+
+        :param typing.Sequence[avlwrapper.MassDistribution] distributions:
+            mass distributions, e.g. with different fuel and payload items
+        :rtype: MassProperties
+        """
+        tables = [mass_table(mass_dist)[1:] for mass_dist in distributions]
+        n, k = len(tables), max(len(table[0]) for table in tables)
+        # pad with massless items
+        mass = np.zeros((n, k))
+        position, inertia = np.zeros((n, k, 3)), np.zeros((n, k, 6))
+        for idx, (item_mass, item_position, item_inertia) in enumerate(tables):
+            mass[idx, : len(item_mass)] = item_mass
+            position[idx, : len(item_mass)] = item_position
+            inertia[idx, : len(item_mass)] = item_inertia
+        return cls.from_items(
+            mass,
+            position,
+            inertia,
+            mass_unit=np.array([d.mass_scaling for d in distributions]),
+            length_unit=np.array([d.length_scaling for d in distributions]),
+        )
+
+    def set_case_states(self, cases, density=None, gravity=None):
+        """Writes the mass, CG and inertia states of cases. A single
+        loading configuration is written to all cases. Run the cases with
+        `Session(mass_states=True)`, otherwise AVL replaces the states by
+        the totals of the session's mass distribution.
+
+        :param cases: cases, one per loading configuration
+        :type cases: List[avlwrapper.Case] or avlwrapper.cases.CaseTable
+        :param Optional[float] density: (optional) air density, e.g.
+            MassDistribution.density
+        :param Optional[float] gravity: (optional) gravitational
+            acceleration, e.g. MassDistribution.gravity
+        """
+        if len(self) not in (1, len(cases)):
+            raise InputError("One loading configuration per case required")
+        states = {"mass": self.mass}
+        states.update(zip(["X_cg", "Y_cg", "Z_cg"], self.cg.T))
+        states.update(zip(_INERTIA_STATES, self.inertia.T))
+        if density is not None:
+            states["density"] = np.full(len(self), density)
+        if gravity is not None:
+            states["gravity"] = np.full(len(self), gravity)
+
+        if isinstance(cases, CaseTable):
+            for key, values in states.items():
+                cases[key] = values
+            return
+        for idx, case in enumerate(cases):
+            row = idx if len(self) > 1 else 0
+            for key, values in states.items():
+                case.states[key].value = float(values[row])
+
+    def create_cases(self, base_case, density=None, gravity=None):
+        """Creates a case per loading configuration, named after the base
+        case and the configuration index
+
+        :param avlwrapper.Case base_case: base Case object
+        :param Optional[float] density: (optional) air density
+        :param Optional[float] gravity: (optional) gravitational acceleration
+        :rtype: List[avlwrapper.Case]
+        """
+        cases = []
+        for idx in range(len(self)):
+            case = copy.deepcopy(base_case)
+            case.name = "{}-{}".format(base_case.name, idx)
+            cases.append(case)
+        self.set_case_states(cases, density, gravity)
+        return cases
+
+    def tensor(self):
+        """Inertia tensors in body axes (X fwd, Y right, Z down),
+        shape (n, 3, 3)"""
+        ixx, iyy, izz, ixy, iyz, izx = self.inertia.T
+        # the geometry x and z axes point aft and up
+        return np.stack(
+            [
+                np.stack([ixx, -ixy, izx], axis=-1),
+                np.stack([-ixy, iyy, -iyz], axis=-1),
+                np.stack([izx, -iyz, izz], axis=-1),
+            ],
+            axis=1,
+        )
+
+
+def mass_table(mass_dist):
+    """Converts the items of a mass distribution to arrays, the modifiers
+    are applied as by `MassDistribution.simplify`
+
+    :param avlwrapper.MassDistribution mass_dist: mass distribution
+    :return: item names, masses (k,), CG locations (k, 3) and inertias in
+        mass file order (k, 6), in table units
+    """
+    names, rows, multipliers, adders = [], [], [], []
+    multiplier, adder = np.ones(10), np.zeros(10)
+    for item in mass_dist.masses:
+        values = np.zeros(10)
+        values[0] = item.mass
+        values[1:4] = list(item.position)
+        if item.inertia is not None:
+            values[4:] = list(item.inertia)
+        if isinstance(item, MassModifier):
+            if item.mod_type == ModifierType.addition:
+                adder = values
+            else:
+                multiplier = values
+            continue
+        names.append(item.name)
+        rows.append(values)
+        multipliers.append(multiplier)
+        adders.append(adder)
+
+    rows, multipliers, adders = (
+        np.reshape(values, (-1, 10)) for values in (rows, multipliers, adders)
+    )
+    table = rows * multipliers + adders
+    return names, table[:, 0], table[:, 1:4], table[:, 4:]
+
+
+def _item_factors(factors, names):
+    n = max([np.size(value) for value in factors.values()], default=1)
+    columns = np.ones((n, len(names)))
+    for key, value in factors.items():
+        if isinstance(key, str):
+            if key not in names:
+                raise InputError(f"Unknown mass item: {key}")
+            key = names.index(key)
+        columns[:, key] = value
+    return columns
+
+
+@dataclass
+class FlightCondition:
+    """Reference flight condition of the linearisation
+
+    :param float velocity: airspeed
+    :param float density: air density
+    :param float gravity: gravitational acceleration
+    :param float alpha: angle of attack (deg)
+    :param float beta: sideslip angle (deg)
+    :param float elevation: pitch attitude (deg)
+    :param Tuple[float, float, float] reference_point: moment reference point
+        of the derivatives in geometry units
+    """
+
+    velocity: float
+    density: float
+    gravity: float
+    alpha: float = 0.0
+    beta: float = 0.0
+    elevation: float = 0.0
+    reference_point: tuple = (0.0, 0.0, 0.0)
+
+    @classmethod
+    def from_case(cls, case, totals=None):
+        """Flight condition from an AVL case. When given, the angles of the
+        (trimmed) totals result take precedence over the case states.
+
+        :param avlwrapper.Case case: analysed case
+        :param Optional[dict] totals: parsed totals of the case
+        """
+        states = case.states
+        alpha, beta = states["alpha"].value, states["beta"].value
+        if totals is not None:
+            alpha, beta = totals.get("Alpha", alpha), totals.get("Beta", beta)
+        return cls(
+            velocity=states["velocity"].value,
+            density=states["density"].value,
+            gravity=states["gravity"].value,
+            alpha=alpha,
+            beta=beta,
+            elevation=states["elevation"].value,
+            reference_point=tuple(
+                states[key].value or 0.0 for key in ["X_cg", "Y_cg", "Z_cg"]
+            ),
+        )
+
+    @property
+    def body_velocity(self):
+        alpha, beta = np.radians(self.alpha), np.radians(self.beta)
+        return self.velocity * np.array(
+            [np.cos(alpha) * np.cos(beta), np.sin(beta), np.sin(alpha) * np.cos(beta)]
+        )
+
+    @property
+    def dynamic_pressure(self):
+        return 0.5 * self.density * self.velocity**2
+
+
+class LinearModel:
+    """Linear rigid-body flight-dynamics model
+
+    The aerodynamics are stored as dimensional body-axis derivatives
+    (X fwd, Y right, Z down) about a reference point. Mass, CG and inertia
+    only enter when the system matrices are built, so many loading
+    configurations can be evaluated in one vectorised call.
+
+    :param numpy.ndarray force: d(X, Y, Z)/d(u, v, w, p, q, r), shape (3, 6)
+    :param numpy.ndarray moment: d(L, M, N)/d(u, v, w, p, q, r), shape (3, 6)
+    :param numpy.ndarray force_control: d(X, Y, Z)/d(control), shape (3, m)
+    :param numpy.ndarray moment_control: d(L, M, N)/d(control), shape (3, m)
+    :param List[str] controls: control names
+    :param FlightCondition flight: reference flight condition
+    :param float length_unit: length of one geometry unit in meters,
+        see MassDistribution.length_scaling
+    """
+
+    def __init__(
+        self,
+        force,
+        moment,
+        force_control,
+        moment_control,
+        controls,
+        flight,
+        length_unit=1.0,
+    ):
+        self.force = np.asarray(force, dtype=float)
+        self.moment = np.asarray(moment, dtype=float)
+        self.force_control = np.asarray(force_control, dtype=float).reshape(3, -1)
+        self.moment_control = np.asarray(moment_control, dtype=float).reshape(3, -1)
+        self.controls = list(controls)
+        self.flight = flight
+        self.length_unit = length_unit
+
+    @classmethod
+    def from_body_axis_derivatives(cls, derivatives, geometry, flight, length_unit=1.0):
+        """Model from AVL body-axis derivatives
+
+        :param dict derivatives: parsed BodyAxisDerivatives result
+        :param avlwrapper.Aircraft geometry: AVL geometry (reference values)
+        :param FlightCondition flight: reference flight condition
+        :param float length_unit: length of one geometry unit in meters
+        """
+        area = geometry.reference_area * length_unit**2
+        chord = geometry.reference_chord * length_unit
+        span = geometry.reference_span * length_unit
+        velocity = flight.velocity
+        q_s = flight.dynamic_pressure * area
+
+        # normalisation of the velocities and rates
+        var_scale = {
+            "u": velocity,
+            "v": velocity,
+            "w": velocity,
+            "p": 2 * velocity / span,
+            "q": 2 * velocity / chord,
+            "r": 2 * velocity / span,
+        }
+        variables = _VELOCITY_VARS + _RATE_VARS
+        force = np.array(
+            [
+                [q_s * derivatives[c + v] / var_scale[v] for v in variables]
+                for c in _FORCES
+            ]
+        )
+        moment_length = {"Cl": span, "Cm": chord, "Cn": span}
+        moment = np.array(
+            [
+                [
+                    q_s * moment_length[c] * derivatives[c + v] / var_scale[v]
+                    for v in variables
+                ]
+                for c in _MOMENTS
+            ]
+        )
+
+        controls = _control_names(derivatives, geometry)
+        force_control = np.array(
+            [
+                [q_s * derivatives.get(f"{c}_{d}", 0.0) for d in controls]
+                for c in _FORCES
+            ]
+        )
+        moment_control = np.array(
+            [
+                [
+                    q_s * moment_length[c] * derivatives.get(f"{c}_{d}", 0.0)
+                    for d in controls
+                ]
+                for c in _MOMENTS
+            ]
+        )
+        return cls(
+            force, moment, force_control, moment_control, controls, flight, length_unit
+        )
+
+    @classmethod
+    def from_stability_derivatives(
+        cls, derivatives, totals, geometry, flight, length_unit=1.0
+    ):
+        """Model from AVL stability-axis derivatives
+
+        Stability-axis results contain no drag derivatives; the drag
+        derivatives of alpha and the rates are estimated from the induced
+        drag and the control drag from the Trefftz-plane values.
+
+        :param dict derivatives: parsed StabilityDerivatives result
+        :param dict totals: parsed Totals result of the same case
+        :param avlwrapper.Aircraft geometry: AVL geometry (reference values)
+        :param FlightCondition flight: reference flight condition
+        :param float length_unit: length of one geometry unit in meters
+        """
+        aspect_ratio = geometry.reference_span**2 / geometry.reference_area
+        body_derivatives = body_axis_derivatives(derivatives, totals, aspect_ratio)
+        return cls.from_body_axis_derivatives(
+            body_derivatives, geometry, flight, length_unit
+        )
+
+    @classmethod
+    def from_system_matrix(cls, sys_result, mass_props, flight, length_unit=1.0):
+        """Model extracted from an AVL system matrix. The derivatives are
+        referred to the CG of the mass properties used by AVL.
+
+        :param dict sys_result: parsed SystemMatrix result
+        :param MassProperties mass_props: mass properties of the AVL run
+        :param FlightCondition flight: reference flight condition
+        :param float length_unit: length of one geometry unit in meters
+        """
+        states, controls, a_mat, b_mat = system_matrices(sys_result)
+        idx = [states.index(s) for s in STATES[:_N_RIGID]]
+        a_mat = a_mat[np.ix_(idx, idx)]
+        b_mat = b_mat[idx, :]
+
+        flight = FlightCondition(
+            **{**flight.__dict__, "reference_point": tuple(mass_props.cg[0])}
+        )
+        kinematic = cls._kinematic_terms(flight)
+        mass = mass_props.mass[0]
+        tensor = mass_props.tensor()[0]
+
+        body_a = a_mat[np.ix_(_BODY_IDX, _BODY_IDX)] - kinematic
+        force = mass * body_a[:3]
+        moment = tensor @ body_a[3:]
+        force_control = mass * b_mat[_VELOCITY_IDX]
+        moment_control = tensor @ b_mat[_RATE_IDX]
+        return cls(
+            force, moment, force_control, moment_control, controls, flight, length_unit
+        )
+
+    @staticmethod
+    def _kinematic_terms(flight):
+        # Coriolis terms -omega x V0 of the force equations, rows (u, v, w),
+        # columns (u, v, w, p, q, r)
+        u0, v0, w0 = flight.body_velocity
+        terms = np.zeros((6, 6))
+        terms[0, 4], terms[0, 5] = -w0, v0
+        terms[1, 3], terms[1, 5] = w0, -u0
+        terms[2, 3], terms[2, 4] = -v0, u0
+        return terms
+
+    def _cg_offsets(self, mass_props):
+        # vector from CG to reference point in body axes (meters)
+        offset = (
+            np.asarray(self.flight.reference_point) - mass_props.cg
+        ) * self.length_unit
+        return offset * np.array([-1.0, 1.0, -1.0])
+
+    def system_matrices(self, mass_props):
+        """System matrices for all loading configurations
+
+        :param MassProperties mass_props: loading configurations
+        :return: A with shape (n, 12, 12) and B with shape (n, 12, m), states
+            ordered as in the AVL system matrix (see STATES)
+        """
+        n = len(mass_props)
+        skew = _skew(self._cg_offsets(mass_props))
+
+        # refer derivatives to the CG: rotation about the CG changes the
+        # velocity at the reference point and forces add a moment
+        force_v, force_w = self.force[:, :3], self.force[:, 3:]
+        moment_v, moment_w = self.moment[:, :3], self.moment[:, 3:]
+        force_w = force_w - force_v @ skew
+        moment_w = moment_w - moment_v @ skew
+        force = np.concatenate([np.broadcast_to(force_v, (n, 3, 3)), force_w], axis=-1)
+        moment = np.concatenate(
+            [np.broadcast_to(moment_v, (n, 3, 3)), moment_w], axis=-1
+        )
+        moment = moment + skew @ force
+        moment_control = self.moment_control + skew @ self.force_control
+
+        inv_mass = 1.0 / mass_props.mass[:, None, None]
+        inv_tensor = np.linalg.inv(mass_props.tensor())
+
+        a_mat = np.zeros((n, len(STATES), len(STATES)))
+        body = np.concatenate([force * inv_mass, inv_tensor @ moment], axis=1)
+        a_mat[:, _BODY_IDX[:, None], _BODY_IDX[None, :]] = body + self._kinematic_terms(
+            self.flight
+        )
+
+        # gravity and kinematic relations
+        u0, v0, w0 = self.flight.body_velocity
+        g = self.flight.gravity
+        theta = np.radians(self.flight.elevation)
+        cos_t, sin_t = np.cos(theta), np.sin(theta)
+        idx = {state: i for i, state in enumerate(STATES)}
+        rows_cols_values = [
+            ("u", "the", -g * cos_t),
+            ("w", "the", -g * sin_t),
+            ("v", "phi", g * cos_t),
+            ("the", "q", 1.0),
+            ("phi", "p", 1.0),
+            ("phi", "r", np.tan(theta)),
+            ("psi", "r", 1.0 / cos_t),
+            ("x", "u", cos_t),
+            ("x", "w", sin_t),
+            ("x", "the", -u0 * sin_t + w0 * cos_t),
+            ("y", "v", 1.0),
+            ("y", "phi", -w0 * cos_t + u0 * sin_t),
+            ("y", "psi", u0 * cos_t + w0 * sin_t),
+            ("z", "u", -sin_t),
+            ("z", "w", cos_t),
+            ("z", "the", -u0 * cos_t - w0 * sin_t),
+        ]
+        for row, col, value in rows_cols_values:
+            a_mat[:, idx[row], idx[col]] += value
+
+        b_mat = np.zeros((n, len(STATES), len(self.controls)))
+        b_mat[:, _VELOCITY_IDX, :] = self.force_control * inv_mass
+        b_mat[:, _RATE_IDX, :] = inv_tensor @ moment_control
+        return a_mat, b_mat
+
+    def eigenvalues(self, mass_props):
+        """Eigenvalues of the rigid-body modes (position and heading
+        excluded, as in the AVL eigenvalue output)
+
+        :param MassProperties mass_props: loading configurations
+        :return: complex array with shape (n, 8)
+        """
+        a_mat, _ = self.system_matrices(mass_props)
+        return np.linalg.eigvals(a_mat[:, :_N_RIGID, :_N_RIGID])
+
+    def modes(self, mass_props, names=None):
+        """Labelled eigenmodes for all loading configurations
+
+        :param MassProperties mass_props: loading configurations
+        :param Optional[List[str]] names: configuration names
+        :rtype: ModeResults
+        """
+        a_mat, b_mat = self.system_matrices(mass_props)
+        eigenvalues = np.linalg.eigvals(a_mat[:, :_N_RIGID, :_N_RIGID])
+        labels = np.array(
+            [label_modes(a, list(STATES), e) for a, e in zip(a_mat, eigenvalues)]
+        ).reshape(eigenvalues.shape)
+        return ModeResults(
+            numbers=list(range(1, len(mass_props) + 1)),
+            names=names or [""] * len(mass_props),
+            states=list(STATES),
+            controls=self.controls,
+            A=a_mat,
+            B=b_mat,
+            eigenvalues=eigenvalues,
+            labels=labels,
+        )
+
+
+def body_axis_derivatives(derivatives, totals, aspect_ratio):
+    """Converts AVL stability-axis derivatives to body-axis derivatives with
+    the normalisation of the AVL body-axis output (velocities by V, rates by
+    b/2V and c/2V, controls per degree)
+
+    :param dict derivatives: parsed StabilityDerivatives result
+    :param dict totals: parsed Totals result of the same case
+    :param float aspect_ratio: reference aspect ratio, used to estimate the
+        drag slope from the span efficiency
+    :rtype: dict
+    """
+    d = derivatives
+    alpha = np.radians(totals["Alpha"])
+    ca, sa = np.cos(alpha), np.sin(alpha)
+    cl, cd = totals["CLtot"], totals["CDtot"]
+    cl_s, cn_s = totals.get("Cl'tot", 0.0), totals.get("Cn'tot", 0.0)
+    e = totals.get("e", 0.0)
+
+    def induced_drag(suffix):
+        # induced drag change of a lift change (parabolic polar)
+        if not e:
+            return 0.0
+        return 2 * cl * d.get("CL" + suffix, 0.0) / (np.pi * aspect_ratio * e)
+
+    cd_a = induced_drag("a")
+
+    # alpha and beta derivatives of the body-axis coefficients
+    body = {
+        "CXa": d["CLa"] * sa + cl * ca - cd_a * ca + cd * sa,
+        "CZa": -d["CLa"] * ca + cl * sa - cd_a * sa - cd * ca,
+        "CYa": d["CYa"],
+        "Cla": d["Cla"] * ca - cl_s * sa - d["Cna"] * sa - cn_s * ca,
+        "Cma": d["Cma"],
+        "Cna": d["Cla"] * sa + cl_s * ca + d["Cna"] * ca - cn_s * sa,
+        "CXb": d["CLb"] * sa,
+        "CZb": -d["CLb"] * ca,
+        "CYb": d["CYb"],
+        "Clb": d["Clb"] * ca - d["Cnb"] * sa,
+        "Cmb": d["Cmb"],
+        "Cnb": d["Clb"] * sa + d["Cnb"] * ca,
+    }
+    coefficients = {
+        "CX": totals["CXtot"],
+        "CY": totals["CYtot"],
+        "CZ": totals["CZtot"],
+        "Cl": totals["Cltot"],
+        "Cm": totals["Cmtot"],
+        "Cn": totals["Cntot"],
+    }
+
+    result = dict()
+    for c, c0 in coefficients.items():
+        # coefficients are referred to the reference dynamic pressure,
+        # a change in airspeed scales them quadratically
+        result[c + "u"] = 2 * c0 * ca - body[c + "a"] * sa
+        result[c + "w"] = 2 * c0 * sa + body[c + "a"] * ca
+        result[c + "v"] = body[c + "b"]
+
+    # rate and control derivatives: rotate stability-axis rates and
+    # coefficients to body axes
+    def rotate(values):
+        cl_, cy_, cls_, cm_, cns_, cd_ = values
+        return {
+            "CX": cl_ * sa - cd_ * ca,
+            "CY": cy_,
+            "CZ": -cl_ * ca - cd_ * sa,
+            "Cl": cls_ * ca - cns_ * sa,
+            "Cm": cm_,
+            "Cn": cls_ * sa + cns_ * ca,
+        }
+
+    def stability_values(suffix, drag=0.0):
+        return [d.get(c + suffix, 0.0) for c in ["CL", "CY", "Cl", "Cm", "Cn"]] + [drag]
+
+    stab_p = stability_values("p", induced_drag("p"))
+    stab_r = stability_values("r", induced_drag("r"))
+    rates = {
+        "p": [vp * ca - vr * sa for vp, vr in zip(stab_p, stab_r)],
+        "q": stability_values("q", induced_drag("q")),
+        "r": [vp * sa + vr * ca for vp, vr in zip(stab_p, stab_r)],
+    }
+    for rate, values in rates.items():
+        for c, value in rotate(values).items():
+            result[c + rate] = value
+
+    for control in _control_names(d):
+        values = stability_values("_" + control, d.get(f"CDff_{control}", 0.0))
+        for c, value in rotate(values).items():
+            result[f"{c}_{control}"] = value
+    return result
+
+
+def _control_names(derivatives, geometry=None):
+    # design variable derivatives share the "C*_<name>" keys of the control
+    # derivatives, only the geometry tells them apart
+    names = [key[3:] for key in derivatives if key.startswith("CY_")]
+    if geometry is None:
+        return names
+    controls = [
+        control.name
+        for surface in geometry.surfaces
+        for section in surface.sections
+        for control in section.controls
+    ]
+    return [name for name in names if name in controls]
+
+
+def _skew(vectors):
+    x, y, z = np.moveaxis(vectors, -1, 0)
+    zero = np.zeros_like(x)
+    return np.stack(
+        [
+            np.stack([zero, -z, y], axis=-1),
+            np.stack([z, zero, -x], axis=-1),
+            np.stack([-y, x, zero], axis=-1),
+        ],
+        axis=-2,
+    )
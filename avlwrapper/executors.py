@@ -0,0 +1,569 @@
+""" Executors distributing AVL jobs over threads, processes or worker hosts
+
+Workers of the broker executor are started on any host with:
+`python -m avlwrapper.executors worker HOST:PORT --authkey KEY`
+"""
+from abc import ABC, abstractmethod
+import argparse
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import copy
+from dataclasses import dataclass, replace
+import hashlib
+from multiprocessing.connection import Client, Listener
+import os
+import queue
+import socket
+import subprocess
+import sys
+from tempfile import TemporaryDirectory
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from avlwrapper import default_registry, logger
+
+AUTHKEY_VARIABLE = "AVLWRAPPER_AUTHKEY"
+
+
+class Executor(ABC):
+    """Interface for running AVL jobs, following `concurrent.futures`"""
+
+    # True if jobs may run on other hosts and need their input files
+    remote = False
+
+    @abstractmethod
+    def submit(self, fn, *args, **kwargs):
+        """Schedules fn(*args, **kwargs)
+
+        :rtype: concurrent.futures.Future
+        """
+        raise NotImplementedError
+
+    def map(self, fn, *iterables):
+        """Runs fn over the iterables, results are returned in order"""
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+        for future in futures:
+            yield future.result()
+
+    def shutdown(self, wait=True):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown(wait=True)
+
+
+class FuturesExecutor(Executor):
+    """Executor backed by a `concurrent.futures` thread or process pool.
+
+    The process pool is started with the first job; its processes load the
+    models (see ModelPayload) of that job once, when they start, and jobs
+    of these models only carry a reference. Models of later jobs are sent
+    with every job.
+    """
+
+    def __init__(self, kind="thread", max_workers=None, pool=None):
+        """
+        :param str kind: "thread" or "process"
+        :param Optional[int] max_workers: maximum number of parallel jobs
+        :param Optional[concurrent.futures.Executor] pool: (optional)
+            existing pool to use instead
+        """
+        if pool is None:
+            if kind == "thread":
+                pool = ThreadPoolExecutor(max_workers=max_workers)
+            elif kind != "process":
+                raise ValueError(f"Invalid executor kind: {kind}")
+        self.pool = pool
+        self.max_workers = max_workers
+        # models loaded by the processes of the pool when they started
+        self._preloaded = set()
+
+    def submit(self, fn, *args, **kwargs):
+        if self.pool is None:
+            models = list(_model_payloads(args))
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_preload_models,
+                initargs=(models,),
+            )
+            self._preloaded = {model.fingerprint for model in models}
+        return self.pool.submit(fn, *_compact_args(args, self._preloaded), **kwargs)
+
+    def shutdown(self, wait=True):
+        if self.pool is not None:
+            self.pool.shutdown(wait=wait)
+
+
+class BrokerExecutor(Executor):
+    """Executor handing out jobs to worker processes connecting over TCP
+    or a Unix socket. Jobs and results are pickled, connections are
+    authenticated with the authkey. Jobs of a worker that disconnects are
+    handed to the next worker.
+    """
+
+    remote = True
+
+    def __init__(self, address=("localhost", 0), authkey=None):
+        """
+        :param address: (host, port) tuple or Unix socket path
+        :param Optional[bytes] authkey: (optional) shared key,
+            generated if not given
+        """
+        self.authkey = authkey or os.urandom(16)
+        self._listener = Listener(address, authkey=self.authkey)
+        self._jobs = queue.Queue()
+        self._closed = threading.Event()
+        self._threads = []
+        self._workers = []
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def address(self):
+        return self._listener.address
+
+    def worker_command(self):
+        """Command line to start a worker for this broker
+
+        :rtype: List[str]
+        """
+        address = self.address
+        if isinstance(address, tuple):
+            address = "{}:{}".format(*address)
+        return [
+            sys.executable,
+            "-m",
+            "avlwrapper.executors",
+            "worker",
+            address,
+            "--authkey",
+            self.authkey.hex(),
+        ]
+
+    def start_local_workers(self, n_workers):
+        """Starts worker processes on this host, they are stopped on shutdown
+
+        :param int n_workers: number of worker processes
+        """
+        for _ in range(n_workers):
+            self._workers.append(subprocess.Popen(self.worker_command()))
+
+    def submit(self, fn, *args, **kwargs):
+        if self._closed.is_set():
+            raise RuntimeError("Cannot submit jobs after shutdown")
+        future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def _accept(self):
+        while not self._closed.is_set():
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError):
+                # closed listener or failed authentication
+                if self._closed.is_set():
+                    break
+                continue
+            thread = threading.Thread(
+                target=self._serve, args=(connection,), daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def _serve(self, connection):
+        with connection:
+            try:
+                _, worker_name = connection.recv()
+            except (OSError, EOFError):
+                return
+            logger.info(f"Worker {worker_name} connected")
+            # models sent to the worker
+            sent = set()
+
+            while True:
+                try:
+                    job = self._jobs.get(timeout=0.1)
+                except queue.Empty:
+                    if self._closed.is_set():
+                        _send_quietly(connection, ("stop",))
+                        return
+                    continue
+
+                future, fn, args, kwargs = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    connection.send(("job", fn, _compact_args(args, sent), kwargs))
+                    status, value = connection.recv()
+                    if status == "missing":
+                        # the worker no longer caches the model
+                        sent.discard(value)
+                        connection.send(("job", fn, args, kwargs))
+                        status, value = connection.recv()
+                except (OSError, EOFError):
+                    logger.warning(f"Worker {worker_name} lost, rescheduling job")
+                    self._requeue(job)
+                    return
+                sent.update(_model_fingerprints(args))
+                if status == "result":
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _requeue(self, job):
+        future, fn, args, kwargs = job
+        # the future is already running, hand out a fresh one which
+        # forwards its outcome
+        retry = Future()
+        retry.add_done_callback(lambda f: _copy_outcome(f, future))
+        self._jobs.put((retry, fn, args, kwargs))
+
+    def shutdown(self, wait=True):
+        self._closed.set()
+        if wait:
+            for thread in list(self._threads):
+                thread.join()
+        self._listener.close()
+        for worker in self._workers:
+            if wait:
+                worker.wait()
+            else:
+                worker.terminate()
+
+
+def _send_quietly(connection, message):
+    try:
+        connection.send(message)
+    except (OSError, EOFError):
+        pass
+
+
+def _copy_outcome(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+def run_worker(address, authkey):
+    """Runs jobs from a broker until the broker stops
+
+    :param address: (host, port) tuple or Unix socket path of the broker
+    :param bytes authkey: shared key of the broker
+    """
+    with Client(address, authkey=authkey) as connection:
+        connection.send(("ready", f"{socket.gethostname()}:{os.getpid()}"))
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message[0] == "stop":
+                break
+            _, fn, args, kwargs = message
+            try:
+                connection.send(("result", fn(*args, **kwargs)))
+            except ModelNotCached as e:
+                connection.send(("missing", e.args[0]))
+            except Exception as e:
+                try:
+                    connection.send(("error", e))
+                except Exception:
+                    # exception could not be pickled
+                    connection.send(("error", RuntimeError(repr(e))))
+
+
+# maximum number of models cached per worker process
+MODEL_CACHE_SIZE = 16
+
+_model_cache = OrderedDict()
+_model_cache_lock = threading.Lock()
+# models loaded by the initializer of a process pool, never evicted
+_preloaded_models = dict()
+
+
+class ModelNotCached(KeyError):
+    """A job refers to a model which is not cached by the worker"""
+
+
+@dataclass(frozen=True)
+class ModelPayload:
+    """Geometry and mass distribution of session jobs as AVL input text.
+    Workers parse a model once and cache it by its fingerprint; the broker
+    executor sends the text once per worker and a reference (without the
+    text) afterwards, the process pool of FuturesExecutor once per process.
+
+    :param str fingerprint: hash of the model and its files
+    :param Optional[str] geometry: AVL geometry text, None for a reference
+    :param Optional[str] mass: mass file text
+    :param Optional[str] path: geometry file path to resolve relative
+        airfoil and body files, for workers on the same host
+    :param Optional[Dict[str, bytes]] files: content of the airfoil and body
+        files by the file names used in the geometry, for remote workers
+    """
+
+    fingerprint: str
+    geometry: Optional[str] = None
+    mass: Optional[str] = None
+    path: Optional[str] = None
+    files: Optional[Dict[str, bytes]] = None
+
+    @classmethod
+    def from_session(cls, session, remote=False):
+        """Payload of the geometry and mass distribution of a session
+
+        :param avlwrapper.Session session: session
+        :param bool remote: include the airfoil and body files
+        :rtype: ModelPayload
+        """
+        geometry = str(session.geometry)
+        mass = str(session.mass_dist) if session.mass_dist else None
+        path = None if remote else session.geometry._from_file
+        files = geometry_files_content(session.geometry) if remote else None
+
+        digest = hashlib.sha1(geometry.encode())
+        for item in (mass, path):
+            digest.update(str(item).encode())
+        for filename, content in sorted((files or dict()).items()):
+            digest.update(filename.encode())
+            digest.update(content)
+        return cls(digest.hexdigest(), geometry, mass, path, files)
+
+    def reference(self):
+        """Payload referring to a model cached by the worker"""
+        return ModelPayload(self.fingerprint)
+
+
+def load_model(payload):
+    """Geometry and mass distribution of a payload, parsed once per process
+
+    :param ModelPayload payload: model payload
+    :returns: geometry and mass distribution
+    :rtype: Tuple[avlwrapper.Aircraft, Optional[avlwrapper.MassDistribution]]
+    """
+    if payload.fingerprint in _preloaded_models:
+        return _preloaded_models[payload.fingerprint][:2]
+    with _model_cache_lock:
+        if payload.fingerprint in _model_cache:
+            _model_cache.move_to_end(payload.fingerprint)
+            return _model_cache[payload.fingerprint][:2]
+    if payload.geometry is None:
+        raise ModelNotCached(payload.fingerprint)
+
+    model = _parse_model(payload)
+    with _model_cache_lock:
+        _model_cache[payload.fingerprint] = model
+        while len(_model_cache) > MODEL_CACHE_SIZE:
+            _model_cache.popitem(last=False)
+    return model[:2]
+
+
+def _preload_models(payloads):
+    # initializer of the processes of a FuturesExecutor
+    for payload in payloads:
+        _preloaded_models[payload.fingerprint] = _parse_model(payload)
+
+
+def _parse_model(payload):
+    # geometry, mass distribution and the directory of the model files
+    from avlwrapper.model import Aircraft, MassDistribution
+
+    geometry = Aircraft.from_lines(payload.geometry.splitlines())
+    geometry._from_file = payload.path
+    files_dir = None
+    if payload.files is not None:
+        # kept as long as the model is cached
+        files_dir = TemporaryDirectory(prefix="avl_model_")
+        for filename, content in payload.files.items():
+            path = os.path.join(files_dir.name, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fp:
+                fp.write(content)
+        # resolve the geometry's relative file names in the model directory
+        geometry._from_file = os.path.join(files_dir.name, "geometry.avl")
+    mass_dist = None
+    if payload.mass is not None:
+        mass_dist = MassDistribution.from_lines(payload.mass.splitlines())
+    return geometry, mass_dist, files_dir
+
+
+def compact_cases(cases):
+    """Cases of a job as a CaseTable, which pickles to a few arrays, if
+    NumPy is available
+
+    :param cases: cases
+    :type cases: List[avlwrapper.Case] or avlwrapper.cases.CaseTable
+    """
+    try:
+        from avlwrapper.cases import CaseTable
+    except ImportError:
+        return copy.deepcopy(cases)
+    if isinstance(cases, CaseTable):
+        return cases
+    return CaseTable.from_cases(cases)
+
+
+@dataclass
+class SessionJob:
+    """Partition of a session's cases to be run by an executor
+
+    :param ModelPayload model: geometry and mass distribution
+    :param cases: cases of the partition
+    :param str name: session name
+    :param str analysis: "cases" for `Session.run_all_cases`,
+        "modes" for the eigenmode analysis of all cases
+    :param Optional[str] airfoil_staging: airfoil staging mode
+    :param bool typed_results: return flat results as ResultRecord objects
+    :param bool stdout_results: read totals and convergence diagnostics
+        from the standard output of AVL
+    :param bool mass_states: use the mass states of the cases instead of
+        applying the mass distribution
+    :param Optional[avlwrapper.Configuration] config: configuration
+        snapshot, the configuration of the worker is used if not given
+    :param bool staged: run in a staged workspace (see `Session(staged)`)
+    :param Optional[str] staging_dir: parent directory of the workspace
+    :param bool deduplicate: run identical operating points once
+    :param Optional[dict] retention: arguments of the RunArchiver keeping
+        the run files, not retained if None. Workers on other hosts write
+        the archives to the directory on their own host
+    :param Optional[dict] profiling: arguments of the Profiler profiling
+        the runs, not profiled if None. Reports are written on the host of
+        the worker
+    """
+
+    model: ModelPayload
+    cases: Any
+    name: Optional[str] = None
+    analysis: str = "cases"
+    airfoil_staging: Optional[str] = None
+    typed_results: bool = False
+    stdout_results: bool = False
+    mass_states: bool = False
+    config: Any = None
+    staged: bool = False
+    staging_dir: Optional[str] = None
+    deduplicate: bool = False
+    retention: Optional[Dict[str, Any]] = None
+    profiling: Optional[Dict[str, Any]] = None
+
+
+def geometry_files_content(geometry):
+    """Reads the airfoil and body files used in a geometry
+
+    :param avlwrapper.Aircraft geometry: AVL geometry
+    :rtype: Dict[str, bytes]
+    """
+    files = dict()
+    for filename, entry in default_registry.geometry_files(geometry).items():
+        # absolute paths have to be available on the worker host
+        if not os.path.isabs(filename):
+            with open(entry.path, "rb") as fp:
+                files[filename] = fp.read()
+    return files
+
+
+def run_session_job(job):
+    """Runs a session job, used by the executors
+
+    :param SessionJob job: job to run
+    :returns: results of `Session.run_all_cases` or a list of per-case
+        eigenmode results
+    """
+    from avlwrapper.profiling import Profiler
+    from avlwrapper.retention import RunArchiver
+    from avlwrapper.session import Session
+
+    geometry, mass_dist = load_model(job.model)
+    kwargs = dict() if job.config is None else {"config": job.config}
+    retain_runs = False if job.retention is None else RunArchiver(**job.retention)
+    profile = False if job.profiling is None else Profiler(**job.profiling)
+    # closing the session finishes its run archives before returning
+    with Session(
+        geometry=geometry,
+        cases=job.cases,
+        mass_dist=mass_dist,
+        name=job.name,
+        airfoil_staging=job.airfoil_staging,
+        typed_results=job.typed_results,
+        stdout_results=job.stdout_results,
+        mass_states=job.mass_states,
+        staged=job.staged,
+        staging_dir=job.staging_dir,
+        deduplicate=job.deduplicate,
+        retain_runs=retain_runs,
+        profile=profile,
+        **kwargs,
+    ) as session:
+        if job.analysis == "modes":
+            return session._run_mode_partition()
+        return session.run_all_cases()
+
+
+def run_timed_session_job(job):
+    """Runs a session job and measures its run time, used by
+    `Session.run_all_cases` to learn the cost of cases
+
+    :param SessionJob job: job to run
+    :returns: results of `run_session_job` and the run time (s)
+    :rtype: tuple
+    """
+    start = time.perf_counter()
+    results = run_session_job(job)
+    return results, time.perf_counter() - start
+
+
+def _compact_args(args, sent):
+    # replaces models the worker has received before by references
+    compacted = []
+    for arg in args:
+        if isinstance(arg, ModelPayload) and arg.fingerprint in sent:
+            arg = arg.reference()
+        elif isinstance(arg, SessionJob) and arg.model.fingerprint in sent:
+            arg = replace(arg, model=arg.model.reference())
+        compacted.append(arg)
+    return tuple(compacted)
+
+
+def _model_payloads(args):
+    for arg in args:
+        if isinstance(arg, ModelPayload):
+            yield arg
+        elif isinstance(arg, SessionJob):
+            yield arg.model
+
+
+def _model_fingerprints(args):
+    for payload in _model_payloads(args):
+        yield payload.fingerprint
+
+
+def _parse_address(address):
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit():
+        return host, int(port)
+    return address
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m avlwrapper.executors")
+    sub_parsers = parser.add_subparsers(dest="command", required=True)
+    worker_parser = sub_parsers.add_parser("worker", help="run a broker worker")
+    worker_parser.add_argument("address", help="HOST:PORT or Unix socket path")
+    worker_parser.add_argument(
+        "--authkey",
+        default=os.environ.get(AUTHKEY_VARIABLE),
+        help=f"hexadecimal key of the broker, defaults to ${AUTHKEY_VARIABLE}",
+    )
+    args = parser.parse_args(argv)
+
+    if args.authkey is None:
+        parser.error("an authkey is required")
+    run_worker(_parse_address(args.address), bytes.fromhex(args.authkey))
+
+
+if __name__ == "__main__":
+    main()
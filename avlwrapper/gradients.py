@@ -0,0 +1,212 @@
+""" Gradients of AVL outputs with respect to section design variables
+
+Requires NumPy, which is not a dependency of the core package.
+"""
+import copy
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from avlwrapper.model import DesignVar, InputError
+from avlwrapper.scheduling import WorkStealingPool
+
+# outputs of which AVL writes the derivatives with respect to design
+# variables, by their total value
+SENSITIVITY_OUTPUTS = {
+    "CL": "CLtot",
+    "CY": "CYtot",
+    "Cl": "Cl'tot",
+    "Cm": "Cmtot",
+    "Cn": "Cn'tot",
+    "CDff": "CDff",
+    "e": "e",
+}
+
+# output files required for the gradients
+GRADIENT_OUTPUTS = {"totals": "yes", "stabilityderivatives": "yes"}
+
+
+def add_design_var(surface, name, weights):
+    """Declares a design variable on the sections of a surface. The local
+    inflow angle of a section is perturbed by weight * value (deg), and
+    interpolated linearly between the sections.
+
+    :param avlwrapper.Surface surface: surface
+    :param str name: design variable name
+    :param typing.Sequence[float] weights: weight per section, e.g.
+        [0.0, 1.0] for a linear twist of a two-section wing
+    """
+    if len(weights) != len(surface.sections):
+        raise InputError("One design variable weight per section required")
+    for section, weight in zip(surface.sections, weights):
+        section.design_vars.append(DesignVar(name=name, weight=weight))
+
+
+def design_var_names(geometry):
+    """Names of the design variables of a geometry, in order of appearance
+
+    :param avlwrapper.Aircraft geometry: AVL geometry
+    :rtype: List[str]
+    """
+    names = []
+    for surface in geometry.surfaces:
+        for section in surface.sections:
+            for design_var in section.design_vars:
+                if design_var.name not in names:
+                    names.append(design_var.name)
+    return names
+
+
+@dataclass
+class DesignGradients:
+    """Gradients of outputs of all cases with respect to the design
+    variables
+
+    :param List[str] design_vars: design variable names
+    :param Dict[str, np.ndarray] values: output values, per case
+    :param Dict[str, np.ndarray] gradients: derivatives per case (rows)
+        and design variable (columns), per unit of the design variable
+    :param Dict[str, np.ndarray] finite_difference: True for the design
+        variables of which the derivatives are finite differences
+    """
+
+    design_vars: List[str]
+    values: Dict[str, np.ndarray]
+    gradients: Dict[str, np.ndarray]
+    finite_difference: Dict[str, np.ndarray]
+
+    def __getitem__(self, output):
+        return self.gradients[output]
+
+
+def design_gradients(
+    session,
+    outputs=tuple(SENSITIVITY_OUTPUTS),
+    step=0.5,
+    max_workers=None,
+    executor=None,
+):
+    """Runs the cases of a session once and returns the gradients of the
+    outputs with respect to the design variables of the geometry.
+
+    Derivatives are read from the stability derivatives written by AVL.
+    Outputs of which AVL does not write the derivatives (e.g. "CDtot" or a
+    function of the case results) are obtained by central finite
+    differences; the perturbed geometries are run in parallel, each
+    running all cases.
+
+    :param avlwrapper.Session session: session with the geometry and cases
+    :param typing.Sequence outputs: outputs, derivative names of the
+        stability derivatives (see SENSITIVITY_OUTPUTS), keys of the totals
+        or functions returning a value from the results of a case
+    :param float step: finite difference step of the design variables
+    :param Optional[int] max_workers: (optional) maximum number of parallel
+        AVL processes for finite differences
+    :param Optional[avlwrapper.Executor] executor: (optional) executor to
+        run the cases with
+    :rtype: DesignGradients
+    """
+    names = design_var_names(session.geometry)
+    if not names:
+        raise InputError("The geometry has no design variables")
+    if not session.cases:
+        raise InputError("Design gradients require cases")
+
+    config = session.config.copy(output=GRADIENT_OUTPUTS)
+    base_session = _gradient_session(session, session.geometry, config)
+    base_results = _sorted_results(base_session.run_all_cases(executor=executor))
+    gradients = _gradients_from_results(base_results, names, outputs)
+
+    # finite differences of the design variables with missing derivatives
+    fd_vars = sorted(
+        {
+            idx
+            for mask in gradients.finite_difference.values()
+            for idx in np.flatnonzero(mask)
+        }
+    )
+    if fd_vars:
+        sessions = [
+            _gradient_session(
+                session,
+                _perturbed_geometry(session.geometry, names[idx], delta),
+                config,
+            )
+            for idx in fd_vars
+            for delta in (step, -step)
+        ]
+        if executor is not None:
+            fd_results = [s.run_all_cases(executor=executor) for s in sessions]
+        else:
+            pool = WorkStealingPool(max_workers)
+            fd_results = pool.map(lambda s: s.run_all_cases(), sessions)
+        fd_results = [_sorted_results(results) for results in fd_results]
+
+        for var_idx, upper, lower in zip(fd_vars, fd_results[::2], fd_results[1::2]):
+            for output, mask in gradients.finite_difference.items():
+                if mask[var_idx]:
+                    upper_values = _output_values(upper, output)
+                    lower_values = _output_values(lower, output)
+                    gradients.gradients[output][:, var_idx] = (
+                        upper_values - lower_values
+                    ) / (2.0 * step)
+    return gradients
+
+
+def _gradient_session(session, geometry, config):
+    from avlwrapper.session import Session
+
+    return Session(
+        geometry=geometry,
+        cases=copy.deepcopy(session.cases),
+        mass_dist=session.mass_dist,
+        name=session.name,
+        config=config,
+        airfoil_staging=session.airfoil_staging,
+        staged=False,
+        typed_results=False,
+        profile=False,
+        stdout_results=False,
+        deduplicate=session.deduplicate,
+        mass_states=session.mass_states,
+    )
+
+
+def _sorted_results(results):
+    return [results[number] for number in sorted(results)]
+
+
+def _perturbed_geometry(geometry, name, delta):
+    # a design variable perturbs the section incidence by weight * value
+    perturbed = copy.deepcopy(geometry)
+    for surface in perturbed.surfaces:
+        for section in surface.sections:
+            for design_var in section.design_vars:
+                if design_var.name == name:
+                    section.angle += design_var.weight * delta
+    return perturbed
+
+
+def _output_values(results, output):
+    if callable(output):
+        return np.array([output(case_results) for case_results in results], dtype=float)
+    key = SENSITIVITY_OUTPUTS.get(output, output)
+    return np.array([case_results["Totals"][key] for case_results in results])
+
+
+def _gradients_from_results(results, names, outputs):
+    values, gradients, finite_difference = dict(), dict(), dict()
+    for output in outputs:
+        values[output] = _output_values(results, output)
+        gradient = np.full((len(results), len(names)), np.nan)
+        mask = np.ones(len(names), dtype=bool)
+        if not callable(output):
+            for idx, name in enumerate(names):
+                key = f"{output}_{name}"
+                if all(key in r["StabilityDerivatives"] for r in results):
+                    gradient[:, idx] = [r["StabilityDerivatives"][key] for r in results]
+                    mask[idx] = False
+        gradients[output] = gradient
+        finite_difference[output] = mask
+    return DesignGradients(list(names), values, gradients, finite_difference)
@@ -8,6 +8,7 @@ import re
 from typing import Iterable, List, Optional, NamedTuple, Union
 
 from avlwrapper import VERSION, logger
+from avlwrapper.config import default_config
 from avlwrapper.tools import (
     get_vars,
     line_to_floats,
@@ -56,12 +57,25 @@ class Input(ABC):
     @classmethod
     def from_file(cls, filename):
         """
-        Generates Model from AVL input file
+        Generates Model from AVL input file. Parsed files are cached if the
+        parse cache is enabled in the [cache] configuration section, see
+        avlwrapper.parsecache.ParseCache
         """
 
         if not os.path.isabs(filename):
             filename = os.path.abspath(filename)
 
+        parse_cache = default_config["parse_cache"]
+        if parse_cache["enabled"]:
+            from avlwrapper.parsecache import default_parse_cache
+
+            return default_parse_cache.load(
+                cls, filename, directory=parse_cache["directory"]
+            )
+        return cls._parse_file(filename)
+
+    @classmethod
+    def _parse_file(cls, filename):
         # read file to lines
         with open(filename, "rt") as fp:
             lines = fp.readlines()
@@ -1,5 +1,10 @@
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
 import os.path
 import re
+import threading
+from typing import Dict, Tuple
 
 from avlwrapper import logger
 from avlwrapper.tools import FLOATING_POINT_PATTERN, get_vars, line_is_not_empty, line_has_no_comment
@@ -15,8 +20,13 @@ from avlwrapper.tools import FLOATING_POINT_PATTERN, get_vars, line_is_not_empty
 
 
 class FileReader:
-    def __init__(self, file_path):
-        if os.path.exists(file_path):
+    supports_records = False
+
+    def __init__(self, file_path, lines=None):
+        if lines is not None:
+            # content read elsewhere, e.g. from a run archive
+            self.lines = lines
+        elif os.path.exists(file_path):
             with open(file_path, "r") as avl_file:
                 self.lines = avl_file.readlines()
         else:
@@ -98,20 +108,127 @@ class FileReader:
         return splitted
 
 
+class ResultSchema:
+    """Ordered keys of a result record, shared by all records with the
+    same keys. Attribute names are the keys with non-word characters
+    replaced by underscores (e.g. "Cl'tot" -> "Cl_tot").
+    """
+
+    __slots__ = ("keys", "index", "attributes")
+
+    def __init__(self, keys):
+        self.keys = tuple(keys)
+        self.index = {key: idx for idx, key in enumerate(self.keys)}
+        self.attributes = dict()
+        for idx, key in enumerate(self.keys):
+            self.attributes.setdefault(_attribute_name(key), idx)
+
+    def __reduce__(self):
+        return ResultSchema, (self.keys,)
+
+    def __deepcopy__(self, memo):
+        # immutable and shared
+        return self
+
+
+class ResultRecord(Mapping):
+    """Compact, read-only result with attribute and key access. Values are
+    stored in a double array, keys in the shared schema.
+
+    Example:
+    ```
+    totals.CLtot, totals["CLtot"], totals.to_dict()
+    ```
+    """
+
+    __slots__ = ("schema", "values")
+
+    def __init__(self, schema, values):
+        """
+        :param ResultSchema schema: keys of the values
+        :param array values: values in schema order
+        """
+        self.schema = schema
+        self.values = values
+
+    def __getitem__(self, key):
+        return self.values[self.schema.index[key]]
+
+    def __getattr__(self, name):
+        if name in ResultRecord.__slots__:
+            raise AttributeError(name)
+        try:
+            return self.values[self.schema.attributes[name]]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __iter__(self):
+        return iter(self.schema.keys)
+
+    def __len__(self):
+        return len(self.schema.keys)
+
+    def __reduce__(self):
+        return ResultRecord, (self.schema, self.values)
+
+    def __repr__(self):
+        return f"ResultRecord({self.to_dict()!r})"
+
+    def to_dict(self):
+        return dict(zip(self.schema.keys, self.values))
+
+
+class ResultSchemas:
+    """Cache of result schemas, so records of the same kind share their keys"""
+
+    def __init__(self):
+        self._schemas: Dict[Tuple[str, ...], ResultSchema] = dict()
+        self._lock = threading.Lock()
+
+    def schema(self, keys):
+        """Returns the shared schema for the keys
+
+        :param Sequence[str] keys: ordered keys
+        :rtype: ResultSchema
+        """
+        keys = tuple(keys)
+        schema = self._schemas.get(keys)
+        if schema is None:
+            with self._lock:
+                schema = self._schemas.setdefault(keys, ResultSchema(keys))
+        return schema
+
+    def record(self, result):
+        """Converts a parsed result dictionary to a record
+
+        :param Dict[str, float] result: parsed result
+        :rtype: ResultRecord
+        """
+        return ResultRecord(self.schema(result.keys()), array("d", result.values()))
+
+
+def _attribute_name(key):
+    name = re.sub(r"\W", "_", key)
+    return "_" + name if name[:1].isdigit() else name
+
+
 class GenericReader(FileReader):
     def parse(self):
         return "\n".join(self.lines)
 
 
 class TotalsFileReader(FileReader):
+    # flat results of floats, can be stored as ResultRecord
+    supports_records = True
+
     def parse(self):
         return get_vars(self.lines)
 
 
 class _ForcesFileReader(FileReader):
-    def __init__(self, file_path, header_re):
+    def __init__(self, file_path, header_re, lines=None):
         self._header_re = header_re
-        super().__init__(file_path)
+        super().__init__(file_path, lines)
 
     def parse(self):
         start_line, end_line = self.get_table_start_end(self.lines, self._header_re)
@@ -150,13 +267,13 @@ class _ForcesFileReader(FileReader):
 
 
 class SurfaceFileReader(_ForcesFileReader):
-    def __init__(self, file_path):
-        super().__init__(file_path, r"(n\s+Area\s+CL)")
+    def __init__(self, file_path, lines=None):
+        super().__init__(file_path, r"(n\s+Area\s+CL)", lines)
 
 
 class BodyFileReader(_ForcesFileReader):
-    def __init__(self, file_path):
-        super().__init__(file_path, r"Ibdy\s+Length\s+Asurf")
+    def __init__(self, file_path, lines=None):
+        super().__init__(file_path, r"Ibdy\s+Length\s+Asurf", lines)
 
 
 class StripFileReader(FileReader):
@@ -259,7 +376,84 @@ class ElementFileReader(FileReader):
         return element_results
 
 
+@dataclass
+class ElementStrip:
+    """Element results of one strip
+
+    :param str surface: surface name, without "(YDUP)"
+    :param int strip: strip number
+    :param bool ydup: True if the strip belongs to a duplicated surface
+    :param Dict[str, array] columns: element values per column
+        (double-precision `array.array`, e.g. for `numpy.frombuffer`)
+    """
+
+    surface: str
+    strip: int
+    ydup: bool
+    columns: Dict[str, array]
+
+
+class ElementStripReader:
+    """Reads an element forces (.fe) file incrementally. Unlike
+    ElementFileReader, the file is never held in memory as a whole:
+    iterating yields one ElementStrip per strip as it is read.
+    """
+
+    surface_re = re.compile(r"Surface\s+#\s*\d+\s+(.*)")
+    strip_re = re.compile(r"Strip\s+#\s*(\d+)\s+")
+    header_re = re.compile(r"(I\s+X\s+Y\s+Z)")
+
+    def __init__(self, file_path):
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(file_path)
+        self.file_path = file_path
+
+    def __iter__(self):
+        surface, strip, block = None, None, None
+        next_line_surface = False
+        with open(self.file_path, "r") as avl_file:
+            for line in avl_file:
+                if block is not None:
+                    # tables end with an empty line
+                    if line.strip():
+                        values = FileReader.get_line_values(line)[1:]
+                        for column, value in zip(block.columns.values(), values):
+                            column.append(value)
+                        continue
+                    yield block
+                    block = None
+
+                if next_line_surface:
+                    surface = line.strip()
+                    next_line_surface = False
+                elif (match := self.surface_re.search(line)) is not None:
+                    surface = match.group(1).strip()
+                    next_line_surface = not surface
+                elif (match := self.strip_re.search(line)) is not None:
+                    strip = int(match.group(1))
+                elif self.header_re.search(line) is not None:
+                    header = FileReader.extract_header([line])
+                    block = ElementStrip(
+                        surface=FileReader.remove_ydup(surface),
+                        strip=strip,
+                        ydup="(YDUP)" in surface,
+                        columns={key: array("d") for key in header},
+                    )
+        if block is not None:
+            yield block
+
+    def read(self, callback):
+        """Passes every strip to a callback
+
+        :param Callable[[ElementStrip], None] callback: strip consumer
+        """
+        for block in self:
+            callback(block)
+
+
 class StabilityFileReader(FileReader):
+    supports_records = True
+
     @property
     def var_lines(self):
         idx = [
@@ -278,15 +472,16 @@ class StabilityFileReader(FileReader):
 
     @staticmethod
     def get_controls(lines):
-        controls = re.findall(r"(\S+)\s+(d\d+)", "".join(lines))
+        # controls (d#) and design variables (g#)
+        controls = re.findall(r"(\S+)\s+([dg]\d+)", "".join(lines))
         return {number: name for (name, number) in controls}
 
     @staticmethod
     def replace_controls(var_dict, controls):
-        # replace d# with control name
+        # replace d# and g# with control and design variable names
         new_dict = var_dict.copy()
         for key in var_dict.keys():
-            match = re.search(r"d\d+", key)
+            match = re.search(r"[dg]\d+$", key)
             if match is not None:
                 d = match.group(0)
                 name = "_" + controls[d]
@@ -308,6 +503,8 @@ class BodyAxisFileReader(StabilityFileReader):
 
 
 class HingeFileReader(FileReader):
+    supports_records = True
+
     def parse(self):
         results = dict()
         for line in self.lines:
@@ -356,6 +553,144 @@ class EigenValuesFileReader(GenericReader):
         return result
 
 
+class StdoutReader:
+    """Parses the standard output of AVL. Every `x` execution prints the
+    trim iterations and the total forces, which are returned with the
+    convergence diagnostics of the execution. Warning and error messages
+    printed before the total forces are assigned to that execution.
+
+    The number of the active run case is taken from the last OPER prompt
+    before the execution, e.g. "OPER (case 2/5)", and the case name from the
+    "Run case:" line of the total forces; both are returned under "Case".
+
+    Lines can be fed one at a time while AVL is running, or all at once
+    with `read`.
+    """
+
+    _totals_re = re.compile(r"Vortex Lattice Output -+ Total Forces")
+    _iteration_re = re.compile(
+        rf"^\s*(\d+)((?:\s+{FLOATING_POINT_PATTERN})+)\s*$"
+    )
+    _message_re = re.compile(r"\*\*|warning|error|fail|not converged", re.IGNORECASE)
+    _failure_re = re.compile(r"fail|not converged|singular", re.IGNORECASE)
+    _prompt_re = re.compile(r"OPER \(case (\d+)/\d+\)")
+    _name_re = re.compile(r"Run case:(.*)$")
+
+    def __init__(self):
+        self._case_number = None
+        self._reset()
+
+    def _reset(self):
+        self._totals_lines = None
+        self._iterations = 0
+        self._residual = float("nan")
+        self._messages = []
+
+    def feed(self, line):
+        """Processes one line of output
+
+        :param str line: output line
+        :returns: the results of an execution once its total forces are
+            complete, None otherwise
+        :rtype: Optional[Dict[str, dict]]
+        """
+        if self._totals_lines is not None:
+            if line.strip().startswith("---"):
+                return self._finish()
+            self._totals_lines.append(line)
+        elif self._totals_re.search(line) is not None:
+            self._totals_lines = [line]
+        else:
+            match = self._prompt_re.search(line)
+            if match is not None:
+                self._case_number = int(match.group(1))
+            else:
+                self._parse_diagnostics(line)
+        return None
+
+    def read(self, text):
+        """Parses the complete output of an AVL process
+
+        :param str text: standard output
+        :returns: results of every execution, in order
+        :rtype: List[Dict[str, dict]]
+        """
+        results = []
+        for line in text.splitlines():
+            result = self.feed(line)
+            if result is not None:
+                results.append(result)
+        return results
+
+    def _parse_diagnostics(self, line):
+        match = self._iteration_re.match(line)
+        if match is not None:
+            deltas = [float(v) for v in match.group(2).split()]
+            self._iterations = int(match.group(1))
+            self._residual = max(abs(v) for v in deltas)
+        elif self._message_re.search(line) is not None:
+            self._messages.append(line.strip())
+
+    def _finish(self):
+        converged = not any(self._failure_re.search(m) for m in self._messages)
+        name = None
+        for line in self._totals_lines:
+            match = self._name_re.search(line)
+            if match is not None:
+                name = match.group(1).strip()
+                break
+        result = {
+            "Totals": get_vars(self._totals_lines),
+            "Case": {"number": self._case_number, "name": name},
+            "Convergence": {
+                "converged": converged,
+                "iterations": self._iterations,
+                "residual": self._residual,
+                "messages": self._messages,
+            },
+        }
+        self._reset()
+        return result
+
+
+def match_executions(executions, cases):
+    """Pairs the executions parsed by StdoutReader with the run cases they
+    belong to. Cases are matched by their number in the case file, or by
+    name if AVL did not print the case number; cases that AVL skipped and
+    executions of unknown cases are logged and left out.
+
+    :param typing.Iterable[dict] executions: executions, in order
+    :param typing.Sequence[tuple] cases: (key, number in the case file,
+        name) of the run cases, in the order they are executed
+    :returns: iterator of (key, execution)
+    """
+    idx = 0
+    for execution in executions:
+        case = execution.get("Case", dict())
+        number, name = case.get("number"), case.get("name")
+        if name == "-unnamed-":
+            name = ""
+        for match_idx in range(idx, len(cases)):
+            _, case_number, case_name = cases[match_idx]
+            if number is not None:
+                if number == case_number:
+                    break
+            elif name is None or name == case_name.strip():
+                break
+        else:
+            logger.warning(
+                f"AVL output contains an unknown case (number {number}, "
+                f"name {name!r})"
+            )
+            continue
+        for _, _, case_name in cases[idx:match_idx]:
+            logger.warning(f"AVL output contains no results of case {case_name!r}")
+        yield cases[match_idx][0], execution
+        idx = match_idx + 1
+    for _, _, case_name in cases[idx:]:
+        logger.warning(f"AVL output contains no results of case {case_name!r}")
+
+
 class OutputReader:
     """Reads AVL output files. Type is determined based on file extension"""
 
@@ -373,13 +708,27 @@ class OutputReader:
         ".eig": EigenValuesFileReader
     }
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, lines=None):
+        """
+        :param str file_path: path to the output file
+        :param Optional[List[str]] lines: (optional) content of the file,
+            the file is not read if given
+        """
         _, extension = os.path.splitext(file_path)
         if extension in self._reader_classes:
-            self.reader = self._reader_classes[extension](file_path)
+            self.reader = self._reader_classes[extension](file_path, lines=lines)
         else:
             logger.warning(f"Unknown output file: {file_path}")
-            self.reader = GenericReader(file_path)
-
-    def get_content(self):
-        return self.reader.parse()
+            self.reader = GenericReader(file_path, lines=lines)
+
+    def get_content(self, schemas=None):
+        """Parses the file
+
+        :param Optional[ResultSchemas] schemas: (optional) if given, flat
+            results (totals, stability derivatives and hinge moments) are
+            returned as ResultRecord with a schema from this cache
+        """
+        content = self.reader.parse()
+        if schemas is not None and self.reader.supports_records:
+            content = schemas.record(content)
+        return content
@@ -0,0 +1,184 @@
+""" Binary cache of parsed AVL input files
+"""
+from collections import OrderedDict
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+
+from avlwrapper import VERSION, logger
+from avlwrapper.airfoils import _file_airfoils, _file_digest, default_registry
+
+# number of parsed files kept in memory
+PARSE_CACHE_SIZE = 64
+
+# format of the cache records, records of other versions are parsed again
+_RECORD_VERSION = (VERSION, 1)
+
+
+class ParseCache:
+    """Cache of parsed input files (geometry, mass and case files), keyed
+    by file path and content hash.
+
+    A parsed model is kept in memory as a pickle, and written to a cache
+    directory when one is given. A file is loaded without parsing it if
+    its size and content hash are unchanged; the modification time alone
+    is not trusted, a file can be rewritten within its resolution. Every
+    load returns a new model, which can be changed without affecting the
+    cache.
+
+    The referenced airfoil and body profile files of a geometry are stored
+    with their hashes and coordinates, and restored into the airfoil
+    registry when they are unchanged, so they are not read again either.
+
+    Cache files are pickles and are only to be read from trusted
+    directories.
+    """
+
+    def __init__(self, max_entries=PARSE_CACHE_SIZE, registry=default_registry):
+        """
+        :param int max_entries: maximum number of parsed files kept in memory
+        :param avlwrapper.AirfoilRegistry registry: registry the airfoil
+            files are restored into
+        """
+        self.max_entries = max_entries
+        self.registry = registry
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, cls, file_path, directory=None):
+        """Returns the parsed model of a file, parsing it on a cache miss
+
+        :param type cls: model class, e.g. avlwrapper.Aircraft
+        :param str file_path: path to the input file
+        :param Optional[str] directory: (optional) directory of the
+            persistent cache, in memory only if None
+        """
+        path = os.path.realpath(file_path)
+        key = f"{cls.__module__}.{cls.__qualname__}:{path}"
+        stat = os.stat(path)
+
+        record = self._get_record(key, directory)
+        if record is None or not self._is_valid(record, path, stat):
+            record = self._parse(cls, file_path, path, stat)
+            self._store(key, record, directory)
+        elif record["mtime"] != stat.st_mtime_ns:
+            # touched file with unchanged content
+            self._store(key, dict(record, mtime=stat.st_mtime_ns), directory)
+
+        self._restore_airfoils(record["airfoils"])
+        return pickle.loads(record["model"])
+
+    def clear(self):
+        """Removes all parsed files from memory"""
+        with self._lock:
+            self._records.clear()
+
+    def _get_record(self, key, directory):
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None:
+                self._records.move_to_end(key)
+                return record
+        if directory is None:
+            return None
+
+        try:
+            with open(self._record_file(key, directory), "rb") as fp:
+                record = pickle.load(fp)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            logger.info(f"Ignoring unreadable parse cache record of {key}")
+            return None
+        if record.get("version") != _RECORD_VERSION or record.get("key") != key:
+            return None
+        self._remember(key, record)
+        return record
+
+    def _is_valid(self, record, path, stat):
+        if record["size"] != stat.st_size:
+            return False
+        # valid if the content is unchanged, also for an unchanged
+        # modification time
+        return record["digest"] == _file_digest(path)
+
+    def _parse(self, cls, file_path, path, stat):
+        model = cls._parse_file(file_path)
+        if hasattr(model, "_from_file"):
+            model._from_file = file_path
+        return {
+            "version": _RECORD_VERSION,
+            "key": None,
+            "mtime": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "digest": _file_digest(path),
+            "model": pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL),
+            "airfoils": self._resolve_airfoils(model),
+        }
+
+    def _resolve_airfoils(self, model):
+        if not hasattr(model, "surfaces"):
+            return []
+        if model._from_file is None:
+            af_dir = os.getcwd()
+        else:
+            af_dir, _ = os.path.split(model._from_file)
+
+        entries = dict()
+        for airfoil in _file_airfoils(model):
+            path = os.path.join(af_dir, airfoil.filename)
+            if path in entries:
+                continue
+            try:
+                entry = self.registry.resolve(path)
+                self.registry.get_coordinates(entry)
+            except (OSError, ValueError):
+                # missing files are reported when the geometry is run
+                continue
+            entries[path] = entry
+        return list(entries.values())
+
+    def _restore_airfoils(self, entries):
+        for entry in entries:
+            try:
+                self.registry.restore(entry)
+            except OSError:
+                continue
+
+    def _store(self, key, record, directory):
+        # records are shared between threads and never changed once
+        # remembered, an update replaces the record
+        record = dict(record, key=key)
+        self._remember(key, record)
+        if directory is None:
+            return
+
+        # write to a temporary file first, concurrent readers never see a
+        # partial record
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                pickle.dump(record, fp, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._record_file(key, directory))
+        except OSError:
+            logger.info(f"Writing the parse cache record of {key} failed")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _remember(self, key, record):
+        with self._lock:
+            self._records[key] = record
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    @staticmethod
+    def _record_file(key, directory):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(directory, f"{name}.pickle")
+
+
+default_parse_cache = ParseCache()
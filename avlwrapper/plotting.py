@@ -0,0 +1,180 @@
+""" Batch export of AVL plots
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+
+from avlwrapper import logger
+from avlwrapper.session import plot_files
+
+
+class PlotExporter:
+    """Exports the geometry and Trefftz plots of many sessions. Every plot
+    runs AVL and converts the PostScript output with Ghostscript; plots are
+    processed in parallel, so AVL and Ghostscript processes of different
+    plots run concurrently. The Trefftz plots of all cases of a session are
+    produced by one AVL process and one Ghostscript process.
+
+    A manifest in the output directory records the inputs of every plot;
+    plots whose inputs and output files are unchanged are skipped.
+
+    Example:
+    ```
+    exporter = PlotExporter(output_dir="plots", file_format="png")
+    for session in sessions:
+        exporter.add_geometry_plot(session)
+        exporter.add_trefftz_plots(session)
+    files = exporter.export()
+    ```
+    """
+
+    MANIFEST_FILE = "plot-manifest.json"
+
+    def __init__(
+        self, output_dir=None, file_format="pdf", resolution=300, max_workers=None
+    ):
+        """
+        :param Optional[str] output_dir: (optional) output directory,
+            defaults to the working directory
+        :param str file_format: "pdf", "jpeg", "png" or "ps". Trefftz plots
+            are a single multi-page file for "pdf" and "ps", and a file per
+            case for "jpeg" and "png"
+        :param int resolution: resolution (dpi) of the output files
+        :param Optional[int] max_workers: (optional) maximum number of
+            plots processed in parallel, defaults to the number of processors
+        """
+        self.output_dir = output_dir or os.getcwd()
+        self.file_format = file_format
+        self.resolution = resolution
+        self.max_workers = max_workers
+        self._jobs = dict()
+
+    def add_geometry_plot(self, session):
+        """Adds the geometry plot of a session, named "<name>-geometry".
+        Raises a ValueError if a plot of that name was already added.
+
+        :param avlwrapper.Session session: session
+        """
+        plot_name = session.name + "-geometry"
+        self._check_plot_name(plot_name)
+        self._jobs[plot_name] = (
+            session,
+            session._geometry_plot_cmds,
+            session._write_geometry_files,
+        )
+
+    def add_trefftz_plots(self, session):
+        """Adds the Trefftz plots of all cases of a session, named
+        "<name>-trefftz" (pdf and ps) or "<name>-trefftz-<page>". Raises a
+        ValueError if a plot of that name was already added.
+
+        :param avlwrapper.Session session: session
+        """
+        plot_name = session.name + "-trefftz"
+        if self.file_format not in ("pdf", "ps"):
+            plot_name += "-%d"
+        self._check_plot_name(plot_name)
+        self._jobs[plot_name] = (
+            session,
+            session._trefftz_plots_cmds,
+            session._write_analysis_files,
+        )
+
+    def _check_plot_name(self, plot_name):
+        # plots of the same name would overwrite each other's files
+        if plot_name in self._jobs:
+            raise ValueError(
+                f"Plot {plot_name} was already added, sessions of an export "
+                f"need unique names"
+            )
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.output_dir, self.MANIFEST_FILE)
+
+    def _read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return dict()
+        with open(self.manifest_path, "r") as fp:
+            return json.load(fp)
+
+    def fingerprint(self, plot_name):
+        """Hash of the inputs of a plot
+
+        :param str plot_name: plot name
+        :rtype: str
+        """
+        session, cmds, _ = self._jobs[plot_name]
+        digest = hashlib.sha1()
+        for item in (
+            self.file_format,
+            self.resolution,
+            cmds,
+            session._get_geometry_str(),
+            session.mass_dist,
+            "".join(str(case) for case in session.cases),
+        ):
+            digest.update(str(item).encode())
+        for entry in session.airfoil_files.values():
+            digest.update(entry.digest.encode())
+        return digest.hexdigest()
+
+    def export(self, force=False):
+        """Exports all added plots
+
+        :param bool force: also export plots with unchanged inputs
+        :returns: output files by plot name
+        :rtype: Dict[str, List[str]]
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self._read_manifest()
+
+        files, pending = dict(), dict()
+        for plot_name in self._jobs:
+            fingerprint = self.fingerprint(plot_name)
+            entry = manifest.get(plot_name)
+            if (
+                not force
+                and entry is not None
+                and entry["fingerprint"] == fingerprint
+                and entry["files"]
+                and all(os.path.exists(f) for f in entry["files"])
+            ):
+                logger.info(f"Plot {plot_name} is up to date")
+                files[plot_name] = entry["files"]
+            else:
+                pending[plot_name] = fingerprint
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                plot_name: pool.submit(self._export_plot, plot_name)
+                for plot_name in pending
+            }
+            for plot_name, future in futures.items():
+                files[plot_name] = future.result()
+                manifest[plot_name] = {
+                    "fingerprint": pending[plot_name],
+                    "files": files[plot_name],
+                }
+
+        with open(self.manifest_path, "w") as fp:
+            json.dump(manifest, fp, indent=2)
+        return {plot_name: files[plot_name] for plot_name in self._jobs}
+
+    def _export_plot(self, plot_name):
+        session, cmds, pre_fn = self._jobs[plot_name]
+        # remove pages of an earlier export, which may have had more cases
+        for path in plot_files(self._out_file(plot_name)):
+            if os.path.exists(path):
+                os.remove(path)
+        return session.run_avl(
+            cmds=cmds,
+            pre_fn=pre_fn,
+            post_fn=lambda d: session._get_plot(
+                d, plot_name, self.file_format, self.resolution, self.output_dir
+            ),
+        )
+
+    def _out_file(self, plot_name):
+        return os.path.join(self.output_dir, f"{plot_name}.{self.file_format}")
@@ -0,0 +1,240 @@
+""" Pre-flight estimates of the AVL discretisation, run time and memory
+"""
+from dataclasses import dataclass
+import json
+import threading
+from typing import List
+
+# AVL array limits of the default build (AVL.INC), see the [limits] section
+# of the configuration for builds with other limits
+AVL_LIMITS = {
+    "surfaces": 30,
+    "strips": 400,
+    "vortices": 5000,
+    "bodies": 20,
+    "body_nodes": 500,
+    "controls": 20,
+    "design_vars": 20,
+}
+
+# number of unit solutions of the freestream velocity and rotation
+_N_UNIT_SOLUTIONS = 6
+
+
+@dataclass
+class PanelCount:
+    """Discretisation of an AVL geometry, duplicated (YDUPLICATE) surfaces
+    and bodies included
+
+    :param int surfaces: number of surfaces
+    :param int strips: number of chordwise strips
+    :param int vortices: number of horseshoe vortices (elements)
+    :param int bodies: number of bodies
+    :param int body_nodes: number of body line nodes
+    :param int controls: number of control variables
+    :param int design_vars: number of design variables
+    """
+
+    surfaces: int = 0
+    strips: int = 0
+    vortices: int = 0
+    bodies: int = 0
+    body_nodes: int = 0
+    controls: int = 0
+    design_vars: int = 0
+
+    def exceeded(self, limits=None):
+        """Counts exceeding the AVL array limits
+
+        :param Optional[dict] limits: (optional) limits by count name,
+            defaults to AVL_LIMITS
+        :returns: messages, one per exceeded limit
+        :rtype: List[str]
+        """
+        limits = limits or AVL_LIMITS
+        messages = []
+        for name, limit in limits.items():
+            count = getattr(self, name)
+            if limit is not None and count > limit:
+                label = name.replace("_", " ")
+                messages.append(f"{count} {label} exceed the AVL limit of {limit}")
+        return messages
+
+
+def panel_count(geometry):
+    """Counts the surfaces, strips, vortices and body nodes AVL creates
+    for a geometry
+
+    :param avlwrapper.Aircraft geometry: AVL geometry
+    :rtype: PanelCount
+    """
+    count = PanelCount()
+    controls, design_vars = set(), set()
+    for surface in geometry.surfaces:
+        if _n_spanwise(surface) is not None:
+            # a surface-wide spanwise discretisation overrides the sections
+            n_strips = _n_spanwise(surface)
+        else:
+            # the last section closes the surface and has no strips
+            n_strips = sum(
+                _n_spanwise(section) or 0 for section in surface.sections[:-1]
+            )
+        copies = 1 if surface.y_duplicate is None else 2
+        count.surfaces += copies
+        count.strips += copies * n_strips
+        count.vortices += copies * n_strips * surface.n_chordwise
+        for section in surface.sections:
+            controls.update(control.name for control in section.controls)
+            design_vars.update(design_var.name for design_var in section.design_vars)
+
+    for body in geometry.bodies:
+        copies = 1 if body.y_duplicate is None else 2
+        count.bodies += copies
+        count.body_nodes += copies * body.n_body
+
+    count.controls = len(controls)
+    count.design_vars = len(design_vars)
+    return count
+
+
+def _n_spanwise(item):
+    # spanwise panels of a surface or section, only written to the geometry
+    # file together with their spacing
+    if item.n_spanwise is None or item.span_spacing is None:
+        return None
+    return int(item.n_spanwise)
+
+
+@dataclass
+class RunEstimate:
+    """Pre-flight estimate of an AVL run
+
+    :param PanelCount panels: discretisation of the geometry
+    :param float seconds: estimated run time
+    :param List[float] case_seconds: estimated time per case, excluding
+        the start-up and factorisation time of the run
+    :param float memory: estimated memory of the AVL process (bytes)
+    :param List[str] problems: exceeded AVL limits and budgets
+    """
+
+    panels: PanelCount
+    seconds: float
+    case_seconds: List[float]
+    memory: float
+    problems: List[str]
+
+
+class RuntimeModel:
+    """Predicts the run time and memory of AVL from the discretisation.
+
+    A run starts AVL and factorises the aerodynamic influence matrix
+    (~vortices^3) for every Mach number. Every case superimposes the unit
+    solutions (freestream, rotations, controls and design variables) and
+    writes its outputs (~vortices per unit solution); constrained
+    parameters are trimmed iteratively. The estimate is calibrated by a
+    factor which is corrected after every timed run by the ratio of the
+    measured and the estimated time, as `CostModel` does.
+    """
+
+    def __init__(
+        self,
+        startup=0.05,
+        factor_cost=3e-10,
+        case_cost=5e-3,
+        vortex_cost=1e-6,
+        trim_iterations=3.0,
+        base_memory=20e6,
+        matrix_bytes=56.0,
+        learning_rate=0.5,
+    ):
+        """
+        :param float startup: AVL start-up and input time (s)
+        :param float factor_cost: factorisation time per vortices^3 (s)
+        :param float case_cost: fixed time per case (s)
+        :param float vortex_cost: time per vortex and unit solution of a
+            case (s)
+        :param float trim_iterations: additional solutions per
+            constrained parameter
+        :param float base_memory: memory of AVL without the influence
+            matrices (bytes)
+        :param float matrix_bytes: influence matrix memory per vortices^2
+            (bytes), double precision normal-wash and velocity matrices
+        :param float learning_rate: weight of a new timing (0-1)
+        """
+        self.startup = startup
+        self.factor_cost = factor_cost
+        self.case_cost = case_cost
+        self.vortex_cost = vortex_cost
+        self.trim_iterations = trim_iterations
+        self.base_memory = base_memory
+        self.matrix_bytes = matrix_bytes
+        self.learning_rate = learning_rate
+        self.calibration = 1.0
+        self._lock = threading.Lock()
+
+    def case_seconds(self, panels, case):
+        """Estimated time of a case, excluding the start-up and
+        factorisation time of the run
+
+        :param PanelCount panels: discretisation of the geometry
+        :param case: AVL case
+        :rtype: float
+        """
+        n_constraints = sum(
+            1 for param in case.parameters.values() if param.setting != param.name
+        )
+        n_solutions = _N_UNIT_SOLUTIONS + panels.controls + panels.design_vars
+        iterations = 1.0 + self.trim_iterations * n_constraints
+        seconds = self.case_cost + (
+            self.vortex_cost * panels.vortices * n_solutions * iterations
+        )
+        return self.calibration * seconds
+
+    def run_seconds(self, panels, cases):
+        """Estimated time of a run of all cases by one AVL process
+
+        :param PanelCount panels: discretisation of the geometry
+        :param cases: AVL cases
+        :rtype: float
+        """
+        # the influence matrix is factorised again for every Mach number
+        n_mach = max(len({case.states["mach"].value for case in cases}), 1)
+        seconds = self.startup + self.factor_cost * panels.vortices**3 * n_mach
+        return self.calibration * seconds + sum(
+            self.case_seconds(panels, case) for case in cases
+        )
+
+    def memory(self, panels):
+        """Estimated memory of the AVL process (bytes)
+
+        :param PanelCount panels: discretisation of the geometry
+        :rtype: float
+        """
+        return self.base_memory + self.matrix_bytes * panels.vortices**2
+
+    def record(self, panels, cases, seconds):
+        """Calibrates the model with the measured time of a run
+
+        :param PanelCount panels: discretisation of the geometry
+        :param cases: cases of the run
+        :param float seconds: run time
+        """
+        estimate = self.run_seconds(panels, cases)
+        if not estimate or seconds <= 0.0:
+            return
+        ratio = seconds / estimate
+        with self._lock:
+            self.calibration *= 1.0 - self.learning_rate + self.learning_rate * ratio
+
+    def save(self, file_path):
+        """Writes the calibration to a JSON file"""
+        with open(file_path, "w") as fp:
+            json.dump({"calibration": self.calibration}, fp, indent=2)
+
+    def load(self, file_path):
+        """Reads the calibration from a JSON file"""
+        with open(file_path, "r") as fp:
+            self.calibration = json.load(fp)["calibration"]
+
+
+default_runtime_model = RuntimeModel()
@@ -0,0 +1,146 @@
+""" Profiling of session stages and output parsers
+"""
+import cProfile
+from contextlib import contextmanager
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+from avlwrapper import logger
+
+
+class Profiler:
+    """Collects wall time, traced peak memory and (optionally) cProfile
+    statistics of the Python-side stages of AVL runs, and per reader class
+    parse statistics. A JSON report is written after every run.
+    """
+
+    _run_counter = itertools.count(1)
+
+    def __init__(self, memory=True, cprofile=False, report_dir=None):
+        """
+        :param bool memory: trace peak memory per stage with tracemalloc
+        :param bool cprofile: dump cProfile statistics of the Python-side
+            stages, next to the report
+        :param Optional[str] report_dir: (optional) directory of the reports,
+            defaults to the working directory
+        """
+        self.memory = memory
+        self.cprofile = cprofile
+        self.report_dir = report_dir
+        self.report = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._stages = dict()
+        self._parsers = dict()
+        self._profile = cProfile.Profile() if self.cprofile else None
+        self._started_tracing = False
+        self._start_time = None
+
+    def start_run(self):
+        self._reset()
+        self._start_time = time.time()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    @contextmanager
+    def stage(self, name, python=True):
+        """Measures a stage of a run
+
+        :param str name: stage name
+        :param bool python: False for stages waiting on AVL, these are
+            timed only
+        """
+        trace = python and tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        profile = self._profile if python else None
+        if profile is not None:
+            profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profile is not None:
+                profile.disable()
+            stats = self._stages.setdefault(
+                name, {"calls": 0, "seconds": 0.0, "peak_memory": None}
+            )
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1] - start_memory
+                stats["peak_memory"] = max(stats["peak_memory"] or 0, peak)
+
+    def record_parse(self, reader_name, seconds, n_lines):
+        """Adds the statistics of one parsed file
+
+        :param str reader_name: FileReader class name
+        :param float seconds: time to read and parse the file
+        :param int n_lines: number of lines of the file
+        """
+        with self._lock:
+            stats = self._parsers.setdefault(
+                reader_name, {"files": 0, "seconds": 0.0, "lines": 0}
+            )
+            stats["files"] += 1
+            stats["seconds"] += seconds
+            stats["lines"] += n_lines
+
+    def finish_run(self, name):
+        """Writes the report of the run
+
+        :param str name: session name, used as prefix of the report files
+        :returns: path of the report
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+
+        report_dir = self.report_dir or os.getcwd()
+        os.makedirs(report_dir, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self._start_time))
+        # worker processes of an executor write to the same directory
+        base_name = (
+            f"{name}-profile-{timestamp}-{os.getpid()}-{next(self._run_counter)}"
+        )
+        base_path = os.path.join(report_dir, base_name)
+
+        self.report = {
+            "session": name,
+            "started": self._start_time,
+            "stages": self._stages,
+            "parsers": self._parsers,
+            "cprofile": None,
+        }
+        if self._profile is not None:
+            self._profile.dump_stats(base_path + ".prof")
+            self.report["cprofile"] = base_path + ".prof"
+
+        report_path = base_path + ".json"
+        with open(report_path, "w") as fp:
+            json.dump(self.report, fp, indent=2)
+        logger.info(f"Profiling report written to: {report_path}")
+        return report_path
+
+    @classmethod
+    def from_config(cls, config):
+        """Profiler from the profiling settings, None if disabled
+
+        :param avlwrapper.Configuration config: configuration
+        """
+        settings = config.settings.get("profiling", dict())
+        if not settings.get("enabled", False):
+            return None
+        return cls(
+            memory=settings.get("memory", True),
+            cprofile=settings.get("cprofile", False),
+            report_dir=settings.get("report_dir"),
+        )
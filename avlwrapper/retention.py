@@ -0,0 +1,303 @@
+""" Compressed archives of the input, command and output files of AVL runs
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+import itertools
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+
+from avlwrapper import VERSION, logger
+from avlwrapper.output import OutputReader, StdoutReader, match_executions
+
+MANIFEST_FILE = "run.json"
+COMMANDS_FILE = "commands.txt"
+STDOUT_FILE = "stdout.txt"
+
+# directory of the run files in an archive of a staged session, the
+# input files are in the parent directory as in the staged workspace
+STAGED_RUN_DIR = "run"
+
+
+def available_compressions():
+    """Compressions supported by the tarfile module of this Python version,
+    zstd ("zst") requires Python 3.14
+
+    :rtype: List[str]
+    """
+    return [c for c in ("gz", "bz2", "xz", "zst") if c in tarfile.TarFile.OPEN_METH]
+
+
+class RunArchiver:
+    """Keeps the files of AVL runs in compressed tar archives, one per run.
+
+    Before the working directory of a run is removed, its files are hard
+    linked (or copied, on another file system) into a pending directory;
+    compressing them into the archive happens in a background thread, so
+    the run is not delayed by the compression. Call `wait` to finish all
+    pending archives.
+
+    An archive contains the input files, the commands sent to AVL, the
+    standard output (if captured), the output files and a manifest with the
+    case names and output files. It can be read with RunArchive.
+    """
+
+    def __init__(self, directory=None, compression="gz"):
+        """
+        :param Optional[str] directory: (optional) directory of the
+            archives, defaults to the working directory
+        :param str compression: "gz", "bz2", "xz" or "zst", see
+            `available_compressions`
+        """
+        if compression not in available_compressions():
+            raise ValueError(f"Unsupported archive compression: {compression}")
+        self.directory = directory or os.getcwd()
+        self.compression = compression
+        self._counter = itertools.count(1)
+        self._executor = None
+        self._futures = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Archiver from the retention settings, None if disabled
+
+        :param avlwrapper.Configuration config: configuration
+        """
+        settings = config.settings.get("retention", dict())
+        if not settings.get("enabled", False):
+            return None
+        return cls(
+            directory=settings.get("directory"),
+            compression=settings.get("compression", "gz"),
+        )
+
+    def submit(
+        self, working_dir, name, cmds, stdout=None, input_dir=None, manifest=None
+    ):
+        """Archives the files of a run in the background
+
+        :param str working_dir: working directory of the run
+        :param str name: session name, prefix of the archive name
+        :param str cmds: commands sent to AVL
+        :param Optional[str] stdout: (optional) standard output of AVL
+        :param Optional[str] input_dir: (optional) directory of the input
+            files, if not the working directory (staged workspace)
+        :param Optional[dict] manifest: (optional) additional manifest
+            entries, e.g. the case names and outputs
+        :returns: path of the archive, written when `wait` returns
+        :rtype: str
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        timestamp = datetime.now()
+        archive_path = os.path.join(
+            self.directory,
+            f"{name}-{timestamp:%Y%m%dT%H%M%S}-{os.getpid()}-"
+            f"{next(self._counter):04d}.tar.{self.compression}",
+        )
+
+        # the working directory is removed when the run finishes, its
+        # files are kept in the pending directory until they are archived
+        pending_dir = tempfile.mkdtemp(prefix=".pending-", dir=self.directory)
+        run_dir = pending_dir
+        if input_dir is not None:
+            run_dir = os.path.join(pending_dir, STAGED_RUN_DIR)
+            # the staged input files may be rewritten by a later run, the
+            # run directories of other runs are skipped
+            _link_tree(input_dir, pending_dir, copy=True, skip_prefix="run_")
+        _link_tree(working_dir, run_dir)
+
+        manifest = dict(
+            manifest or dict(),
+            session=name,
+            created=timestamp.isoformat(),
+            avlwrapper=VERSION,
+            run_dir=STAGED_RUN_DIR if input_dir is not None else ".",
+            stdout=stdout is not None,
+        )
+        with open(os.path.join(pending_dir, MANIFEST_FILE), "w") as fp:
+            json.dump(manifest, fp, indent=2)
+        with open(os.path.join(pending_dir, COMMANDS_FILE), "w") as fp:
+            fp.write(cmds)
+        if stdout is not None:
+            with open(os.path.join(pending_dir, STDOUT_FILE), "w") as fp:
+                fp.write(stdout)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="avl-retention"
+                )
+            self._futures.append(
+                self._executor.submit(self._write, pending_dir, archive_path)
+            )
+        return archive_path
+
+    def wait(self):
+        """Waits until all submitted runs are archived"""
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait(futures)
+
+    def _write(self, pending_dir, archive_path):
+        tmp_path = archive_path + ".tmp"
+        try:
+            with tarfile.open(tmp_path, f"w:{self.compression}") as tar:
+                for entry in sorted(os.listdir(pending_dir)):
+                    tar.add(os.path.join(pending_dir, entry), arcname=entry)
+            os.replace(tmp_path, archive_path)
+        except (OSError, tarfile.TarError) as e:
+            logger.warning(f"Archiving the run files to {archive_path} failed: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            shutil.rmtree(pending_dir, ignore_errors=True)
+
+
+class RunArchive:
+    """Reads the files of an archived run, e.g. to parse the results again
+    without running AVL.
+
+    Example:
+    ```
+    with RunArchive("b737-20240101T120000-1234-0001.tar.gz") as archive:
+        results = archive.case_results()
+    ```
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: path to the archive
+        """
+        self.path = path
+        self._tar = tarfile.open(path, "r:*")
+        self.manifest = json.loads(self.read_text(MANIFEST_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._tar.close()
+
+    @property
+    def names(self):
+        """Names of the files in the archive"""
+        return [member.name for member in self._tar.getmembers() if member.isfile()]
+
+    @property
+    def commands(self):
+        return self.read_text(COMMANDS_FILE)
+
+    @property
+    def stdout(self):
+        """Standard output of AVL, None if it was not captured"""
+        if not self.manifest.get("stdout"):
+            return None
+        return self.read_text(STDOUT_FILE)
+
+    def read_text(self, name):
+        """Content of a file in the archive
+
+        :param str name: file name, relative to the archive root
+        :rtype: str
+        """
+        try:
+            member = self._tar.extractfile(name)
+        except KeyError:
+            member = None
+        if member is None:
+            raise FileNotFoundError(name)
+        with member:
+            return member.read().decode(errors="replace")
+
+    def read_output(self, file_name, schemas=None):
+        """Parses an output file of the run
+
+        :param str file_name: file name, relative to the working directory
+            of the run
+        :param Optional[ResultSchemas] schemas: (optional) see
+            `OutputReader.get_content`
+        """
+        text = self.read_text(self._run_path(file_name))
+        reader = OutputReader(file_name, lines=text.splitlines(keepends=True))
+        return reader.get_content(schemas=schemas)
+
+    def case_results(self, schemas=None):
+        """Results of the cases of the run, as returned by
+        `Session.run_all_cases`; empty for other runs, e.g. plots
+
+        :param Optional[ResultSchemas] schemas: (optional) see
+            `OutputReader.get_content`
+        :rtype: Dict[int, dict]
+        """
+        name = self.manifest["session"]
+        outputs = self.manifest.get("outputs", dict())
+        cases = self.manifest.get("cases", dict())
+
+        executions = dict()
+        if self.manifest.get("stdout") and "Totals" not in outputs:
+            case_file_numbers = self.manifest.get("case_file_numbers", dict())
+            executions = dict(
+                match_executions(
+                    StdoutReader().read(self.stdout),
+                    [
+                        (number, case_file_numbers.get(number), case_name)
+                        for number, case_name in cases.items()
+                    ],
+                )
+            )
+
+        results = dict()
+        for number, case_name in cases.items():
+            case_results = {"Name": case_name}
+            if number in executions:
+                totals = executions[number]["Totals"]
+                if schemas is not None:
+                    totals = schemas.record(totals)
+                case_results["Totals"] = totals
+                case_results["Convergence"] = executions[number]["Convergence"]
+            for output, ext in outputs.items():
+                file_name = f"{name}-{number}.{ext}"
+                case_results[output] = self.read_output(file_name, schemas)
+            results[int(number)] = case_results
+        return results
+
+    def extract(self, path):
+        """Extracts all files, e.g. to run AVL with the archived commands
+        from the run directory (see the manifest)
+
+        :param str path: target directory
+        """
+        self._tar.extractall(path, filter="data")
+
+    def _run_path(self, file_name):
+        run_dir = self.manifest.get("run_dir", ".")
+        if run_dir == ".":
+            return file_name
+        return f"{run_dir}/{file_name}"
+
+
+def _link_tree(source, target, copy=False, skip_prefix=None):
+    # hard links the files of a directory tree, unless they are linked
+    # elsewhere too (e.g. staged airfoil files), which could change before
+    # they are archived. Files are copied across file systems.
+    os.makedirs(target, exist_ok=True)
+    for entry in os.scandir(source):
+        target_path = os.path.join(target, entry.name)
+        if entry.is_dir():
+            if skip_prefix is None or not entry.name.startswith(skip_prefix):
+                _link_tree(entry.path, target_path, copy)
+        elif entry.is_file():
+            if not copy and entry.stat().st_nlink == 1:
+                try:
+                    os.link(entry.path, target_path)
+                    continue
+                except OSError:
+                    pass
+            shutil.copy2(entry.path, target_path)
@@ -0,0 +1,247 @@
+""" Cost-aware partitioning and work-stealing scheduling of AVL runs
+"""
+from collections import deque
+import heapq
+import json
+import os
+import threading
+
+from avlwrapper import logger
+
+
+class CostModel:
+    """Estimates the AVL run time of cases, learned from timing history.
+
+    Cases are classified by the analysis and the number of constrained
+    parameters (e.g. elevator -> Cm = 0), which require iterative solves.
+    The cost of a class starts from a prior and is corrected after every
+    timed run by the ratio of the measured and the estimated time of the
+    run, weighted by the share of the class in the estimate.
+
+    The prior of a case can be given, e.g. the run time estimate of
+    `RuntimeModel.case_seconds` as used by Session; otherwise it follows
+    from the base and constraint costs.
+    """
+
+    def __init__(self, base_cost=1.0, constraint_cost=1.0, learning_rate=0.5):
+        """
+        :param float base_cost: prior cost of an unconstrained case
+        :param float constraint_cost: prior additional cost per constraint
+        :param float learning_rate: weight of a new timing (0-1)
+        """
+        self.base_cost = base_cost
+        self.constraint_cost = constraint_cost
+        self.learning_rate = learning_rate
+        self._costs = dict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def case_class(case, analysis="cases"):
+        """Cost class of a case
+
+        :param case: AVL case
+        :param str analysis: "cases" or "modes"
+        :rtype: str
+        """
+        n_constraints = sum(
+            1 for param in case.parameters.values() if param.setting != param.name
+        )
+        return f"{analysis}-{n_constraints}"
+
+    def class_cost(self, case_class, prior=None):
+        """Learned cost of a class, or the prior if it was never timed
+
+        :param str case_class: cost class, see `case_class`
+        :param Optional[float] prior: (optional) prior cost
+        :rtype: float
+        """
+        with self._lock:
+            if case_class in self._costs:
+                return self._costs[case_class]
+        if prior is not None:
+            return prior
+        n_constraints = int(case_class.rsplit("-", 1)[1])
+        return self.base_cost + n_constraints * self.constraint_cost
+
+    def case_cost(self, case, analysis="cases", prior=None):
+        """Estimated cost of a case
+
+        :param case: AVL case
+        :param str analysis: "cases" or "modes"
+        :param Optional[float] prior: (optional) prior cost of the case
+        :rtype: float
+        """
+        return self.class_cost(self.case_class(case, analysis), prior)
+
+    def record(self, cases, seconds, analysis="cases", priors=None):
+        """Learns from the measured time of a run
+
+        :param cases: cases of the run
+        :param float seconds: run time
+        :param str analysis: "cases" or "modes"
+        :param Optional[typing.Sequence[float]] priors: (optional) prior
+            cost per case
+        """
+        cases = list(cases)
+        if priors is None:
+            priors = [None] * len(cases)
+        counts, prior_sums = dict(), dict()
+        for case, prior in zip(cases, priors):
+            case_class = self.case_class(case, analysis)
+            counts[case_class] = counts.get(case_class, 0) + 1
+            if prior is not None:
+                prior_sums[case_class] = prior_sums.get(case_class, 0.0) + prior
+        # the prior of a class is the mean prior of its cases
+        costs = {
+            case_class: self.class_cost(
+                case_class,
+                prior_sums[case_class] / n_cases if case_class in prior_sums else None,
+            )
+            for case_class, n_cases in counts.items()
+        }
+        estimate = sum(costs[c] * n for c, n in counts.items())
+        if not estimate or seconds <= 0.0:
+            return
+
+        ratio = seconds / estimate
+        with self._lock:
+            for case_class, n_cases in counts.items():
+                weight = self.learning_rate * costs[case_class] * n_cases / estimate
+                self._costs[case_class] = costs[case_class] * (
+                    1.0 - weight + weight * ratio
+                )
+
+    def to_dict(self):
+        with self._lock:
+            return dict(self._costs)
+
+    def save(self, file_path):
+        """Writes the learned costs to a JSON file"""
+        with open(file_path, "w") as fp:
+            json.dump(self.to_dict(), fp, indent=2)
+
+    def load(self, file_path):
+        """Reads learned costs from a JSON file"""
+        with open(file_path, "r") as fp:
+            costs = json.load(fp)
+        with self._lock:
+            self._costs.update(costs)
+
+
+def balanced_partitions(costs, n_partitions, max_size=None):
+    """Partitions items with balanced total cost (longest processing time
+    first: every item, most expensive first, goes to the partition with
+    the lowest total cost)
+
+    :param typing.Sequence[float] costs: cost per item
+    :param int n_partitions: number of partitions
+    :param Optional[int] max_size: (optional) maximum number of items per
+        partition, n_partitions is increased if needed
+    :returns: item indices (in order) per partition, most expensive
+        partition first
+    :rtype: List[List[int]]
+    """
+    n_items = len(costs)
+    if max_size is not None:
+        n_partitions = max(n_partitions, -(-n_items // max_size))
+    n_partitions = max(min(n_partitions, n_items), 1)
+
+    partitions = [[] for _ in range(n_partitions)]
+    loads = [0.0] * n_partitions
+    # heap of (load, partition) of the partitions which are not full
+    heap = [(0.0, p) for p in range(n_partitions)]
+    for idx in sorted(range(n_items), key=lambda i: costs[i], reverse=True):
+        load, target = heapq.heappop(heap)
+        partitions[target].append(idx)
+        loads[target] = load + costs[idx]
+        if max_size is None or len(partitions[target]) < max_size:
+            heapq.heappush(heap, (loads[target], target))
+
+    order = sorted(range(n_partitions), key=lambda p: loads[p], reverse=True)
+    return [sorted(partitions[p]) for p in order if partitions[p]]
+
+
+class WorkStealingPool:
+    """Runs tasks on worker threads, each with its own queue of tasks.
+    Tasks are distributed over the queues by cost; a worker which has
+    finished its own queue takes the cheapest remaining task of the worker
+    with the most remaining work.
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        :param Optional[int] max_workers: number of worker threads,
+            defaults to the number of processors
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def map(self, fn, items, costs=None):
+        """Runs fn on every item
+
+        :param fn: function to run
+        :param typing.Sequence items: items
+        :param Optional[typing.Sequence[float]] costs: (optional) estimated
+            cost per item
+        :returns: results, in the order of the items
+        :rtype: list
+        """
+        items = list(items)
+        costs = list(costs) if costs is not None else [1.0] * len(items)
+        n_workers = max(min(self.max_workers, len(items)), 1)
+
+        # queued cost per worker
+        queues = [deque() for _ in range(n_workers)]
+        loads = [0.0] * n_workers
+        # most expensive tasks first, to the least loaded worker
+        for idx in sorted(range(len(items)), key=lambda i: costs[i], reverse=True):
+            worker = min(range(n_workers), key=lambda w: loads[w])
+            queues[worker].append(idx)
+            loads[worker] += costs[idx]
+
+        lock = threading.Lock()
+        results = [None] * len(items)
+        errors = []
+
+        def next_task(worker):
+            with lock:
+                if errors:
+                    return None
+                if queues[worker]:
+                    idx = queues[worker].popleft()
+                    loads[worker] -= costs[idx]
+                    return idx
+                busy = [w for w in range(n_workers) if queues[w]]
+                if not busy:
+                    return None
+                victim = max(busy, key=lambda w: loads[w])
+                idx = queues[victim].pop()
+                loads[victim] -= costs[idx]
+                logger.debug(f"Worker {worker} took task {idx} of worker {victim}")
+                return idx
+
+        def work(worker):
+            while True:
+                idx = next_task(worker)
+                if idx is None:
+                    return
+                try:
+                    results[idx] = fn(items[idx])
+                except Exception as e:
+                    with lock:
+                        errors.append(e)
+                    return
+
+        threads = [
+            threading.Thread(target=work, args=(worker,), daemon=True)
+            for worker in range(n_workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        return results
+
+
+default_cost_model = CostModel()
@@ -1,14 +1,37 @@
 """ AVL Wrapper session and input classes
 """
+from contextlib import nullcontext
+import copy
 import glob
+import hashlib
+import io
 import os
 import shutil
 import subprocess
+import sys
 from tempfile import TemporaryDirectory
+import threading
+import time
 
 import tkinter as tk
 
-from avlwrapper import Case, OutputReader, default_config, logger
+from avlwrapper import Case, OutputReader, default_config, default_registry, logger
+from avlwrapper.airfoils import STAGING_MODES, relocate_airfoils
+from avlwrapper.output import ResultSchemas, StdoutReader, match_executions
+from avlwrapper.preflight import (
+    AVL_LIMITS,
+    RunEstimate,
+    default_runtime_model,
+    panel_count,
+)
+from avlwrapper.profiling import Profiler
+from avlwrapper.retention import RunArchiver
+from avlwrapper.scheduling import (
+    WorkStealingPool,
+    balanced_partitions,
+    default_cost_model,
+)
+from avlwrapper.tools import partitioned_cases, unique_cases
 
 
 class Session:
@@ -26,19 +49,69 @@ class Session:
         "StripShearMoments": "vm",
     }
 
+    # maximum number of run cases in a case file
+    CASES_PER_FILE = 25
+
     MODE_OUTPUTS = {
         "EigenValues": "eig",
         "SystemMatrix": "sys",
     }
 
-    def __init__(self, geometry, cases=None, mass_dist=None, name=None, config=default_config):
+    def __init__(
+        self,
+        geometry,
+        cases=None,
+        mass_dist=None,
+        name=None,
+        config=default_config,
+        airfoil_staging=None,
+        staged=None,
+        staging_dir=None,
+        typed_results=None,
+        profile=None,
+        stdout_results=None,
+        deduplicate=None,
+        mass_states=False,
+        retain_runs=None,
+    ):
         """
         :param avlwrapper.Aircraft geometry: AVL geometry
-        :param List[Case] cases: Cases to include in input files
+        :param cases: Cases to include in input files
+        :type cases: List[Case] or avlwrapper.cases.CaseTable
         :param Optional[MassDistribution] mass_dist: Mass distribution
         :param str name: session name, defaults to geometry name
         :param avlwrapper.Configuration config: (optional) dictionary
             containing setting
+        :param str airfoil_staging: (optional) "link", "symlink", "copy" or
+            "inline", defaults to the configuration setting
+        :param Optional[bool] staged: (optional) write the geometry, mass and
+            airfoil files once into a persistent workspace and run every
+            case set in a sub-directory of it, defaults to the configuration
+            setting. Call `close` (or use the session as a context manager)
+            to remove the workspace.
+        :param Optional[str] staging_dir: (optional) parent directory of the
+            workspace, e.g. "/dev/shm"
+        :param Optional[bool] typed_results: (optional) return totals,
+            stability derivatives and hinge moments as ResultRecord objects
+            sharing the session's key schemas instead of dictionaries,
+            defaults to the configuration setting
+        :param profile: (optional) True or a Profiler to profile every run,
+            defaults to the profiling configuration
+        :type profile: bool or avlwrapper.Profiler
+        :param Optional[bool] stdout_results: (optional) parse the totals
+            and the convergence diagnostics of every case from the standard
+            output of AVL instead of writing a totals file, defaults to the
+            configuration setting
+        :param Optional[bool] deduplicate: (optional) run identical
+            operating points once and copy their results to every duplicate
+            case, defaults to the configuration setting
+        :param bool mass_states: use the mass, CG and inertia states of the
+            cases (see `dynamics.MassProperties.set_case_states`), the mass
+            distribution then only provides the units, gravity and density
+        :param retain_runs: (optional) True or a RunArchiver to keep the
+            input, command and output files of every run in a compressed
+            archive, defaults to the retention configuration
+        :type retain_runs: bool or avlwrapper.RunArchiver
         """
 
         self.config = config
@@ -47,9 +120,75 @@ class Session:
         self.cases = self._prepare_cases(cases)
         self.name = name or self.geometry.name
         self.mass_dist = mass_dist
+        self.mass_states = mass_states
+
+        self.airfoil_staging = airfoil_staging or self.config.settings.get(
+            "airfoil_staging", "link"
+        )
+        if self.airfoil_staging not in STAGING_MODES:
+            raise InputError(f"Invalid airfoil staging: {self.airfoil_staging}")
+        self._airfoil_files = None
+
+        if staged is None:
+            staged = self.config.settings.get("staged_workspace", False)
+        if staged:
+            staging_dir = staging_dir or self.config.settings.get("staging_dir")
+            self._workspace = _StagedWorkspace(staging_dir)
+        else:
+            self._workspace = None
+        self._owns_workspace = staged
+
+        if typed_results is None:
+            typed_results = self.config.settings.get("typed_results", False)
+        self._result_schemas = ResultSchemas() if typed_results else None
+
+        if profile is None:
+            self._profiler = Profiler.from_config(self.config)
+        elif profile is True:
+            self._profiler = Profiler()
+        else:
+            self._profiler = profile or None
+
+        if retain_runs is None:
+            self._archiver = RunArchiver.from_config(self.config)
+        elif retain_runs is True:
+            self._archiver = RunArchiver()
+        else:
+            self._archiver = retain_runs or None
+
+        if stdout_results is None:
+            stdout_results = self.config.settings.get("stdout_results", False)
+        self.stdout_results = stdout_results
+
+        if deduplicate is None:
+            deduplicate = self.config.settings.get("deduplicate", False)
+        self.deduplicate = deduplicate
+        self.deduplication_tolerance = self.config.settings.get(
+            "deduplication_tolerance", 1e-6
+        )
+
+        # estimates the run time of cases for the partitioning of parallel runs
+        self.cost_model = default_cost_model
+        # predicts the run time and memory of AVL for the pre-flight check,
+        # and the cost of cases the cost model has no timing history of
+        self.runtime_model = default_runtime_model
 
         self._results = None
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Finishes the run archives and removes the staged workspace, if
+        any"""
+        if self._archiver is not None:
+            self._archiver.wait()
+        if self._workspace is not None and self._owns_workspace:
+            self._workspace.cleanup()
+
     def _prepare_cases(self, cases):
         # guard for cases=None
         if cases is None:
@@ -64,6 +203,11 @@ class Session:
             "cd_p": self.geometry.cd_p,
         }
 
+        if _is_case_table(cases):
+            cases.renumber()
+            cases.fill_defaults(**geom_defaults)
+            return cases
+
         for idx, case in enumerate(cases):
             case.number = idx + 1
             for key, val in geom_defaults.items():
@@ -79,6 +223,18 @@ class Session:
     def case_file(self):
         return self.name + ".case"
 
+    def _get_case_filename(self, chunk_idx):
+        if chunk_idx == 0:
+            return self.case_file
+        return f"{self.name}-{chunk_idx}.case"
+
+    def _get_chunk_index(self, case):
+        return (case.number - 1) // self.CASES_PER_FILE
+
+    def _get_local_number(self, case):
+        # number of the case within its case file
+        return (case.number - 1) % self.CASES_PER_FILE + 1
+
     @property
     def mass_file(self):
         return self.name + ".mass"
@@ -98,70 +254,244 @@ class Session:
             outputs[name] = ext
         return outputs
 
-    def _write_geometry(self, target_dir):
+    @property
+    def _file_outputs(self):
+        # outputs written to files by AVL, totals are read from the
+        # standard output in stdout results mode
+        outputs = self.requested_output
+        if self.stdout_results:
+            outputs.pop("Totals", None)
+        return outputs
+
+    @property
+    def _input_dir(self):
+        # location of the input files relative to the AVL working directory
+        return os.pardir if self._workspace is not None else None
+
+    def _input_path(self, file_name):
+        if self._input_dir is None:
+            return file_name
+        return os.path.join(self._input_dir, file_name)
+
+    def _get_geometry_str(self):
+        if self.airfoil_staging == "inline":
+            geometry = default_registry.inline(self.geometry)
+        elif self._input_dir is not None:
+            geometry = copy.deepcopy(self.geometry)
+        else:
+            return str(self.geometry)
+        if self._input_dir is not None:
+            relocate_airfoils(geometry, self._input_dir)
+        return str(geometry)
+
+    def _write_geometry(self, target_dir, geometry_str=None):
         model_path = os.path.join(target_dir, self.model_file)
         with open(model_path, "w") as avl_file:
-            avl_file.write(str(self.geometry))
+            avl_file.write(geometry_str or self._get_geometry_str())
 
     def _write_mass(self, target_dir):
         mass_path = os.path.join(target_dir, self.mass_file)
         with open(mass_path, "w") as mass_file:
             mass_file.write(str(self.mass_dist))
 
-    def _copy_airfoils(self, target_dir):
-        airfoil_paths = self.geometry.external_files
-        for airfoil_path in airfoil_paths:
-            shutil.copy(airfoil_path, target_dir)
-
-    def _write_cases(self, target_dir):
-        # AVL is limited to 25 cases
-        if len(self.cases) > 25:
-            raise InputError(
-                "Number of cases is larger than " "the supported maximum of 25."
+    @property
+    def airfoil_files(self):
+        """Airfoil files referenced by the geometry, resolved once per session"""
+        if self._airfoil_files is None:
+            self._airfoil_files = default_registry.geometry_files(self.geometry)
+        return self._airfoil_files
+
+    def _copy_airfoils(self, target_dir, export=False):
+        # exported files are independent copies, replacing earlier exports
+        if export:
+            mode = "copy"
+        elif self.airfoil_staging == "inline":
+            mode = "link"
+        else:
+            mode = self.airfoil_staging
+        for filename, entry in self.airfoil_files.items():
+            # inlined airfoils are part of the geometry file, only bodies remain
+            if self.airfoil_staging == "inline" and not self._is_body_file(filename):
+                continue
+            default_registry.stage(
+                filename, entry, target_dir, mode=mode, overwrite=export
             )
 
-        case_file_path = os.path.join(target_dir, self.case_file)
+    def _is_body_file(self, filename):
+        return any(body.body_section.filename == filename for body in self.geometry.bodies)
 
-        with open(case_file_path, "w") as case_file:
-            for case in self.cases:
-                case_file.write(str(case))
+    def _write_cases(self, target_dir):
+        # AVL is limited to 25 cases per case file, larger sets of cases
+        # are split over multiple files which are loaded in turn
+        for chunk_idx, cases in enumerate(
+            partitioned_cases(self.cases, self.CASES_PER_FILE)
+        ):
+            file_name = self._get_case_filename(chunk_idx)
+            with open(os.path.join(target_dir, file_name), "w") as case_file:
+                if _is_case_table(cases):
+                    cases.renumber()
+                    cases.write(case_file)
+                else:
+                    for case in cases:
+                        # write with the number within the file
+                        local_case = copy.copy(case)
+                        local_case.number = self._get_local_number(case)
+                        case_file.write(str(local_case))
+
+    def _write_input_files(self, target_dir, geometry_str=None, export=False):
+        self._write_geometry(target_dir, geometry_str)
+        self._copy_airfoils(target_dir, export)
+        if self.mass_dist:
+            self._write_mass(target_dir)
+
+    def _write_geometry_files(self, target_dir):
+        # staged geometry and airfoils are already in place
+        if self._workspace is None:
+            self._write_geometry(target_dir)
+            self._copy_airfoils(target_dir)
 
     def _write_analysis_files(self, target_dir):
-        self._write_geometry(target_dir)
-        self._copy_airfoils(target_dir)
+        if self._workspace is None:
+            self._write_input_files(target_dir)
         if self.cases:
             self._write_cases(target_dir)
-        if self.mass_dist:
-            self._write_mass(target_dir)
 
-    def run_avl(self, cmds, pre_fn, post_fn):
-        with TemporaryDirectory(prefix="avl_") as working_dir:
-            pre_fn(working_dir)
+    def _run_context(self):
+        if self._workspace is None:
+            return TemporaryDirectory(prefix="avl_")
+        self._workspace.stage(self)
+        return self._workspace.run_dir()
+
+    def _stage(self, name, python=True):
+        if self._profiler is None:
+            return nullcontext()
+        return self._profiler.stage(name, python)
+
+    def run_avl(
+        self, cmds, pre_fn, post_fn, capture_stdout=False, case_results=False
+    ):
+        """Runs AVL in a working directory
+
+        :param str cmds: commands sent to AVL
+        :param pre_fn: function writing the input files,
+            called with the working directory
+        :param post_fn: function reading the results, called with the
+            working directory (and the standard output if captured)
+        :param bool capture_stdout: capture the standard output of AVL
+        :param bool case_results: the run writes the results of all cases,
+            recorded in the manifest of a run archive
+        """
+        if self._profiler is not None:
+            self._profiler.start_run()
+
+        with self._stage("stage_inputs"):
+            run_context = self._run_context()
+        with run_context as working_dir:
+            with self._stage("write_inputs"):
+                pre_fn(working_dir)
+
+            stdout = None
+            try:
+                with self._stage("avl", python=False):
+                    process = self._get_avl_process(working_dir, capture_stdout)
+                    stdout, _ = process.communicate(input=cmds.encode())
+                    process.wait()
+
+                with self._stage("read_outputs"):
+                    if capture_stdout:
+                        stdout = stdout.decode(errors="replace")
+                        if self.config["show_stdout"]:
+                            sys.stdout.write(stdout)
+                        ret = post_fn(working_dir, stdout)
+                    else:
+                        ret = post_fn(working_dir)
+            finally:
+                # runs whose results cannot be read are kept too
+                self._retain(working_dir, cmds, stdout, case_results)
+
+        if self._profiler is not None:
+            self._profiler.finish_run(self.name)
+        return ret
 
-            process = self._get_avl_process(working_dir)
-            process.communicate(input=cmds.encode())
-            process.wait()
+    def _retain(self, working_dir, cmds, stdout=None, case_results=False):
+        # archive the run files before the working directory is removed
+        if self._archiver is None:
+            return
+        with self._stage("retain_files"):
+            input_dir = None if self._workspace is None else self._workspace.path
+            manifest = dict()
+            if case_results:
+                manifest = {
+                    "cases": {str(case.number): case.name for case in self.cases},
+                    # numbers in the case files, as printed by AVL
+                    "case_file_numbers": {
+                        str(case.number): self._get_local_number(case)
+                        for case in self.cases
+                    },
+                    "outputs": self._file_outputs,
+                }
+            self._archiver.submit(
+                working_dir,
+                self.name,
+                cmds,
+                stdout=stdout,
+                input_dir=input_dir,
+                manifest=manifest,
+            )
 
-            ret = post_fn(working_dir)
-        return ret
+    def _read_output(self, file_path, schemas=None):
+        if self._profiler is None:
+            return OutputReader(file_path=file_path).get_content(schemas=schemas)
+
+        start = time.perf_counter()
+        reader = OutputReader(file_path=file_path)
+        content = reader.get_content(schemas=schemas)
+        self._profiler.record_parse(
+            type(reader.reader).__name__,
+            time.perf_counter() - start,
+            len(reader.reader.lines),
+        )
+        return content
 
-    def _get_cases_run_cmds(self, cases):
-        cmds = "oper\n"
+    def _load_case_file_cmds(self, chunk_idx):
+        cmds = f"case {self._get_case_filename(chunk_idx)}\n"
+        if self.mass_dist and not self.mass_states:
+            # apply the mass distribution to the new run cases
+            cmds += "mset\n\n"
+        return cmds
+
+    def _chunked_cases_cmds(self, cases, menu, case_cmds_fn):
+        # the first case file is loaded by _load_files_cmds, further files
+        # are loaded from the top-level menu when their first case is reached
+        cmds = f"{menu}\n"
+        current_chunk = 0
         for case in cases:
-            cmds += "{0}\nx\n".format(case.number)
-            for _, ext in self.requested_output.items():
+            chunk_idx = self._get_chunk_index(case)
+            if chunk_idx != current_chunk:
+                cmds += "\n" + self._load_case_file_cmds(chunk_idx) + f"{menu}\n"
+                current_chunk = chunk_idx
+            cmds += case_cmds_fn(case, self._get_local_number(case))
+        return cmds
+
+    def _get_cases_run_cmds(self, cases):
+        def case_cmds(case, local_number):
+            cmds = "{0}\nx\n".format(local_number)
+            for _, ext in self._file_outputs.items():
                 out_file = self._get_output_filename(case, ext)
                 cmds += "{cmd}\n{file}\n".format(cmd=ext, file=out_file)
-        return cmds
+            return cmds
+
+        return self._chunked_cases_cmds(cases, "oper", case_cmds)
 
     @property
     def _load_files_cmds(self):
-        cmds = f"load {self.model_file}\n"
+        cmds = f"load {self._input_path(self.model_file)}\n"
         if self.cases:
             cmds += f"case {self.case_file}\n"
         if self.mass_dist:
-            cmds += f"mass {self.mass_file}\n"
-            cmds += f"mset\n\n"
+            cmds += f"mass {self._input_path(self.mass_file)}\n"
+            if not self.mass_states:
+                cmds += f"mset\n\n"
         return cmds
 
     @property
@@ -175,14 +505,352 @@ class Session:
         cmds += "\nquit\n"
         return cmds
 
-    def run_all_cases(self):
-        results = self.run_avl(
-            cmds=self._run_all_cases_cmds,
-            pre_fn=self._write_analysis_files,
-            post_fn=self._read_case_results,
-        )
+    def run_all_cases(self, executor=None, partition_size=None):
+        """Runs all cases and reads the requested output files
+
+        With an executor, every partition runs in a session with the options
+        of this session (staged workspace, run retention, profiling); run
+        archives and profiling reports of workers on other hosts are written
+        on those hosts. The cost and runtime models learn from the run time
+        of every partition, as they do from a local run.
+
+        :param Optional[avlwrapper.Executor] executor: (optional) executor
+            to distribute partitions of the cases over, by default all
+            cases are run by a single local AVL process
+        :param Optional[int] partition_size: number of cases per executor
+            job, defaults to Session.CASES_PER_FILE
+        :returns: results by case number
+        """
+        if self.deduplicate:
+            unique, inverse = self._unique_cases()
+            if len(unique) < len(self.cases):
+                unique_results = self._unique_session(unique).run_all_cases(
+                    executor=executor, partition_size=partition_size
+                )
+                return {
+                    case.number: _duplicate_results(unique_results[idx + 1], case)
+                    for case, idx in zip(self.cases, inverse)
+                }
+
+        self._preflight()
+        if executor is not None:
+            results = dict()
+            for indices, partition_results in self._run_jobs(
+                executor, "cases", partition_size
+            ):
+                for number, case_results in partition_results.items():
+                    results[indices[number - 1] + 1] = case_results
+            return dict(sorted(results.items()))
+
+        start = time.perf_counter()
+        if self.stdout_results:
+            results = self.run_avl(
+                cmds=self._run_all_cases_cmds,
+                pre_fn=self._write_analysis_files,
+                post_fn=self._read_stdout_case_results,
+                capture_stdout=True,
+                case_results=True,
+            )
+        else:
+            results = self.run_avl(
+                cmds=self._run_all_cases_cmds,
+                pre_fn=self._write_analysis_files,
+                post_fn=self._read_case_results,
+                case_results=True,
+            )
+        elapsed = time.perf_counter() - start
+        self.cost_model.record(self.cases, elapsed, priors=self._cost_priors())
+        self.runtime_model.record(panel_count(self.geometry), self.cases, elapsed)
         return results
 
+    def iter_case_results(self, poll_interval=0.05):
+        """Runs all cases and yields the results of each case as soon as AVL
+        has written its output files, while AVL continues with the next
+        cases. Results are not kept by the session.
+
+        :param float poll_interval: time between checks of the
+            working directory (s)
+        :returns: generator of (case number, results) tuples
+        """
+        if not self.cases:
+            raise InputError("Streaming case results requires cases")
+
+        if self.deduplicate:
+            unique, inverse = self._unique_cases()
+            if len(unique) < len(self.cases):
+                duplicates = [[] for _ in unique]
+                for case, idx in zip(self.cases, inverse):
+                    duplicates[idx].append(case)
+                session = self._unique_session(unique)
+                for number, results in session.iter_case_results(poll_interval):
+                    for case in duplicates[number - 1]:
+                        yield case.number, _duplicate_results(results, case)
+                return
+
+        self._preflight()
+        if self._profiler is not None:
+            self._profiler.start_run()
+
+        # standard output read so far, kept in the run archive
+        stdout_lines = [] if self.stdout_results else None
+        with self._run_context() as working_dir:
+            with self._stage("write_inputs"):
+                self._write_analysis_files(working_dir)
+            try:
+                # results are read while AVL runs, the stage covers the
+                # lifetime of the AVL process
+                with self._stage("avl", python=False):
+                    yield from self._stream_case_results(
+                        working_dir, poll_interval, stdout_lines
+                    )
+            finally:
+                stdout = None if stdout_lines is None else "".join(stdout_lines)
+                self._retain(
+                    working_dir, self._run_all_cases_cmds, stdout, case_results=True
+                )
+                if self._profiler is not None:
+                    self._profiler.finish_run(self.name)
+
+    def _stream_case_results(self, working_dir, poll_interval, stdout_lines=None):
+        process = self._get_avl_process(working_dir, self.stdout_results)
+        writer = threading.Thread(
+            target=_write_stdin,
+            args=(process, self._run_all_cases_cmds),
+            daemon=True,
+        )
+        writer.start()
+        try:
+            cases = list(self.cases)
+            if self.stdout_results:
+                yield from self._iter_stdout_case_results(
+                    working_dir, process, cases, stdout_lines
+                )
+                return
+            for case, next_case in zip(cases, cases[1:] + [None]):
+                self._wait_for_case(working_dir, process, next_case, poll_interval)
+                yield case.number, self._read_single_case_results(working_dir, case)
+        finally:
+            # the consumer may stop early
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            writer.join()
+
+    def _unique_cases(self):
+        if _is_case_table(self.cases):
+            return self.cases.unique(self.deduplication_tolerance)
+        return unique_cases(self.cases, self.deduplication_tolerance)
+
+    def _unique_session(self, unique):
+        logger.info(f"Running {len(unique)} unique of {len(self.cases)} cases")
+        session = self._partition_session(unique)
+        session.deduplicate = False
+        # the unique cases run instead of this session's cases
+        session._profiler = self._profiler
+        return session
+
+    def _iter_stdout_case_results(
+        self, working_dir, process, cases, stdout_lines=None
+    ):
+        # the output files of a case are written after its totals are
+        # printed, so the case is complete once the next case is executed
+        # or AVL has finished
+        pending = None
+        executions = self._iter_stdout_executions(process, stdout_lines)
+        for case, execution in match_executions(
+            executions, self._execution_cases(cases)
+        ):
+            if pending is not None:
+                yield pending[0].number, self._read_single_case_results(
+                    working_dir, *pending
+                )
+                pending = None
+            if self._file_outputs:
+                pending = case, execution
+            else:
+                yield case.number, self._read_single_case_results(
+                    working_dir, case, execution
+                )
+        if pending is not None:
+            yield pending[0].number, self._read_single_case_results(
+                working_dir, *pending
+            )
+
+    def _iter_stdout_executions(self, process, stdout_lines=None):
+        reader = StdoutReader()
+        stdout = io.BufferedReader(process.stdout)
+        for line in iter(stdout.readline, b""):
+            line = line.decode(errors="replace")
+            if stdout_lines is not None:
+                stdout_lines.append(line)
+            if self.config["show_stdout"]:
+                sys.stdout.write(line)
+            execution = reader.feed(line)
+            if execution is not None:
+                yield execution
+
+    def _wait_for_case(self, working_dir, process, next_case, poll_interval):
+        # output files are written in order, a case is complete once the
+        # first output file of the next case is opened or AVL has finished
+        if next_case is None or not self._file_outputs:
+            next_file = None
+        else:
+            ext = next(iter(self._file_outputs.values()))
+            next_file = os.path.join(
+                working_dir, self._get_output_filename(next_case, ext)
+            )
+        while process.poll() is None:
+            if next_file is not None and os.path.exists(next_file):
+                break
+            time.sleep(poll_interval)
+
+    def _get_jobs(self, analysis, partition_size=None, remote=False):
+        from avlwrapper.executors import ModelPayload, SessionJob, compact_cases
+
+        # the model and configuration are serialised once for all jobs
+        model = ModelPayload.from_session(self, remote)
+        # workers on other hosts use their own configuration
+        config = None if remote else self.config.snapshot()
+        staging_dir = None
+        if self._workspace is not None and not remote:
+            staging_dir = os.path.dirname(self._workspace.path)
+        retention = None
+        if self._archiver is not None:
+            retention = {
+                "directory": self._archiver.directory,
+                "compression": self._archiver.compression,
+            }
+        profiling = None
+        if self._profiler is not None:
+            profiling = {
+                "memory": self._profiler.memory,
+                "cprofile": self._profiler.cprofile,
+                "report_dir": self._profiler.report_dir,
+            }
+        partition_size = partition_size or self.CASES_PER_FILE
+        for indices in self._cost_partitions(analysis, 1, partition_size):
+            job = SessionJob(
+                model=model,
+                cases=compact_cases(self._select_cases(indices)),
+                name=self.name,
+                analysis=analysis,
+                airfoil_staging=self.airfoil_staging,
+                typed_results=self._result_schemas is not None,
+                stdout_results=self.stdout_results,
+                mass_states=self.mass_states,
+                config=config,
+                staged=self._workspace is not None,
+                staging_dir=staging_dir,
+                deduplicate=self.deduplicate,
+                retention=retention,
+                profiling=profiling,
+            )
+            yield indices, job
+
+    def _run_jobs(self, executor, analysis, partition_size=None):
+        # yields the case indices and the results of each partition, the
+        # most expensive partitions are submitted first
+        from avlwrapper.executors import run_timed_session_job
+
+        if not self.cases:
+            raise InputError("Running cases with an executor requires cases")
+
+        jobs = list(self._get_jobs(analysis, partition_size, executor.remote))
+        futures = [executor.submit(run_timed_session_job, job) for _, job in jobs]
+        priors = self._cost_priors()
+        for (indices, _), future in zip(jobs, futures):
+            results, seconds = future.result()
+            # the cost models learn from the run time of every partition
+            self._record_partition(analysis, indices, priors, seconds)
+            yield indices, results
+
+    def _record_partition(self, analysis, indices, priors, seconds):
+        cases = self._select_cases(indices)
+        self.cost_model.record(
+            cases, seconds, analysis, priors=[priors[idx] for idx in indices]
+        )
+        if analysis == "cases":
+            self.runtime_model.record(panel_count(self.geometry), cases, seconds)
+
+    def estimate(self):
+        """Pre-flight estimate of the discretisation, run time and memory of
+        running all cases by one AVL process, without running AVL. Problems
+        are the exceeded AVL limits and run budgets of the [limits]
+        configuration section.
+
+        :rtype: avlwrapper.preflight.RunEstimate
+        """
+        panels = panel_count(self.geometry)
+        cases = list(self.cases)
+        seconds = self.runtime_model.run_seconds(panels, cases)
+        memory = self.runtime_model.memory(panels)
+        return RunEstimate(
+            panels=panels,
+            seconds=seconds,
+            case_seconds=[
+                self.runtime_model.case_seconds(panels, case) for case in cases
+            ],
+            memory=memory,
+            problems=self._preflight_problems(panels, seconds, memory),
+        )
+
+    def _preflight_problems(self, panels, seconds, memory):
+        limits = self.config.settings.get("limits", dict())
+        problems = panels.exceeded(
+            {key: limits.get(key, limit) for key, limit in AVL_LIMITS.items()}
+        )
+        max_seconds = limits.get("run_time")
+        if seconds is not None and max_seconds is not None and seconds > max_seconds:
+            problems.append(
+                f"Estimated run time of {seconds:.1f} s exceeds "
+                f"the budget of {max_seconds:.1f} s"
+            )
+        max_memory = limits.get("memory")
+        if max_memory is not None and memory > max_memory * 1e6:
+            problems.append(
+                f"Estimated memory of {memory / 1e6:.0f} MB exceeds "
+                f"the budget of {max_memory:.0f} MB"
+            )
+        return problems
+
+    def _preflight(self):
+        limits = self.config.settings.get("limits", dict())
+        mode = limits.get("preflight", "warn")
+        if mode == "off":
+            return
+
+        panels = panel_count(self.geometry)
+        # the run time is only estimated when there is a budget
+        seconds = None
+        if limits.get("run_time") is not None:
+            seconds = self.runtime_model.run_seconds(panels, list(self.cases))
+        memory = self.runtime_model.memory(panels)
+        problems = self._preflight_problems(panels, seconds, memory)
+        if problems and mode == "refuse":
+            raise InputError("Pre-flight check failed: " + "; ".join(problems))
+        for problem in problems:
+            logger.warning(f"Pre-flight check: {problem}")
+
+    def _cost_priors(self):
+        # cases without timing history are estimated from the discretisation
+        panels = panel_count(self.geometry)
+        return [self.runtime_model.case_seconds(panels, case) for case in self.cases]
+
+    def _case_costs(self, analysis):
+        return [
+            self.cost_model.case_cost(case, analysis, prior)
+            for case, prior in zip(self.cases, self._cost_priors())
+        ]
+
+    def _cost_partitions(self, analysis, n_partitions, max_size):
+        costs = self._case_costs(analysis)
+        return balanced_partitions(costs, n_partitions, max_size)
+
+    def _select_cases(self, indices):
+        if _is_case_table(self.cases):
+            return self.cases[indices]
+        return [self.cases[idx] for idx in indices]
+
     @property
     def _run_mode_analysis_cmds(self):
         cmds = self._load_files_cmds
@@ -200,6 +868,114 @@ class Session:
             pre_fn=self._write_analysis_files,
             post_fn=self._read_mode_results)
 
+    def _get_all_modes_cmds(self, cases):
+        cmds = self._load_files_cmds
+        cmds += self._hide_plot_cmds
+
+        def case_cmds(case, local_number):
+            # select run case and write its eigenmode results to separate files
+            cmds = f"{local_number}\nn\n"
+            cmds += f"s\n{self._get_output_filename(case, 'sys')}\n"
+            cmds += f"w\n{self._get_output_filename(case, 'eig')}\n"
+            return cmds
+
+        cmds += self._chunked_cases_cmds(cases, "mode", case_cmds)
+        cmds += "\nquit\n"
+        return cmds
+
+    def _read_all_mode_results(self, target_dir):
+        results = []
+        for case in self.cases:
+            case_results = dict()
+            for name, ext in self.MODE_OUTPUTS.items():
+                file_name = self._get_output_filename(case, ext)
+                file_path = os.path.join(target_dir, file_name)
+                case_results[name] = self._read_output(file_path)
+            results.append(case_results)
+        return results
+
+    def _partition_session(self, cases):
+        session = Session(
+            geometry=self.geometry,
+            cases=copy.deepcopy(cases),
+            mass_dist=self.mass_dist,
+            name=self.name,
+            config=self.config,
+            airfoil_staging=self.airfoil_staging,
+            staged=False,
+            stdout_results=self.stdout_results,
+            deduplicate=self.deduplicate,
+            mass_states=self.mass_states,
+            # partitions run in parallel threads, which cannot share a profiler
+            profile=False,
+        )
+        session._airfoil_files = self.airfoil_files
+        session._result_schemas = self._result_schemas
+        session.cost_model = self.cost_model
+        session.runtime_model = self.runtime_model
+        session._workspace = self._workspace
+        session._archiver = self._archiver
+        return session
+
+    def _run_mode_partition(self):
+        start = time.perf_counter()
+        results = self.run_avl(
+            cmds=self._get_all_modes_cmds(self.cases),
+            pre_fn=self._write_analysis_files,
+            post_fn=self._read_all_mode_results,
+        )
+        self.cost_model.record(
+            self.cases,
+            time.perf_counter() - start,
+            "modes",
+            priors=self._cost_priors(),
+        )
+        return results
+
+    def run_all_mode_analyses(self, max_workers=None, executor=None):
+        """Eigenmode analysis of all cases. Cases are partitioned with
+        balanced estimated costs (see `Session.cost_model`), at most 25 per
+        partition, and partitions are run in parallel. Idle workers take
+        partitions queued for other workers.
+
+        Requires NumPy.
+
+        :param Optional[int] max_workers: maximum number of parallel
+            AVL processes, defaults to the number of processors
+        :param Optional[avlwrapper.Executor] executor: (optional) executor
+            to run the partitions with instead of local threads
+        :rtype: avlwrapper.dynamics.ModeResults
+        """
+        from avlwrapper.dynamics import stack_mode_results
+
+        if not self.cases:
+            raise InputError("Mode analysis of all cases requires cases")
+        self._preflight()
+
+        mode_results = [None] * len(self.cases)
+        if executor is not None:
+            for indices, results in self._run_jobs(executor, "modes"):
+                for idx, result in zip(indices, results):
+                    mode_results[idx] = result
+            return stack_mode_results(self.cases, mode_results)
+
+        pool = WorkStealingPool(max_workers)
+        # more partitions than workers, for idle workers to take over
+        partitions = self._cost_partitions(
+            "modes", 2 * pool.max_workers, self.CASES_PER_FILE
+        )
+        sessions = [
+            self._partition_session(self._select_cases(indices))
+            for indices in partitions
+        ]
+        costs = [sum(session._case_costs("modes")) for session in sessions]
+        partition_results = pool.map(Session._run_mode_partition, sessions, costs)
+        for indices, results in zip(partitions, partition_results):
+            for idx, result in zip(indices, results):
+                mode_results[idx] = result
+
+        return stack_mode_results(self.cases, mode_results)
+
     def _get_avl_bin(self):
         # guard for avl not being present on the system.
         # this used to be check at config read, but this allows
@@ -211,9 +987,14 @@ class Session:
         else:
             return self.config["avl_bin"]
 
-    def _get_avl_process(self, working_dir):
+    def _get_avl_process(self, working_dir, capture_stdout=False):
         stdin = subprocess.PIPE
-        stdout = open(os.devnull, "w") if not self.config["show_stdout"] else None
+        if capture_stdout:
+            stdout = subprocess.PIPE
+        elif not self.config["show_stdout"]:
+            stdout = open(os.devnull, "w")
+        else:
+            stdout = None
 
         # Buffer size = 0 required for direct stdin/stdout access
         return subprocess.Popen(
@@ -227,12 +1008,51 @@ class Session:
     def _read_case_results(self, target_dir):
         results = dict()
         for case in self.cases:
-            results[case.number] = {"Name": case.name}
-            for output, ext in self.requested_output.items():
-                file_name = self._get_output_filename(case, ext)
-                file_path = os.path.join(target_dir, file_name)
-                reader = OutputReader(file_path=file_path)
-                results[case.number][output] = reader.get_content()
+            results[case.number] = self._read_single_case_results(target_dir, case)
+        return results
+
+    def _read_stdout_case_results(self, target_dir, stdout):
+        start = time.perf_counter()
+        executions = StdoutReader().read(stdout)
+        if self._profiler is not None:
+            self._profiler.record_parse(
+                StdoutReader.__name__,
+                time.perf_counter() - start,
+                stdout.count("\n"),
+            )
+
+        results = dict()
+        for case, execution in match_executions(
+            executions, self._execution_cases(self.cases)
+        ):
+            results[case.number] = self._read_single_case_results(
+                target_dir, case, execution
+            )
+        return results
+
+    def _execution_cases(self, cases):
+        # cases as identified in the standard output, see match_executions
+        return [(case, self._get_local_number(case), case.name) for case in cases]
+
+    def _read_single_case_results(self, target_dir, case, execution=None):
+        """Reads the results of a case
+
+        :param str target_dir: working directory
+        :param case: run case
+        :param Optional[dict] execution: (optional) totals and convergence
+            diagnostics of the case parsed from the standard output
+        """
+        results = {"Name": case.name}
+        if execution is not None:
+            totals = execution["Totals"]
+            if self._result_schemas is not None:
+                totals = self._result_schemas.record(totals)
+            results["Totals"] = totals
+            results["Convergence"] = execution["Convergence"]
+        for output, ext in self._file_outputs.items():
+            file_name = self._get_output_filename(case, ext)
+            file_path = os.path.join(target_dir, file_name)
+            results[output] = self._read_output(file_path, self._result_schemas)
         return results
 
     def _get_output_filename(self, case, ext):
@@ -245,19 +1065,22 @@ class Session:
         results = dict()
         for name, ext in self.MODE_OUTPUTS.items():
             file_path = os.path.join(target_dir, f"{self.name}.{ext}")
-            results[name] = OutputReader(file_path=file_path).get_content()
+            results[name] = self._read_output(file_path)
         return results
 
     def show_geometry(self):
-        with TemporaryDirectory(prefix="avl_") as working_dir:
-            self._write_geometry(working_dir)
+        with self._run_context() as working_dir:
+            self._write_geometry_files(working_dir)
             cmds = self._show_geometry_cmds
             avl = self._get_avl_process(working_dir)
             run_with_close_window(avl, cmds)
 
-    def _get_plot(self, target_dir, plot_name, file_format, resolution):
+    def _get_plot(
+        self, target_dir, plot_name, file_format, resolution, output_dir=None
+    ):
         in_file = os.path.join(target_dir, "plot.ps")
-        out_file = os.path.join(os.getcwd(), plot_name + ".{}".format(file_format))
+        output_dir = output_dir or os.getcwd()
+        out_file = os.path.join(output_dir, plot_name + ".{}".format(file_format))
         if file_format == "ps":
             shutil.copyfile(src=in_file, dst=out_file)
             return [out_file]
@@ -266,23 +1089,15 @@ class Session:
                 "Ghostscript should be installed"
                 " and enabled in the configuration file"
             )
-        gs = self.config.settings["gs_bin"]
-        gs_devices = {"pdf": "pdfwrite", "png": "pngalpha", "jpeg": "jpeg"}
-        cmd = [
-            gs,
-            "-dBATCH",
-            "-dNOPAUSE",
-            "-r{}".format(resolution),
-            "-q",
-            "-sDEVICE={}".format(gs_devices[file_format]),
-            '-sOutputFile="{}"'.format(out_file),
-            in_file,
-        ]
-        subprocess.call(cmd)
-        if "%d" in out_file:
-            return glob.glob(out_file.replace("%d", "*"))
-        else:
-            return [out_file]
+        convert_plot(self.config.settings["gs_bin"], in_file, out_file, resolution)
+        return plot_files(out_file)
+
+    @property
+    def _geometry_plot_cmds(self):
+        cmds = self._hide_plot_cmds
+        cmds += self._show_geometry_cmds
+        cmds += "h\n\n\nquit\n"
+        return cmds
 
     def save_geometry_plot(self, file_format="ps", resolution=300):
         """Save the geometry plot to a file.
@@ -291,12 +1106,9 @@ class Session:
         :param int resolution: Resolution (dpi) of output file
         """
         plot_name = self.name + "-geometry"
-        cmds = self._hide_plot_cmds
-        cmds += self._show_geometry_cmds
-        cmds += "h\n\n\nquit\n"
         return self.run_avl(
-            cmds=cmds,
-            pre_fn=self._write_geometry,
+            cmds=self._geometry_plot_cmds,
+            pre_fn=self._write_geometry_files,
             post_fn=lambda d: self._get_plot(d, plot_name, file_format, resolution),
         )
 
@@ -306,15 +1118,19 @@ class Session:
 
     @property
     def _show_geometry_cmds(self):
-        cmds = "load {0}\n".format(self.model_file)
+        cmds = "load {0}\n".format(self._input_path(self.model_file))
         cmds += "oper\ng\n"
         return cmds
 
     def show_trefftz_plot(self, case_number):
-        with TemporaryDirectory(prefix="avl_") as working_dir:
+        with self._run_context() as working_dir:
             self._write_analysis_files(working_dir)
             cmds = self._load_files_cmds
-            cmds += self._show_trefftz_case_cmds(case_number)
+            case = self.cases[case_number - 1]
+            chunk_idx = self._get_chunk_index(case)
+            if chunk_idx > 0:
+                cmds += self._load_case_file_cmds(chunk_idx)
+            cmds += self._show_trefftz_case_cmds(self._get_local_number(case))
             avl = self._get_avl_process(working_dir)
             run_with_close_window(avl, cmds)
 
@@ -325,21 +1141,29 @@ class Session:
         :param int resolution: Resolution (dpi) of output file
         """
         plot_name = self.name + "-trefftz-%d"
+        return self.run_avl(
+            cmds=self._trefftz_plots_cmds,
+            pre_fn=self._write_analysis_files,
+            post_fn=lambda d: self._get_plot(d, plot_name, file_format, resolution),
+        )
+
+    @property
+    def _trefftz_plots_cmds(self):
+        # the plots of all cases are pages of the same PostScript file
         cmds = self._hide_plot_cmds
         cmds += self._load_files_cmds
         if self.cases:
-            for idx in range(1, len(self.cases) + 1):
-                cmds += self._show_trefftz_case_cmds(idx)
+            for case in self.cases:
+                chunk_idx = self._get_chunk_index(case)
+                local_number = self._get_local_number(case)
+                if chunk_idx > 0 and local_number == 1:
+                    cmds += self._load_case_file_cmds(chunk_idx)
+                cmds += self._show_trefftz_case_cmds(local_number)
                 cmds += "h\n\n"
         else:
             cmds += "oper\nx\nt\nh\n\n"
         cmds += "\n\nquit\n"
-
-        return self.run_avl(
-            cmds=cmds,
-            pre_fn=self._write_analysis_files,
-            post_fn=lambda d: self._get_plot(d, plot_name, file_format, resolution),
-        )
+        return cmds
 
     @staticmethod
     def _show_trefftz_case_cmds(case_number):
@@ -353,10 +1177,116 @@ class Session:
             path = os.path.join(os.getcwd(), self.name)
         if not os.path.exists(path):
             os.mkdir(path)
-        self._write_analysis_files(path)
+        # exported files are self-contained, also for staged sessions
+        workspace, self._workspace = self._workspace, None
+        try:
+            self._write_input_files(path, export=True)
+            if self.cases:
+                self._write_cases(path)
+        finally:
+            self._workspace = workspace
         logger.info("Input files written to: {}".format(path))
 
 
+def convert_plot(gs_bin, in_file, out_file, resolution):
+    """Converts a PostScript plot with Ghostscript, the output format is
+    determined by the extension. Output file names containing "%d" get a
+    file per page.
+
+    :param str gs_bin: Ghostscript executable
+    :param str in_file: PostScript file
+    :param str out_file: output file
+    :param int resolution: resolution (dpi)
+    """
+    gs_devices = {".pdf": "pdfwrite", ".png": "pngalpha", ".jpeg": "jpeg"}
+    _, extension = os.path.splitext(out_file)
+    cmd = [
+        gs_bin,
+        "-dBATCH",
+        "-dNOPAUSE",
+        "-r{}".format(resolution),
+        "-q",
+        "-sDEVICE={}".format(gs_devices[extension]),
+        '-sOutputFile="{}"'.format(out_file),
+        in_file,
+    ]
+    subprocess.call(cmd)
+
+
+def plot_files(out_file):
+    """Files written for an output file name, in page order
+
+    :param str out_file: output file, "%d" is replaced by the page number
+    :rtype: List[str]
+    """
+    if "%d" not in out_file:
+        return [out_file]
+    prefix, suffix = out_file.split("%d", 1)
+
+    def page(path):
+        number = path[len(prefix) : len(path) - len(suffix)]
+        return int(number) if number.isdigit() else 0
+
+    return sorted(glob.glob(glob.escape(prefix) + "*" + glob.escape(suffix)), key=page)
+
+
+def _write_stdin(process, cmds):
+    try:
+        process.stdin.write(cmds.encode())
+        process.stdin.close()
+    except (BrokenPipeError, OSError):
+        # AVL stopped before reading all commands
+        pass
+
+
+def _duplicate_results(results, case):
+    # every duplicate gets its own copy of the results of its unique case,
+    # result records keep sharing their schemas
+    results = copy.deepcopy(results)
+    results["Name"] = case.name
+    return results
+
+
+def _is_case_table(cases):
+    # CaseTable requires NumPy, only check if its module has been imported
+    module = sys.modules.get("avlwrapper.cases")
+    return module is not None and isinstance(cases, module.CaseTable)
+
+
+class _StagedWorkspace:
+    """Persistent directory holding the input files of a session. Input
+    files are (re)written only when their content changes; every run uses
+    its own sub-directory for the case and output files."""
+
+    def __init__(self, staging_dir=None):
+        self._directory = TemporaryDirectory(prefix="avl_stage_", dir=staging_dir)
+        self._fingerprint = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self._directory.name
+
+    def stage(self, session):
+        geometry_str = session._get_geometry_str()
+        digest = hashlib.sha1(geometry_str.encode())
+        digest.update(str(session.mass_dist).encode())
+        for entry in session.airfoil_files.values():
+            digest.update(entry.digest.encode())
+        fingerprint = (session.name, session.airfoil_staging, digest.hexdigest())
+
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                session._write_input_files(self.path, geometry_str)
+                self._fingerprint = fingerprint
+
+    def run_dir(self):
+        return TemporaryDirectory(prefix="run_", dir=self.path)
+
+    def cleanup(self):
+        self._directory.cleanup()
+
+
 class _CloseWindow(tk.Frame):
     def __init__(self, on_open=None, on_close=None, master=None):
         # On Python 2, tk.Frame is an old-style class
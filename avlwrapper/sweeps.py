@@ -0,0 +1,193 @@
+""" Adaptive parameter sweeps
+"""
+import copy
+from itertools import product
+import math
+
+from avlwrapper import logger
+
+
+class AdaptiveSweep:
+    """Parameter sweep which starts from a coarse grid and refines where
+    the selected outputs change most between neighbouring points.
+
+    Neighbouring points are consecutive points along a parameter axis,
+    with the other parameters equal. Every round, the intervals whose
+    output change exceeds the tolerance are bisected, most significant
+    first, and all new points are run as one batch of cases. Cases which
+    did not converge (see `Session(stdout_results=True)`) count as missing
+    outputs, intervals between a converged and a non-converged point are
+    always refined.
+
+    Example:
+    ```
+    sweep = AdaptiveSweep(session=session,
+                          base_case=cruise_case,
+                          parameters=[{'name': 'alpha',
+                                       'values': [-5, 0, 5, 10, 15]},
+                                      {'name': 'elevator',
+                                       'values': [-10, 0, 10]}],
+                          outputs={'CLtot': 0.02, 'Cmtot': 0.01},
+                          max_cases=200)
+    results = sweep.run()
+    ```
+    """
+
+    def __init__(
+        self,
+        session,
+        base_case,
+        parameters,
+        outputs,
+        max_cases=None,
+        max_rounds=8,
+        min_step=None,
+        executor=None,
+        partition_size=None,
+    ):
+        """
+        :param avlwrapper.Session session: session providing the geometry,
+            mass distribution and configuration, its cases are not used
+        :param avlwrapper.Case base_case: base Case object
+        :param typing.Sequence parameters: list of a dict with keys: name and
+            values, the values define the coarse grid
+            (as in `create_sweep_cases`)
+        :param dict outputs: tolerance by output. An output is a key of the
+            totals or a function returning a value from the results of a case
+        :param Optional[int] max_cases: (optional) maximum number of cases
+        :param int max_rounds: maximum number of refinement rounds
+        :param Optional[dict] min_step: (optional) smallest interval to
+            refine, by parameter name
+        :param Optional[avlwrapper.Executor] executor: (optional) executor
+            to run each round with (see `Session.run_all_cases`)
+        :param Optional[int] partition_size: (optional) number of cases per
+            executor job
+        """
+        # ensure input is a list if a dict (only one parameter) is given
+        if isinstance(parameters, dict):
+            parameters = [parameters]
+
+        self.session = session
+        self.base_case = base_case
+        self.names = [p["name"] for p in parameters]
+        self.grid = [sorted(p["values"]) for p in parameters]
+        self.outputs = dict(outputs)
+        self.max_cases = max_cases
+        self.max_rounds = max_rounds
+        self.min_step = min_step or dict()
+        self.executor = executor
+        self.partition_size = partition_size
+
+        self.results = dict()
+        self.rounds = []
+        self.converged = False
+        self._values = dict()
+
+    def run(self):
+        """Runs the coarse grid and the refinement rounds
+
+        :returns: results by parameter values, sorted
+        :rtype: Dict[tuple, dict]
+        """
+        points = list(product(*self.grid))
+        if self.max_cases is not None and len(points) > self.max_cases:
+            raise ValueError(
+                f"The coarse grid ({len(points)} cases) exceeds max_cases"
+            )
+        self._run_points(points)
+
+        for _ in range(self.max_rounds):
+            points = self._refinement_points()
+            if not points:
+                self.converged = True
+                break
+            if self.max_cases is not None:
+                points = points[: self.max_cases - len(self.results)]
+                if not points:
+                    break
+            self._run_points(points)
+        else:
+            self.converged = not self._refinement_points()
+
+        if not self.converged:
+            logger.info("Adaptive sweep stopped before reaching the tolerance")
+        return dict(sorted(self.results.items()))
+
+    def _run_points(self, points):
+        # case names are numbered across all rounds
+        offset = len(self.results)
+        cases = [
+            self._create_case(point, offset + idx) for idx, point in enumerate(points)
+        ]
+        for point, results in zip(points, self._run_cases(cases)):
+            self.results[point] = results
+            self._values[point] = self._output_values(results)
+        self.rounds.append(len(points))
+
+    def _create_case(self, point, number):
+        case = copy.deepcopy(self.base_case)
+        case.name = "{}-{}".format(self.base_case.name, number)
+        case.update(**dict(zip(self.names, point)))
+        return case
+
+    def _run_cases(self, cases):
+        session = self.session._partition_session(cases)
+        results = session.run_all_cases(
+            executor=self.executor, partition_size=self.partition_size
+        )
+        return [results[case.number] for case in session.cases]
+
+    def _output_values(self, results):
+        convergence = results.get("Convergence")
+        if convergence is not None and not convergence["converged"]:
+            return [math.nan] * len(self.outputs)
+
+        values = []
+        for output in self.outputs:
+            if callable(output):
+                values.append(output(results))
+            else:
+                values.append(results["Totals"][output])
+        return values
+
+    def _intervals(self):
+        # consecutive points along every parameter axis
+        for axis in range(len(self.names)):
+            lines = dict()
+            for point in self._values:
+                key = point[:axis] + point[axis + 1 :]
+                lines.setdefault(key, []).append(point)
+            for line in lines.values():
+                line.sort(key=lambda p: p[axis])
+                for lower, upper in zip(line, line[1:]):
+                    yield axis, lower, upper
+
+    def _interval_change(self, lower, upper):
+        # largest output change relative to its tolerance
+        change = 0.0
+        values = zip(self._values[lower], self._values[upper], self.outputs.values())
+        for lower_value, upper_value, tolerance in values:
+            lower_nan, upper_nan = math.isnan(lower_value), math.isnan(upper_value)
+            if lower_nan and upper_nan:
+                continue
+            if lower_nan or upper_nan:
+                return math.inf
+            change = max(change, abs(upper_value - lower_value) / tolerance)
+        return change
+
+    def _refinement_points(self):
+        candidates = []
+        for axis, lower, upper in self._intervals():
+            step = upper[axis] - lower[axis]
+            if step <= self.min_step.get(self.names[axis], 0.0):
+                continue
+            change = self._interval_change(lower, upper)
+            if change > 1.0:
+                midpoint = list(lower)
+                midpoint[axis] = 0.5 * (lower[axis] + upper[axis])
+                candidates.append((change, tuple(midpoint)))
+
+        # most significant intervals first
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        points = dict.fromkeys(point for _, point in candidates)
+        return [point for point in points if point not in self._values]
@@ -52,6 +52,50 @@ def partitioned_cases(cases, n_cases=25):
         yield cases[idx : idx + n_cases]
 
 
+def case_key(case, tolerance=1e-6):
+    """Canonical key of the operating point of a case. Parameters
+    (with their constraint settings) and states are included, the case name
+    and number are not. Values are quantised to the tolerance.
+
+    :param avlwrapper.Case case: AVL case
+    :param float tolerance: absolute tolerance of the values
+    :rtype: tuple
+    """
+
+    def quantise(value):
+        if value is None or not tolerance:
+            return value
+        return round(value / tolerance)
+
+    parameters = tuple(
+        (key, param.setting, quantise(param.value))
+        for key, param in sorted(case.parameters.items())
+    )
+    states = tuple(
+        (key, quantise(state.value)) for key, state in sorted(case.states.items())
+    )
+    return parameters, states
+
+
+def unique_cases(cases, tolerance=1e-6):
+    """Finds the unique operating points of cases
+
+    :param typing.Sequence cases: list of AVL cases
+    :param float tolerance: absolute tolerance of the values
+    :returns: list of the first case of every unique operating point and
+        the index of the unique case of every case
+    :rtype: Tuple[List[avlwrapper.Case], List[int]]
+    """
+    unique, inverse, indices = [], [], dict()
+    for case in cases:
+        key = case_key(case, tolerance)
+        if key not in indices:
+            indices[key] = len(unique)
+            unique.append(case)
+        inverse.append(indices[key])
+    return unique, inverse
+
+
 def show_image(image_path, rotate=True):
     import numpy as np
     import matplotlib.image as mpimg
@@ -10,6 +10,9 @@ current_dir = os.path.abspath(os.path.dirname(__file__))
 # dependencies; currently none
 dependencies = []
 
+# optional dependencies for array-based post-processing
+extra_dependencies = {"numpy": ["numpy"]}
+
 # include files
 include_files = ['*.cfg']
 
@@ -40,6 +43,7 @@ setup(
     ],
     packages=find_packages(),
     install_requires=dependencies,
+    extras_require=extra_dependencies,
     include_package_data=True,
     package_data={
         '': include_files
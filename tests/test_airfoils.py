@@ -0,0 +1,89 @@
+import os.path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+import avlwrapper as avl
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+AVL_FILE = os.path.join(RES_DIR, "b737.avl")
+
+
+@pytest.fixture()
+def registry():
+    return avl.AirfoilRegistry()
+
+
+@pytest.fixture()
+def model():
+    return avl.Aircraft.from_file(AVL_FILE)
+
+
+def test_resolve_once(registry):
+    path = os.path.join(RES_DIR, "a1.dat")
+    entry = registry.resolve(path)
+    assert registry.resolve(path) is entry
+    assert len(entry.digest) == 40
+
+
+def test_geometry_files(registry, model):
+    files = registry.geometry_files(model)
+    assert list(files.keys()) == ["a1.dat"]
+
+
+def test_stage(registry, model):
+    with TemporaryDirectory() as target_dir:
+        for mode in ["link", "symlink", "copy"]:
+            mode_dir = os.path.join(target_dir, mode)
+            os.mkdir(mode_dir)
+            for filename, entry in registry.geometry_files(model).items():
+                registry.stage(filename, entry, mode_dir, mode=mode)
+            assert os.path.exists(os.path.join(mode_dir, "a1.dat"))
+
+
+def test_inline(registry, model):
+    inlined = registry.inline(model)
+    airfoil = inlined.surfaces[0].sections[0].airfoil
+    assert isinstance(airfoil, avl.DataAirfoil)
+    assert len(airfoil.x_data) == 281
+    assert airfoil.x_data[0] == pytest.approx(1.000009, 1e-6)
+    # original geometry is untouched
+    assert isinstance(model.surfaces[0].sections[0].airfoil, avl.FileAirfoil)
+
+
+def test_staged_workspace(model):
+    with avl.Session(geometry=model, staged=True) as session:
+        workspace = session._workspace
+        session._workspace.stage(session)
+        staged_file = os.path.join(workspace.path, session.model_file)
+        mtime = os.stat(staged_file).st_mtime_ns
+        with open(staged_file) as fp:
+            assert os.path.join(os.pardir, "a1.dat") in fp.read()
+        assert os.path.exists(os.path.join(workspace.path, "a1.dat"))
+
+        # unchanged inputs are not rewritten
+        with session._run_context() as run_dir:
+            assert os.path.dirname(run_dir) == workspace.path
+        assert os.stat(staged_file).st_mtime_ns == mtime
+    assert not os.path.exists(workspace.path)
+
+
+def test_export_copies_airfoils(model):
+    source = os.path.join(RES_DIR, "a1.dat")
+    with open(source) as fp:
+        content = fp.read()
+    with TemporaryDirectory() as export_dir:
+        session = avl.Session(geometry=model, airfoil_staging="link")
+        session.export_run_files(export_dir)
+        exported = os.path.join(export_dir, "a1.dat")
+        # an independent copy, not a link to the source file
+        assert not os.path.islink(exported)
+        assert not os.path.samefile(exported, source)
+
+        # an earlier export is replaced
+        with open(exported, "w") as fp:
+            fp.write("stale\n")
+        session.export_run_files(export_dir)
+        with open(exported) as fp:
+            assert fp.read() == content
@@ -0,0 +1,73 @@
+import copy
+import os.path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+import avlwrapper as avl
+
+np = pytest.importorskip("numpy")
+from avlwrapper.archive import ArchiveWriter, ResultArchive, write_archive
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+@pytest.fixture(scope="module")
+def case_results():
+    results = {
+        "ElementForces": avl.OutputReader(
+            os.path.join(RES_DIR, "b737.fe")
+        ).get_content(),
+        "StripForces": avl.OutputReader(os.path.join(RES_DIR, "b737.fs")).get_content(),
+    }
+    # second case with scaled values
+    scaled = copy.deepcopy(results)
+    for strips in scaled["ElementForces"].values():
+        for columns in strips.values():
+            columns["dCp"] = [2.0 * v for v in columns["dCp"]]
+    return {1: results, 2: scaled}
+
+
+def test_archive(case_results):
+    elements = case_results[1]["ElementForces"]
+    strips = case_results[1]["StripForces"]
+    with TemporaryDirectory() as archive_dir:
+        write_archive(archive_dir, case_results)
+        archive = ResultArchive(archive_dir)
+        assert len(archive) == 2
+        assert archive.element_surfaces == list(elements)
+
+        strip_numbers = list(elements["Wing"])
+        assert archive.element_strips("Wing") == strip_numbers
+        strip = strip_numbers[2]
+        dcp = archive.elements("Wing", "dCp", strip=strip)
+        assert dcp.shape == (2, len(elements["Wing"][strip]["dCp"]))
+        np.testing.assert_allclose(dcp[0], elements["Wing"][strip]["dCp"])
+        np.testing.assert_allclose(dcp[1], 2.0 * dcp[0])
+
+        # single case, whole surface
+        x = archive.elements("Wing", "X", cases=1)
+        assert isinstance(x.base, np.memmap) or isinstance(x, np.memmap)
+        assert x.shape == (sum(len(s["X"]) for s in elements["Wing"].values()),)
+
+        cl = archive.strips("Wing", "cl", cases=[0])
+        np.testing.assert_allclose(cl[0], strips["Wing"]["cl"])
+        assert archive.element_strip("Wing", strip, cases=0).keys() == set(
+            elements["Wing"][strip]
+        )
+        assert archive.case_rows([2]) == [1]
+        with pytest.raises(IndexError):
+            archive.strips("Wing", "cl", cases=2)
+
+
+def test_discretisation_mismatch(case_results):
+    changed = copy.deepcopy(case_results[1])
+    changed["StripForces"]["Wing"]["cl"].pop()
+    with TemporaryDirectory() as archive_dir:
+        with ArchiveWriter(archive_dir, n_cases=3) as writer:
+            writer.add(1, case_results[1])
+            with pytest.raises(ValueError, match="Wing"):
+                writer.add(2, changed)
+        # partially written archive
+        assert ResultArchive(archive_dir).case_numbers == [1]
@@ -113,3 +113,11 @@ def test_b737_session(model, run_case, mass_dist, manual_run):
         except KeyError:
             continue
         check_all_entries(all_results[res_key], manual_run[man_key])
+
+
+def test_b737_streamed_results(model, run_case, mass_dist):
+    session = avl.Session(geometry=model, cases=[run_case], mass_dist=mass_dist)
+    streamed = list(session.iter_case_results())
+    assert [number for number, _ in streamed] == [run_case.number]
+    case_results = session.run_all_cases()[run_case.number]
+    assert streamed[0][1] == case_results
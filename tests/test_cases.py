@@ -0,0 +1,106 @@
+import os.path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+import avlwrapper as avl
+
+np = pytest.importorskip("numpy")
+from avlwrapper.cases import CaseTable
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+@pytest.fixture()
+def base_case():
+    return avl.Case(
+        "cruise",
+        alpha=2.0,
+        elevator=avl.Parameter(name="elevator", value=0.0, setting="Cm"),
+        velocity=50.0,
+        X_cg=1.0,
+        Y_cg=0.0,
+        Z_cg=0.0,
+        mach=0.0,
+        cd_p=0.0,
+    )
+
+
+def test_matches_case_format(base_case):
+    table = CaseTable.from_cases([base_case])
+    assert str(table) == str(base_case)
+    assert str(table[0].to_case()) == str(base_case)
+
+
+def test_columns():
+    table = CaseTable(names="sweep", alpha=np.linspace(0, 10, 11), flap=5.0)
+    assert len(table) == 11
+    assert table.controls == ["flap"]
+    assert table["flap"].shape == (11,)
+    # run-case parameter and state with the same key are separate columns
+    assert table["alpha"][-1] == 10.0
+    assert table.states["alpha"][-1] == 0.0
+    assert np.isnan(table["X_cg"]).all()
+
+
+def test_settings():
+    table = CaseTable(names="trim", alpha=avl.Parameter("alpha", 0.5, "CL"))
+    assert table.setting("alpha") == "CL"
+    with pytest.raises(avl.model.InputError):
+        table.set_setting("alpha", "invalid")
+
+
+def test_read_run_file():
+    table = CaseTable.from_file(os.path.join(RES_DIR, "b737.run"))
+    assert len(table) == 1
+    assert table.setting("alpha") == "CL"
+    assert table["alpha"][0] == pytest.approx(0.544438)
+    assert table.states["X_cg"][0] == pytest.approx(65.2686)
+
+
+def test_round_trip(base_case):
+    table = CaseTable.sweep(
+        base_case,
+        [
+            {"name": "alpha", "values": np.linspace(0, 10, 20)},
+            {"name": "beta", "values": [-2.0, 0.0, 2.0]},
+        ],
+    )
+    table.set_setting("beta", ["beta", "Cn"] * 30)
+    assert len(table) == 60
+    assert table[59].name == "cruise-59"
+
+    run_str = str(table)
+    # uniform and per-line parsers give the same table
+    assert str(CaseTable.from_string(run_str)) == run_str
+    assert str(CaseTable._from_string_lines(run_str.splitlines())) == run_str
+
+    with TemporaryDirectory() as working_dir:
+        path = os.path.join(working_dir, "cases.run")
+        with open(path, "w") as fp:
+            table.write(fp)
+        cases = avl.Case.from_file(path)
+    assert cases[-1].parameters["beta"].setting == "Cn"
+    assert cases[-1].parameters["alpha"].value == pytest.approx(10.0)
+
+
+def test_session_cases():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    table = CaseTable(names="cruise", alpha=np.linspace(0, 4, 5))
+    session = avl.Session(geometry=geometry, cases=table)
+    assert [case.number for case in session.cases] == [1, 2, 3, 4, 5]
+    assert table["X_cg"][0] == geometry.reference_point[0]
+    assert session._get_output_filename(session.cases[4], "ft").endswith("-5.ft")
+
+
+def test_unique():
+    table = CaseTable(
+        names="sweep",
+        alpha=[0.0, 2.0, 0.0, 1e-9, 0.0],
+        elevator=[0.0, 0.0, 0.0, 0.0, 5.0],
+    )
+    table.set_setting("elevator", ["elevator", "elevator", "Cm", "elevator", "elevator"])
+    unique, inverse = table.unique()
+    assert list(unique.names) == ["sweep-0", "sweep-1", "sweep-2", "sweep-4"]
+    assert list(inverse) == [0, 1, 2, 0, 3]
@@ -0,0 +1,66 @@
+import os.path
+
+import pytest
+
+import avlwrapper as avl
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+class ModelConvergence(avl.MeshConvergence):
+    # outputs converging with the square of the element size
+    def _run_session(self, session):
+        size = avl.panel_count(session.geometry).vortices ** -0.5
+        results = []
+        for case in session.cases:
+            alpha = case.parameters["alpha"].value
+            totals = {
+                "CLtot": 0.1 * alpha + 50.0 * size**2,
+                "CDind": 0.01 - 2.0 * size**2,
+            }
+            results.append({"Name": case.name, "Totals": totals})
+        return results
+
+
+def get_session():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = [avl.Case("cruise", alpha=1.0), avl.Case("climb", alpha=5.0)]
+    return avl.Session(geometry=geometry, cases=cases)
+
+
+def test_refined_geometry():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    refined = avl.refined_geometry(geometry, 2.0)
+    wing, refined_wing = geometry.surfaces[0], refined.surfaces[0]
+    assert refined_wing.n_chordwise == 2 * wing.n_chordwise
+    assert refined_wing.n_spanwise == 2 * wing.n_spanwise
+    assert refined.surfaces[1].sections[1].n_spanwise == 2
+    assert refined_wing.chord_spacing == wing.chord_spacing
+    coarse = avl.refined_geometry(geometry, 0.1)
+    assert min(surface.n_chordwise for surface in coarse.surfaces) == 1
+
+
+def test_mesh_convergence():
+    study = ModelConvergence(
+        session=get_session(),
+        outputs={"CLtot": 0.01, "CDind": 1e-3},
+        factors=(0.5, 0.7071, 1.0, 1.4142, 2.0),
+        max_workers=2,
+    )
+    level = study.run()
+    assert len(study.levels) == 5
+    assert study.orders["CLtot"][0] == pytest.approx(2.0, abs=0.05)
+    assert study.extrapolated["CLtot"][1] == pytest.approx(0.5, abs=1e-4)
+    assert study.extrapolated["CDind"][0] == pytest.approx(0.01, abs=1e-5)
+
+    # cheapest level within the tolerances
+    assert level.meets(study.outputs)
+    coarser = [lvl for lvl in study.levels if lvl.seconds < level.seconds]
+    assert coarser and not any(lvl.meets(study.outputs) for lvl in coarser)
+    assert level.errors["CLtot"][0] <= 0.01
+
+
+def test_mesh_convergence_too_strict():
+    study = ModelConvergence(session=get_session(), outputs={"CLtot": 1e-9})
+    assert study.run() is study.levels[-1]
@@ -0,0 +1,65 @@
+import pytest
+
+import avlwrapper as avl
+
+
+def test_sobol():
+    points = list(avl.Sobol(dimensions=21).points(64))
+    # first dimensions of the unscrambled sequence
+    assert points[1][:3] == (0.5, 0.5, 0.5)
+    assert points[2][:3] == (0.75, 0.25, 0.25)
+    assert points[3][:3] == (0.25, 0.75, 0.75)
+    # every dimension is stratified for powers of two
+    for dim in range(21):
+        assert sorted(p[dim] for p in points) == [i / 64 for i in range(64)]
+    with pytest.raises(ValueError):
+        avl.Sobol(dimensions=22)
+
+
+def test_halton():
+    points = list(avl.Halton(dimensions=2).points(4))
+    assert points == [(0.0, 0.0), (0.5, 1 / 3), (0.25, 2 / 3), (0.75, 1 / 9)]
+
+
+def test_latin_hypercube():
+    design = avl.LatinHypercube(dimensions=3, seed=3, block_size=10)
+    points = list(design.points(20))
+    for block in (points[:10], points[10:]):
+        for dim in range(3):
+            strata = sorted(int(p[dim] * 10) for p in block)
+            assert strata == list(range(10))
+
+
+@pytest.mark.parametrize(
+    "design",
+    [
+        avl.LatinHypercube(dimensions=2, seed=7),
+        avl.Halton(dimensions=2, seed=7),
+        avl.Sobol(dimensions=2, seed=7),
+    ],
+)
+def test_extended_design(design):
+    # an extended campaign reproduces the earlier points
+    points = list(design.points(60))
+    assert list(design.points(23)) + list(design.points(37, start=23)) == points
+    assert all(0.0 <= v < 1.0 for p in points for v in p)
+
+
+def test_doe_cases():
+    parameters = [
+        {"name": "alpha", "bounds": (-5.0, 15.0)},
+        {"name": "elevator", "bounds": (-20.0, 20.0)},
+    ]
+    base_case = avl.Case("cruise")
+    cases = avl.create_doe_cases(
+        base_case, parameters, avl.Sobol(dimensions=2), n_cases=4, start=2
+    )
+    cases = list(cases)
+    assert [case.name for case in cases] == [
+        "cruise-2",
+        "cruise-3",
+        "cruise-4",
+        "cruise-5",
+    ]
+    assert cases[0].parameters["alpha"].value == 10.0
+    assert cases[0].parameters["elevator"].value == -10.0
@@ -0,0 +1,223 @@
+import os.path
+
+import pytest
+
+import avlwrapper as avl
+
+np = pytest.importorskip("numpy")
+from avlwrapper import dynamics
+from avlwrapper.cases import CaseTable
+from avlwrapper.model import Inertia
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def get_output(file):
+    return avl.OutputReader(os.path.join(RES_DIR, file)).get_content()
+
+
+@pytest.fixture()
+def mode_results():
+    results = {
+        "SystemMatrix": get_output("b737.sys"),
+        "EigenValues": get_output("b737.eig"),
+    }
+    cases = [avl.Case("cruise", number=1), avl.Case("copy", number=2)]
+    return dynamics.stack_mode_results(cases, [results, results])
+
+
+def test_stacked_arrays(mode_results):
+    assert mode_results.A.shape == (2, 12, 12)
+    assert mode_results.B.shape == (2, 12, 5)
+    assert mode_results.controls[-1] == "rudder"
+    assert mode_results.A[1, 9, 11] == pytest.approx(249.8599, 1e-6)
+    assert mode_results.eigenvalues.dtype == complex
+    assert mode_results.eigenvalues[0, 0] == pytest.approx(-0.29018355 + 1.9011338j)
+
+
+def test_mode_labels(mode_results):
+    labels = list(mode_results.labels[0])
+    assert labels.count(dynamics.SHORT_PERIOD) == 2
+    assert labels.count(dynamics.PHUGOID) == 2
+    assert labels.count(dynamics.DUTCH_ROLL) == 2
+    assert labels.count(dynamics.ROLL) == 1
+    assert labels.count(dynamics.SPIRAL) == 1
+    phugoid = mode_results.modes(dynamics.PHUGOID)[0]
+    assert np.nanmax(np.abs(phugoid)) == pytest.approx(0.0518, 1e-2)
+
+
+@pytest.fixture()
+def b737():
+    model = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    case = avl.Case.from_file(os.path.join(RES_DIR, "b737.run"))[0]
+    mass_dist = avl.MassDistribution.from_file(os.path.join(RES_DIR, "b737.mass"))
+    flight = dynamics.FlightCondition.from_case(case, get_output("b737.ft"))
+    mass_props = dynamics.MassProperties.from_cases([case])
+    return model, flight, mass_props, mass_dist.length_scaling
+
+
+def avl_eigenvalues():
+    return np.array([complex(*v) for v in get_output("b737.eig")["1"]])
+
+
+def assert_close_eigenvalues(eigenvalues, reference, rel):
+    for ref in reference:
+        nearest = eigenvalues[np.argmin(np.abs(eigenvalues - ref))]
+        assert abs(nearest - ref) < rel * abs(ref)
+
+
+def test_body_axis_model(b737):
+    model, flight, mass_props, length_unit = b737
+    linear_model = dynamics.LinearModel.from_body_axis_derivatives(
+        get_output("b737.sb"), model, flight, length_unit
+    )
+    eigenvalues = linear_model.eigenvalues(mass_props)
+    assert eigenvalues.shape == (1, 8)
+    assert_close_eigenvalues(eigenvalues[0], avl_eigenvalues(), rel=0.1)
+
+
+def test_design_vars_are_no_controls(b737):
+    model, flight, mass_props, length_unit = b737
+    # the design variables (twist, washout) have derivatives like controls
+    linear_model = dynamics.LinearModel.from_stability_derivatives(
+        get_output("b737-design.st"), get_output("b737.ft"), model, flight, length_unit
+    )
+    assert linear_model.controls == ["slat", "flap", "aileron", "elevator", "rudder"]
+    _, b_mat = linear_model.system_matrices(mass_props)
+    assert b_mat.shape == (1, 12, 5)
+
+
+def test_stability_axis_conversion():
+    derivatives = dynamics.body_axis_derivatives(
+        get_output("b737.st"), get_output("b737.ft"), aspect_ratio=113**2 / 1260
+    )
+    reference = get_output("b737.sb")
+    for key in ["CZu", "CZw", "Cmu", "Clv", "Cnv", "Clp", "Cnr", "CYr", "CZ_elevator"]:
+        assert derivatives[key] == pytest.approx(reference[key], rel=2e-3)
+
+
+def test_system_matrix_round_trip(b737):
+    _, flight, mass_props, length_unit = b737
+    sys_result = get_output("b737.sys")
+    linear_model = dynamics.LinearModel.from_system_matrix(
+        sys_result, mass_props, flight, length_unit
+    )
+    a_mat, b_mat = linear_model.system_matrices(mass_props)
+    _, _, a_ref, b_ref = dynamics.system_matrices(sys_result)
+    assert a_mat[0] == pytest.approx(a_ref, abs=1e-3)
+    assert b_mat[0] == pytest.approx(b_ref, abs=1e-6)
+    assert_close_eigenvalues(
+        linear_model.eigenvalues(mass_props)[0], avl_eigenvalues(), rel=1e-2
+    )
+
+
+def test_loading_configurations(b737):
+    _, flight, mass_props, length_unit = b737
+    linear_model = dynamics.LinearModel.from_system_matrix(
+        get_output("b737.sys"), mass_props, flight, length_unit
+    )
+    n = 1000
+    loadings = dynamics.MassProperties(
+        mass=mass_props.mass[0] * np.linspace(0.8, 1.2, n),
+        cg=mass_props.cg[0] + np.linspace(-2.0, 2.0, n)[:, None] * [1.0, 0.0, 0.0],
+        inertia=mass_props.inertia[0],
+    )
+    results = linear_model.modes(loadings)
+    assert results.eigenvalues.shape == (n, 8)
+    assert results.A.shape == (n, 12, 12)
+    # a forward CG (geometry x-axis points aft) increases the short-period frequency
+    short_period = np.nanmax(np.abs(results.modes(dynamics.SHORT_PERIOD)), axis=1)
+    assert short_period[0] > short_period[-1]
+
+
+def test_inertia_tensor_signs(b737):
+    # AVL states are tensor components in geometry axes (x aft, z up), e.g.
+    # Izx = -sum(m dx dz); b737.run has Izx > 0 from the items of b737.mass
+    *_, mass_props, _ = b737
+    tensor = mass_props.tensor()[0]
+    assert tensor[0, 2] == tensor[2, 0] == pytest.approx(26994.4)
+
+    # point masses, tensor in body axes (x fwd, z down) from r = (-dx, dy, -dz)
+    mass = np.array([2.0, 3.0, 5.0])
+    offset = np.array([[1.0, 2.0, 3.0], [-2.0, 1.0, -1.0], [0.4, -1.0, -0.6]])
+    offset -= mass @ offset / mass.sum()
+    ixx, iyy, izz = np.sum(mass @ offset**2) - mass @ offset**2
+    ixy, iyz, izx = [
+        -np.sum(mass * offset[:, i] * offset[:, j]) for i, j in [(0, 1), (1, 2), (2, 0)]
+    ]
+    props = dynamics.MassProperties(
+        mass=mass.sum(), cg=[0.0, 0.0, 0.0], inertia=[ixx, iyy, izz, ixy, iyz, izx]
+    )
+    body = offset * [-1.0, 1.0, -1.0]
+    reference = sum(
+        m * (np.dot(r, r) * np.eye(3) - np.outer(r, r)) for m, r in zip(mass, body)
+    )
+    assert np.allclose(props.tensor()[0], reference)
+
+
+def test_mass_properties_from_distribution(b737):
+    # the mass states in b737.run were set by AVL from b737.mass
+    *_, mass_props, _ = b737
+    mass_dist = avl.MassDistribution.from_file(os.path.join(RES_DIR, "b737.mass"))
+    computed = dynamics.MassProperties.from_distribution(mass_dist)
+    assert computed.mass == pytest.approx(mass_props.mass, rel=1e-5)
+    assert np.allclose(computed.cg, mass_props.cg, atol=1e-4)
+    assert np.allclose(computed.inertia, mass_props.inertia, rtol=1e-5, atol=0.5)
+
+
+def test_mass_table_modifiers():
+    mass_dist = avl.MassDistribution.from_file(os.path.join(RES_DIR, "b737.mass"))
+    _, mass, position, _ = dynamics.mass_table(mass_dist)
+    mass_dist.simplify()
+    assert list(mass) == pytest.approx([item.mass for item in mass_dist.masses])
+    assert list(position[:, 0]) == pytest.approx(
+        [item.position.x for item in mass_dist.masses]
+    )
+
+
+def test_loading_variants():
+    items = [
+        avl.MassItem(100.0, avl.Point(1.0, 0.0, 0.0), Inertia(1.0, 2.0, 3.0)),
+        avl.MassItem(50.0, avl.Point(3.0, 1.0, -1.0), name="fuel"),
+    ]
+    mass_dist = avl.MassDistribution(items, length_scaling=0.5, mass_scaling=2.0)
+    fuel = np.linspace(0.0, 1.0, 11)
+    loadings = dynamics.MassProperties.from_distribution(
+        mass_dist, factors={"fuel": fuel}
+    )
+    assert len(loadings) == 11
+
+    # reference: each variant as its own distribution
+    variants = []
+    for factor in fuel:
+        fuel_item = avl.MassItem(50.0 * factor, avl.Point(3.0, 1.0, -1.0))
+        variants.append(
+            avl.MassDistribution(
+                [items[0], fuel_item], length_scaling=0.5, mass_scaling=2.0
+            )
+        )
+    reference = dynamics.MassProperties.from_distributions(variants)
+    assert np.allclose(loadings.inertia, reference.inertia)
+
+    full = loadings.mass[-1], loadings.cg[-1], loadings.inertia[-1]
+    assert full[0] == pytest.approx(300.0)
+    cg = np.array([(100 * 1.0 + 50 * 3.0) / 150, 50 / 150, -50 / 150])
+    assert np.allclose(full[1], cg)
+    offsets = np.array([[1.0, 0.0, 0.0], [3.0, 1.0, -1.0]]) - cg
+    masses = np.array([100.0, 50.0])
+    ixx = 1.0 + np.sum(masses * (offsets[:, 1] ** 2 + offsets[:, 2] ** 2))
+    izx = -np.sum(masses * offsets[:, 0] * offsets[:, 2])
+    assert full[2][0] == pytest.approx(ixx * 2.0 * 0.25)
+    assert full[2][5] == pytest.approx(izx * 2.0 * 0.25)
+
+    cases = loadings.create_cases(avl.Case("cruise", alpha=2.0), density=0.5)
+    assert [case.name for case in cases][:2] == ["cruise-0", "cruise-1"]
+    assert cases[-1].states["Izx"].value == pytest.approx(full[2][5])
+    assert cases[0].states["density"].value == 0.5
+    from_cases = dynamics.MassProperties.from_cases(cases)
+    assert np.allclose(from_cases.inertia, loadings.inertia)
+
+    table = CaseTable(names="cruise", alpha=np.zeros(11))
+    loadings.set_case_states(table)
+    assert np.allclose(table["X_cg"], loadings.cg[:, 0])
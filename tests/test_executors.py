@@ -0,0 +1,190 @@
+import math
+import operator
+import os.path
+import pickle
+from tempfile import TemporaryDirectory
+import time
+
+import pytest
+
+import avlwrapper as avl
+from avlwrapper.executors import (
+    ModelNotCached,
+    ModelPayload,
+    SessionJob,
+    load_model,
+    run_session_job,
+)
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+@pytest.fixture(params=["thread", "process"])
+def futures_executor(request):
+    with avl.FuturesExecutor(kind=request.param, max_workers=2) as executor:
+        yield executor
+
+
+@pytest.fixture()
+def broker():
+    with avl.BrokerExecutor() as executor:
+        executor.start_local_workers(2)
+        yield executor
+
+
+def test_futures_executor(futures_executor):
+    results = futures_executor.map(math.sqrt, [1.0, 4.0, 9.0])
+    assert list(results) == [1.0, 2.0, 3.0]
+
+
+def test_broker_executor(broker):
+    futures = [broker.submit(operator.mul, idx, 2) for idx in range(20)]
+    assert [future.result(timeout=30) for future in futures] == list(range(0, 40, 2))
+
+
+def test_broker_exception(broker):
+    future = broker.submit(math.sqrt, -1.0)
+    with pytest.raises(ValueError):
+        future.result(timeout=30)
+
+
+def test_session_jobs():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = avl.create_sweep_cases(
+        avl.Case("cruise"), {"name": "alpha", "values": list(range(30))}
+    )
+    session = avl.Session(geometry=geometry, cases=cases)
+    jobs = [job for _, job in session._get_jobs("cases", 20, remote=True)]
+    # partitions are balanced, with at most 20 cases
+    assert [len(job.cases) for job in jobs] == [15, 15]
+    assert isinstance(jobs[0], SessionJob)
+    # the model is serialised once for all jobs
+    assert jobs[0].model is jobs[1].model
+    assert list(jobs[0].model.files.keys()) == ["a1.dat"]
+    assert jobs[0].config is None
+
+    local_jobs = [job for _, job in session._get_jobs("cases", 20)]
+    assert local_jobs[0].model.files is None
+    config = local_jobs[0].config
+    with pytest.raises(TypeError):
+        config["show_stdout"] = True
+    # nested sections are frozen too
+    with pytest.raises(TypeError):
+        config.settings["show_stdout"] = True
+    with pytest.raises(TypeError):
+        config["limits"]["memory"] = 1.0
+    assert config["limits"] == session.config["limits"]
+    assert pickle.loads(pickle.dumps(config))["limits"] == config["limits"]
+    assert config.copy(show_stdout=True)["show_stdout"]
+
+
+def test_configuration_copy():
+    config = avl.Configuration()
+    copied = config.copy(show_stdout=True)
+    copied["limits"]["memory"] = 1.0
+    assert config["limits"]["memory"] != 1.0
+    assert copied["show_stdout"]
+
+
+def test_session_job_closes_session(monkeypatch):
+    closed = []
+    monkeypatch.setattr(avl.Session, "run_all_cases", lambda self: {})
+    monkeypatch.setattr(avl.Session, "close", lambda self: closed.append(self))
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    session = avl.Session(geometry=geometry, cases=[avl.Case("cruise")])
+    [(_, job)] = session._get_jobs("cases", 20)
+    assert run_session_job(job) == {}
+    assert len(closed) == 1
+
+
+def test_session_job_options(monkeypatch):
+    sessions = []
+    monkeypatch.setattr(
+        avl.Session, "run_all_cases", lambda self: sessions.append(self) or {}
+    )
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    with TemporaryDirectory() as output_dir:
+        with avl.Session(
+            geometry=geometry,
+            cases=[avl.Case("cruise")],
+            staged=True,
+            deduplicate=True,
+            retain_runs=avl.RunArchiver(output_dir, compression="bz2"),
+            profile=avl.Profiler(memory=False, report_dir=output_dir),
+        ) as session:
+            [(_, job)] = session._get_jobs("cases", 20)
+        run_session_job(pickle.loads(pickle.dumps(job)))
+
+    (worker_session,) = sessions
+    assert worker_session._workspace is not None
+    assert worker_session.deduplicate
+    assert worker_session._archiver.directory == output_dir
+    assert worker_session._archiver.compression == "bz2"
+    assert worker_session._profiler.report_dir == output_dir
+    assert not worker_session._profiler.memory
+
+
+def test_executor_runs_are_timed(monkeypatch):
+    def run_job(job):
+        time.sleep(0.01)
+        return {number: {"Name": "case"} for number in range(1, len(job.cases) + 1)}
+
+    monkeypatch.setattr(avl.executors, "run_session_job", run_job)
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = avl.create_sweep_cases(
+        avl.Case("cruise"), {"name": "alpha", "values": list(range(30))}
+    )
+    session = avl.Session(geometry=geometry, cases=cases)
+    session.cost_model = avl.CostModel()
+    session.runtime_model = avl.RuntimeModel()
+    with avl.FuturesExecutor(kind="thread", max_workers=2) as executor:
+        results = session.run_all_cases(executor=executor, partition_size=20)
+    assert list(results) == list(range(1, 31))
+    # the models learned from both partitions
+    assert session.cost_model.to_dict()
+    assert session.runtime_model.calibration != 1.0
+
+
+def test_model_cache():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "supra.avl"))
+    mass_dist = avl.MassDistribution.from_file(os.path.join(RES_DIR, "supra.mass"))
+    session = avl.Session(geometry=geometry, mass_dist=mass_dist)
+    payload = ModelPayload.from_session(session, remote=True)
+    assert ModelPayload.from_session(session, remote=True) == payload
+
+    cached_geometry, cached_mass = load_model(payload)
+    assert str(cached_geometry) == str(geometry)
+    assert str(cached_mass) == str(mass_dist)
+    # airfoil files are written next to the cached geometry
+    for path in cached_geometry.external_files:
+        assert os.path.exists(path)
+
+    # references are resolved from the cache
+    assert load_model(payload.reference())[0] is cached_geometry
+    with pytest.raises(ModelNotCached):
+        load_model(ModelPayload("unknown"))
+
+
+def test_process_pool_preloads_model():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    payload = ModelPayload.from_session(avl.Session(geometry=geometry))
+    with avl.FuturesExecutor(kind="process", max_workers=2) as executor:
+        # jobs refer to the model loaded by the pool initializer
+        received = executor.submit(operator.attrgetter("geometry"), payload)
+        loaded = executor.submit(load_model, payload)
+        assert received.result(timeout=30) is None
+        assert str(loaded.result(timeout=30)[0]) == payload.geometry
+
+
+def test_broker_sends_model_once():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    payload = ModelPayload.from_session(avl.Session(geometry=geometry), remote=True)
+    with avl.BrokerExecutor() as broker:
+        broker.start_local_workers(1)
+        received = [
+            broker.submit(operator.attrgetter("geometry"), payload).result(timeout=30)
+            for _ in range(3)
+        ]
+    assert received[0] == payload.geometry
+    assert received[1:] == [None, None]
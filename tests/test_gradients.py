@@ -0,0 +1,58 @@
+import os.path
+
+import pytest
+
+import avlwrapper as avl
+
+np = pytest.importorskip("numpy")
+from avlwrapper.gradients import (
+    _gradients_from_results,
+    _perturbed_geometry,
+    add_design_var,
+    design_var_names,
+)
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def test_design_var_derivatives():
+    derivatives = avl.OutputReader(
+        os.path.join(RES_DIR, "b737-design.st")
+    ).get_content()
+    assert derivatives["CL_twist"] == pytest.approx(0.081234)
+    assert derivatives["CDff_washout"] == pytest.approx(0.0003)
+    # control derivatives are unchanged
+    assert derivatives["Cm_elevator"] == pytest.approx(-0.071575)
+
+
+def test_design_vars():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    wing = geometry.surfaces[0]
+    add_design_var(wing, "twist", [0.0] + [1.0] * (len(wing.sections) - 1))
+    assert design_var_names(geometry) == ["twist"]
+    assert "DESIGN\n#Name Weight\ntwist 1.0\n" in str(geometry)
+
+    perturbed = _perturbed_geometry(geometry, "twist", 0.5)
+    tip = wing.sections[-1]
+    assert perturbed.surfaces[0].sections[-1].angle == tip.angle + 0.5
+    assert perturbed.surfaces[0].sections[0].angle == wing.sections[0].angle
+
+
+def test_gradients_from_results():
+    results = [
+        {
+            "Totals": avl.OutputReader(os.path.join(RES_DIR, "b737.ft")).get_content(),
+            "StabilityDerivatives": avl.OutputReader(
+                os.path.join(RES_DIR, "b737-design.st")
+            ).get_content(),
+        }
+    ] * 3
+    gradients = _gradients_from_results(
+        results, ["twist", "washout", "camber"], ["CL", "CDtot"]
+    )
+    assert gradients.values["CL"] == pytest.approx([0.54444] * 3)
+    assert np.allclose(gradients["CL"][:, :2], [[0.081234, 0.012]] * 3)
+    # derivatives missing in the output are finite differenced
+    assert list(gradients.finite_difference["CL"]) == [False, False, True]
+    assert gradients.finite_difference["CDtot"].all()
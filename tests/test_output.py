@@ -66,6 +66,19 @@ def test_element_forces():
     assert res["Nacelle"][137]["dCp"][-1] == pytest.approx(-0.17307, 1e-6)
 
 
+def test_streamed_element_forces():
+    reference = get_output("b737.fe")
+    reader = avl.ElementStripReader(os.path.join(RES_DIR, "b737.fe"))
+    strips = list(reader)
+    assert len(strips) == sum(len(surface) for surface in reference.values())
+    wing = strips[0]
+    assert (wing.surface, wing.strip, wing.ydup) == ("Wing", 1, False)
+    assert list(wing.columns["X"]) == reference["Wing"][1]["X"]
+    nacelle = [s for s in strips if s.strip == 137][0]
+    assert list(nacelle.columns["dCp"]) == reference["Nacelle"][137]["dCp"]
+    assert any(strip.ydup for strip in strips)
+
+
 def test_stability_derivatives():
     res = get_output("b737.st")
     assert res["CLa"] == pytest.approx(7.299206, 1e-6)
@@ -113,3 +126,42 @@ def test_get_vars_output_scientific_format():
 def test_get_vars_decimal_format():
     res = get_output("aircraft-1.sb")
     assert res["CXu"] == pytest.approx(-0.27412958e-02, abs=1e-6)
+
+
+def test_result_records():
+    schemas = avl.output.ResultSchemas()
+    totals = avl.OutputReader(os.path.join(RES_DIR, "b737.ft")).get_content(schemas)
+    assert isinstance(totals, avl.ResultRecord)
+    assert totals.CLtot == pytest.approx(0.54444, 1e-6)
+    assert totals["Cl'tot"] == totals.Cl_tot
+    assert totals.to_dict() == get_output("b737.ft")
+
+    # records with the same keys share their schema
+    stability = [
+        avl.OutputReader(os.path.join(RES_DIR, "b737.st")).get_content(schemas)
+        for _ in range(2)
+    ]
+    assert stability[0].schema is stability[1].schema
+    assert stability[0].Cm_elevator == pytest.approx(-0.071575, 1e-6)
+    assert dict(stability[0]) == get_output("b737.st")
+
+
+def test_stdout_results():
+    with open(os.path.join(RES_DIR, "b737.stdout")) as fp:
+        executions = avl.output.StdoutReader().read(fp.read())
+    assert len(executions) == 2
+
+    totals = executions[0]["Totals"]
+    assert totals == get_output("b737.ft")
+    convergence = executions[0]["Convergence"]
+    assert convergence["converged"]
+    assert convergence["iterations"] == 2
+    assert convergence["residual"] == pytest.approx(0.2143e-5)
+
+    assert executions[0]["Case"] == {"number": 1, "name": "-unnamed-"}
+    assert executions[1]["Case"] == {"number": 2, "name": "stall"}
+    assert executions[1]["Totals"]["CLtot"] == pytest.approx(1.2)
+    convergence = executions[1]["Convergence"]
+    assert not convergence["converged"]
+    assert convergence["iterations"] == 20
+    assert convergence["messages"] == ["Trim convergence failed"]
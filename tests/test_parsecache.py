@@ -0,0 +1,112 @@
+import os
+import os.path
+import shutil
+from tempfile import TemporaryDirectory
+
+import pytest
+
+import avlwrapper as avl
+from avlwrapper.parsecache import ParseCache
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+@pytest.fixture()
+def model_dir():
+    with TemporaryDirectory() as tmp_dir:
+        for filename in ["b737.avl", "b737.mass", "a1.dat"]:
+            shutil.copy(os.path.join(RES_DIR, filename), tmp_dir)
+        yield tmp_dir
+
+
+def count_parses(monkeypatch):
+    calls = []
+    parse_file = avl.Aircraft._parse_file.__func__
+
+    def counting(cls, filename):
+        calls.append(filename)
+        return parse_file(cls, filename)
+
+    monkeypatch.setattr(avl.Aircraft, "_parse_file", classmethod(counting))
+    return calls
+
+
+def test_memory_cache(model_dir, monkeypatch):
+    calls = count_parses(monkeypatch)
+    cache = ParseCache(registry=avl.AirfoilRegistry())
+    file_path = os.path.join(model_dir, "b737.avl")
+
+    first = cache.load(avl.Aircraft, file_path)
+    second = cache.load(avl.Aircraft, file_path)
+    assert len(calls) == 1
+    assert second == first
+    assert second._from_file == file_path
+
+    # loads are independent copies
+    second.surfaces[0].n_chordwise = 1
+    assert cache.load(avl.Aircraft, file_path) == first
+
+    # touched, but unchanged
+    os.utime(file_path, ns=(0, 0))
+    cache.load(avl.Aircraft, file_path)
+    assert len(calls) == 1
+
+    # changed
+    with open(file_path, "a") as fp:
+        fp.write("\n#comment\n")
+    cache.load(avl.Aircraft, file_path)
+    assert len(calls) == 2
+
+    # rewritten with the same size and modification time
+    stat = os.stat(file_path)
+    with open(file_path, "r+") as fp:
+        fp.seek(stat.st_size - 9)
+        fp.write("#cOMMENT\n")
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    cache.load(avl.Aircraft, file_path)
+    assert len(calls) == 3
+
+
+def test_persistent_cache(model_dir, monkeypatch):
+    calls = count_parses(monkeypatch)
+    file_path = os.path.join(model_dir, "b737.avl")
+    cache_dir = os.path.join(model_dir, "cache")
+
+    first = ParseCache(registry=avl.AirfoilRegistry())
+    model = first.load(avl.Aircraft, file_path, directory=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # a new process restores the model and the airfoil files
+    registry = avl.AirfoilRegistry()
+    second = ParseCache(registry=registry)
+    assert second.load(avl.Aircraft, file_path, directory=cache_dir) == model
+    assert len(calls) == 1
+
+    entry = registry.resolve(os.path.join(model_dir, "a1.dat"))
+    assert len(entry.x_data) == 281
+    assert registry.inline(model).surfaces[0].sections[0].airfoil.x_data == (
+        entry.x_data
+    )
+
+    # a changed airfoil file is not restored
+    with open(os.path.join(model_dir, "a1.dat"), "a") as fp:
+        fp.write("\n")
+    registry.clear()
+    ParseCache(registry=registry).load(avl.Aircraft, file_path, directory=cache_dir)
+    assert registry.resolve(os.path.join(model_dir, "a1.dat")).x_data is None
+
+
+def test_from_file(model_dir):
+    cache_dir = os.path.join(model_dir, "cache")
+    config = avl.default_config
+    settings = config.settings["parse_cache"]
+    # the cache is opt-in
+    assert not settings["enabled"]
+    config.settings["parse_cache"] = dict(settings, enabled=True, directory=cache_dir)
+    try:
+        mass = avl.MassDistribution.from_file(os.path.join(model_dir, "b737.mass"))
+    finally:
+        config.settings["parse_cache"] = settings
+    assert mass.masses
+    assert len(os.listdir(cache_dir)) == 1
@@ -0,0 +1,80 @@
+import json
+import os.path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+import avlwrapper as avl
+from avlwrapper.session import plot_files
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def get_session(name="b737"):
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = [avl.Case("cruise", alpha=1.0), avl.Case("climb", alpha=4.0)]
+    return avl.Session(geometry=geometry, cases=cases, name=name)
+
+
+def test_plot_files():
+    with TemporaryDirectory() as output_dir:
+        for page in (1, 2, 10):
+            open(os.path.join(output_dir, f"plot-{page}.png"), "w").close()
+        files = plot_files(os.path.join(output_dir, "plot-%d.png"))
+    assert [os.path.basename(f) for f in files] == [
+        "plot-1.png",
+        "plot-2.png",
+        "plot-10.png",
+    ]
+
+
+def test_fingerprint():
+    exporter = avl.PlotExporter(file_format="png")
+    session = get_session()
+    exporter.add_trefftz_plots(session)
+    fingerprint = exporter.fingerprint("b737-trefftz-%d")
+    assert exporter.fingerprint("b737-trefftz-%d") == fingerprint
+
+    session.cases[1].update(alpha=5.0)
+    assert exporter.fingerprint("b737-trefftz-%d") != fingerprint
+
+
+def test_duplicate_plot_names():
+    exporter = avl.PlotExporter(file_format="pdf")
+    exporter.add_geometry_plot(get_session())
+    exporter.add_trefftz_plots(get_session())
+    exporter.add_geometry_plot(get_session("b737-flaps"))
+    with pytest.raises(ValueError):
+        exporter.add_geometry_plot(get_session())
+    with pytest.raises(ValueError):
+        exporter.add_trefftz_plots(get_session())
+    assert list(exporter._jobs) == [
+        "b737-geometry",
+        "b737-trefftz",
+        "b737-flaps-geometry",
+    ]
+
+
+def test_skip_unchanged_plots():
+    with TemporaryDirectory() as output_dir:
+        exporter = avl.PlotExporter(output_dir=output_dir, file_format="pdf")
+        exporter.add_geometry_plot(get_session())
+        exporter.add_trefftz_plots(get_session())
+
+        # plots of an earlier export
+        manifest = dict()
+        for plot_name in ("b737-geometry", "b737-trefftz"):
+            out_file = os.path.join(output_dir, plot_name + ".pdf")
+            open(out_file, "w").close()
+            manifest[plot_name] = {
+                "fingerprint": exporter.fingerprint(plot_name),
+                "files": [out_file],
+            }
+        with open(exporter.manifest_path, "w") as fp:
+            json.dump(manifest, fp)
+
+        # nothing is run
+        files = exporter.export()
+    assert list(files) == ["b737-geometry", "b737-trefftz"]
+    assert os.path.basename(files["b737-trefftz"][0]) == "b737-trefftz.pdf"
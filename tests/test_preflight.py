@@ -0,0 +1,92 @@
+import os.path
+
+import pytest
+
+import avlwrapper as avl
+from avlwrapper.preflight import PanelCount, RuntimeModel
+from avlwrapper.session import InputError
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def get_geometry():
+    return avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+
+
+def test_panel_count():
+    panels = avl.panel_count(get_geometry())
+    # wing (26 x 12), stab (15 x 6) and nacelle (12 x 6) are duplicated,
+    # fuselage H (5 x 24) too, fuselage V top and bottom (5 x 24) and the
+    # fin (11 x 7) are not
+    assert panels.surfaces == 11
+    assert panels.strips == 2 * (26 + 15 + 12 + 5) + 5 + 5 + 11
+    assert panels.vortices == 2 * (312 + 90 + 72 + 120) + 240 + 77
+    assert panels.controls == 5
+
+
+def test_panel_count_section_spacing():
+    geometry = get_geometry()
+    panels = avl.panel_count(geometry)
+    # without a spacing, the surface-wide number of panels is not written
+    # and the section discretisation applies (one strip)
+    stab = geometry.surfaces[1]
+    stab.span_spacing = None
+    # as is a section number of panels without a spacing
+    stab.sections[0].n_spanwise = 10
+    assert avl.panel_count(geometry).strips == panels.strips - 2 * (15 - 1)
+
+
+def test_exceeded_limits():
+    panels = PanelCount(surfaces=2, strips=500, vortices=6000)
+    messages = panels.exceeded()
+    assert len(messages) == 2
+    assert "6000 vortices" in messages[1]
+    assert panels.exceeded({"strips": 1000, "vortices": None}) == []
+
+
+def test_runtime_model():
+    model = RuntimeModel(learning_rate=1.0)
+    panels = PanelCount(vortices=1000, controls=2)
+    free = avl.Case("free", alpha=2.0)
+    trimmed = avl.Case("trimmed", alpha=avl.Parameter("alpha", 0.5, "CL"))
+    assert model.case_seconds(panels, trimmed) > model.case_seconds(panels, free)
+    assert model.memory(PanelCount(vortices=2000)) > model.memory(panels)
+
+    # a second Mach number requires another factorisation
+    mach_case = avl.Case("mach", alpha=2.0, mach=0.5)
+    one_mach = model.run_seconds(panels, [free, free])
+    two_mach = model.run_seconds(panels, [free, mach_case])
+    assert two_mach - one_mach == pytest.approx(model.factor_cost * 1000**3)
+
+    estimate = model.run_seconds(panels, [free])
+    model.record(panels, [free], 2 * estimate)
+    assert model.run_seconds(panels, [free]) == pytest.approx(2 * estimate)
+
+
+def test_session_estimate():
+    cases = [avl.Case("cruise", alpha=1.0), avl.Case("climb", alpha=5.0)]
+    session = avl.Session(geometry=get_geometry(), cases=cases)
+    estimate = session.estimate()
+    assert estimate.panels.vortices == avl.panel_count(session.geometry).vortices
+    assert len(estimate.case_seconds) == 2
+    assert estimate.seconds > sum(estimate.case_seconds)
+    assert estimate.problems == []
+
+    session.config = session.config.copy(
+        limits=dict(session.config["limits"], vortices=1000, memory=1.0)
+    )
+    assert len(session.estimate().problems) == 2
+
+
+def test_preflight_refuse(caplog):
+    session = avl.Session(geometry=get_geometry(), cases=[avl.Case("cruise")])
+    limits = dict(session.config["limits"], strips=100)
+
+    session.config = session.config.copy(limits=dict(limits, preflight="refuse"))
+    with pytest.raises(InputError, match="strips"):
+        session.run_all_cases()
+
+    session.config = session.config.copy(limits=dict(limits, preflight="warn"))
+    session._preflight()
+    assert "strips exceed the AVL limit" in caplog.text
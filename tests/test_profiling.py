@@ -0,0 +1,64 @@
+import json
+import os.path
+from tempfile import TemporaryDirectory
+
+import avlwrapper as avl
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def test_profiler_report():
+    with TemporaryDirectory() as report_dir:
+        profiler = avl.Profiler(memory=True, cprofile=True, report_dir=report_dir)
+        profiler.start_run()
+        with profiler.stage("read_outputs"):
+            data = [list(range(100)) for _ in range(100)]
+        with profiler.stage("avl", python=False):
+            pass
+        profiler.record_parse("TotalsFileReader", 0.5, 40)
+        profiler.record_parse("TotalsFileReader", 0.25, 40)
+        report_path = profiler.finish_run("test")
+
+        with open(report_path) as fp:
+            report = json.load(fp)
+        assert os.path.exists(report["cprofile"])
+    assert data
+    assert report["stages"]["read_outputs"]["peak_memory"] > 0
+    assert report["stages"]["avl"]["peak_memory"] is None
+    assert report["parsers"]["TotalsFileReader"] == {
+        "files": 2,
+        "seconds": 0.75,
+        "lines": 80,
+    }
+
+
+def test_session_parse_statistics():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    session = avl.Session(geometry=geometry, profile=True)
+    session._profiler.start_run()
+    totals = session._read_output(os.path.join(RES_DIR, "b737.ft"))
+    assert totals["CLtot"]
+    stats = session._profiler._parsers["TotalsFileReader"]
+    assert stats["files"] == 1
+    assert stats["lines"] > 0
+
+
+def test_streamed_run_stages(monkeypatch):
+    def stream(session, working_dir, poll_interval, stdout_lines=None):
+        for case in session.cases:
+            yield case.number, {"Name": case.name}
+
+    monkeypatch.setattr(avl.Session, "_stream_case_results", stream)
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = [avl.Case("cruise", alpha=1.0), avl.Case("climb", alpha=5.0)]
+    with TemporaryDirectory() as report_dir:
+        profiler = avl.Profiler(memory=False, report_dir=report_dir)
+        session = avl.Session(geometry=geometry, cases=cases, profile=profiler)
+        # the consumer stops early, the report is written nevertheless
+        results = session.iter_case_results()
+        next(results)
+        results.close()
+        report = profiler.report
+    assert report["stages"]["avl"]["calls"] == 1
+    assert "write_inputs" in report["stages"]
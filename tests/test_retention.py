@@ -0,0 +1,189 @@
+import io
+import os.path
+import shutil
+from tempfile import TemporaryDirectory
+
+import pytest
+
+import avlwrapper as avl
+from avlwrapper.retention import available_compressions
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def get_session(archiver, staged=False):
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = [avl.Case("cruise", alpha=1.0), avl.Case("climb", alpha=5.0)]
+    session = avl.Session(
+        geometry=geometry,
+        cases=cases,
+        name="b737",
+        staged=staged,
+        retain_runs=archiver,
+    )
+    session.config = session.config.copy(
+        output={"totals": "yes", "stripforces": "yes"}
+    )
+    return session
+
+
+def write_outputs(session, working_dir):
+    # output files as written by AVL
+    for case in session.cases:
+        for ext in ["ft", "fs"]:
+            shutil.copy(
+                os.path.join(RES_DIR, f"b737.{ext}"),
+                os.path.join(working_dir, session._get_output_filename(case, ext)),
+            )
+
+
+@pytest.mark.parametrize("compression", available_compressions())
+def test_retained_results(compression):
+    with TemporaryDirectory() as archive_dir:
+        archiver = avl.RunArchiver(archive_dir, compression=compression)
+        with get_session(archiver) as session:
+            with TemporaryDirectory() as working_dir:
+                session._write_analysis_files(working_dir)
+                write_outputs(session, working_dir)
+                session._retain(
+                    working_dir, session._run_all_cases_cmds, case_results=True
+                )
+                expected = session._read_case_results(working_dir)
+        # the session waits for the archive when closed
+        (archive_file,) = os.listdir(archive_dir)
+        assert archive_file.endswith(f".tar.{compression}")
+
+        with avl.RunArchive(os.path.join(archive_dir, archive_file)) as archive:
+            assert "b737.avl" in archive.names
+            assert "a1.dat" in archive.names
+            assert archive.commands == session._run_all_cases_cmds
+            assert archive.stdout is None
+            results = archive.case_results()
+        assert list(results) == [1, 2]
+        for number, case_results in results.items():
+            assert case_results["Name"] == expected[number]["Name"]
+            assert case_results["Totals"] == expected[number]["Totals"]
+            assert case_results["StripForces"]["Wing"]["cl"] == (
+                expected[number]["StripForces"]["Wing"]["cl"]
+            )
+
+
+def test_staged_stdout_results():
+    with open(os.path.join(RES_DIR, "b737.stdout")) as fp:
+        stdout = fp.read()
+
+    with TemporaryDirectory() as archive_dir:
+        archiver = avl.RunArchiver(archive_dir)
+        with get_session(archiver, staged=True) as session:
+            session.stdout_results = True
+            with session._run_context() as working_dir:
+                session._write_analysis_files(working_dir)
+                write_outputs(session, working_dir)
+                session._retain(
+                    working_dir, session._run_all_cases_cmds, stdout, case_results=True
+                )
+            archiver.wait()
+
+        (archive_file,) = os.listdir(archive_dir)
+        with avl.RunArchive(os.path.join(archive_dir, archive_file)) as archive:
+            # the run directory is below the staged input files
+            assert archive.manifest["run_dir"] == "run"
+            assert "b737.avl" in archive.names
+            assert "run/b737.case" in archive.names
+            results = archive.case_results()
+            assert results[1]["Name"] == "cruise"
+            assert results[1]["Totals"]["CLtot"] == 0.54444
+            assert "Wing" in results[2]["StripForces"]
+            with TemporaryDirectory() as extract_dir:
+                archive.extract(extract_dir)
+                assert os.path.exists(os.path.join(extract_dir, "run", "b737-1.fs"))
+
+
+class FinishedProcess:
+    # AVL process which wrote no output
+    def communicate(self, input=None):
+        return None, None
+
+    def wait(self):
+        return 0
+
+
+def parse_error(working_dir):
+    raise RuntimeError("Output could not be parsed")
+
+
+def test_failed_runs_are_retained(monkeypatch):
+    with TemporaryDirectory() as archive_dir:
+        archiver = avl.RunArchiver(archive_dir)
+        with get_session(archiver) as session:
+            monkeypatch.setattr(
+                session, "_get_avl_process", lambda *args: FinishedProcess()
+            )
+            with pytest.raises(RuntimeError):
+                session.run_avl(
+                    cmds=session._run_mode_analysis_cmds,
+                    pre_fn=session._write_analysis_files,
+                    post_fn=parse_error,
+                )
+            with pytest.raises(RuntimeError):
+                session.run_avl(
+                    cmds=session._run_all_cases_cmds,
+                    pre_fn=session._write_analysis_files,
+                    post_fn=parse_error,
+                    case_results=True,
+                )
+        mode_file, cases_file = sorted(os.listdir(archive_dir))
+
+        with avl.RunArchive(os.path.join(archive_dir, mode_file)) as archive:
+            assert archive.commands == session._run_mode_analysis_cmds
+            # a mode analysis has no case results
+            assert "cases" not in archive.manifest
+            assert "outputs" not in archive.manifest
+            assert archive.case_results() == dict()
+        with avl.RunArchive(os.path.join(archive_dir, cases_file)) as archive:
+            assert archive.commands == session._run_all_cases_cmds
+            assert archive.manifest["cases"] == {"1": "cruise", "2": "climb"}
+
+
+class StreamedProcess:
+    # AVL process printing a recorded standard output
+    def __init__(self, stdout):
+        self.stdin = io.BytesIO()
+        self.stdout = io.BytesIO(stdout.encode())
+
+    def poll(self):
+        return 0
+
+    def wait(self):
+        return 0
+
+
+def test_streamed_stdout_results(monkeypatch):
+    with open(os.path.join(RES_DIR, "b737.stdout")) as fp:
+        stdout = fp.read()
+
+    with TemporaryDirectory() as archive_dir:
+        archiver = avl.RunArchiver(archive_dir)
+        with get_session(archiver) as session:
+            session.stdout_results = True
+            session.config = session.config.copy(output={"totals": "yes"})
+            monkeypatch.setattr(
+                session, "_get_avl_process", lambda *args: StreamedProcess(stdout)
+            )
+            streamed = dict(session.iter_case_results())
+        (archive_file,) = os.listdir(archive_dir)
+
+        with avl.RunArchive(os.path.join(archive_dir, archive_file)) as archive:
+            assert archive.stdout == stdout
+            results = archive.case_results()
+    assert list(results) == [1, 2]
+    for number, case_results in results.items():
+        assert case_results["Totals"] == streamed[number]["Totals"]
+        assert case_results["Convergence"] == streamed[number]["Convergence"]
+    assert results[1]["Totals"]["CLtot"] == 0.54444
+
+
+def test_unsupported_compression():
+    with pytest.raises(ValueError):
+        avl.RunArchiver(compression="rar")
@@ -0,0 +1,92 @@
+import os.path
+import time
+
+import pytest
+
+import avlwrapper as avl
+from avlwrapper.scheduling import CostModel, WorkStealingPool, balanced_partitions
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def trimmed_case(name):
+    return avl.Case(
+        name, elevator=avl.Parameter(name="elevator", value=0.0, setting="Cm")
+    )
+
+
+def test_cost_model():
+    model = CostModel()
+    plain, trimmed = avl.Case("plain"), trimmed_case("trimmed")
+    assert model.case_class(trimmed) == "cases-1"
+    assert model.case_cost(trimmed) == 2 * model.case_cost(plain)
+
+    # trimmed cases turn out to be 5 times as expensive
+    for _ in range(30):
+        model.record([plain] * 10, 10 * 0.1)
+        model.record([plain] * 5 + [trimmed] * 5, 5 * 0.1 + 5 * 0.5)
+    assert abs(model.case_cost(plain) - 0.1) < 0.01
+    assert abs(model.case_cost(trimmed) - 0.5) < 0.05
+
+
+def test_balanced_partitions():
+    costs = [5.0] * 10 + [1.0] * 40
+    partitions = balanced_partitions(costs, n_partitions=2, max_size=25)
+    assert sorted(idx for p in partitions for idx in p) == list(range(50))
+    loads = [sum(costs[idx] for idx in p) for p in partitions]
+    assert loads == [45.0, 45.0]
+    assert max(len(p) for p in partitions) <= 25
+
+
+def test_work_stealing():
+    def task(duration):
+        time.sleep(duration)
+        return duration
+
+    # with equal estimated costs, both workers are assigned 10 short tasks
+    # and worker 0 also the slow one
+    pool = WorkStealingPool(max_workers=2)
+    durations = [0.3] + [0.02] * 20
+    start = time.perf_counter()
+    results = pool.map(task, durations, costs=[1.0] * len(durations))
+    assert results == durations
+    # worker 1 takes over the queued tasks of the busy worker 0
+    assert time.perf_counter() - start < 0.3 + 0.1
+
+
+def test_session_partitions():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = [avl.Case(f"plain-{idx}") for idx in range(30)]
+    cases += [trimmed_case(f"trimmed-{idx}") for idx in range(10)]
+    session = avl.Session(geometry=geometry, cases=cases)
+    session.cost_model = CostModel(constraint_cost=4.0)
+    # timed cases, the run time estimate is not used
+    session.cost_model.record(cases[:1], 1.0)
+    session.cost_model.record(cases[-1:], 5.0)
+    partitions = session._cost_partitions("cases", 2, 25)
+    sizes = sorted(len(p) for p in partitions)
+    assert sizes == [20, 20]
+    assert all(sum(idx >= 30 for idx in p) == 5 for p in partitions)
+
+
+def test_uncalibrated_partitions():
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    cases = [trimmed_case("trimmed")] + [avl.Case(f"plain-{idx}") for idx in range(6)]
+    session = avl.Session(geometry=geometry, cases=cases)
+    session.cost_model = CostModel()
+    session.runtime_model = avl.RuntimeModel(case_cost=0.0, trim_iterations=4.0)
+
+    # without timing history, the costs are the run time estimates
+    estimates = session.estimate().case_seconds
+    assert estimates[0] == pytest.approx(5.0 * estimates[1])
+    assert session._case_costs("cases") == estimates
+    partitions = session._cost_partitions("cases", 2, None)
+    assert partitions == balanced_partitions(estimates, 2)
+    # the trimmed case is balanced by five plain cases, not by two as the
+    # default prior of the cost model would
+    assert sorted(len(p) for p in partitions) == [2, 5]
+
+    # the estimates are the prior of the learned costs
+    session.cost_model.record(cases, sum(estimates), priors=estimates)
+    assert session._case_costs("cases") == pytest.approx(estimates)
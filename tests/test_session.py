@@ -0,0 +1,137 @@
+import os.path
+from tempfile import TemporaryDirectory
+
+import avlwrapper as avl
+from avlwrapper.session import _duplicate_results
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+def get_session(n_cases):
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    base_case = avl.Case("cruise", alpha=1.0)
+    cases = avl.create_sweep_cases(
+        base_case, {"name": "alpha", "values": list(range(n_cases))}
+    )
+    return avl.Session(geometry=geometry, cases=cases, name="b737")
+
+
+def test_case_files():
+    session = get_session(60)
+    with TemporaryDirectory() as working_dir:
+        session._write_cases(working_dir)
+        files = sorted(os.listdir(working_dir))
+        assert files == ["b737-1.case", "b737-2.case", "b737.case"]
+        last_cases = avl.Case.from_file(os.path.join(working_dir, "b737-2.case"))
+    assert len(last_cases) == 10
+    assert [case.number for case in last_cases] == list(range(1, 11))
+    assert last_cases[-1].name == "cruise-59"
+    # global numbering is kept in the session
+    assert session.cases[-1].number == 60
+
+
+def test_chained_case_cmds():
+    session = get_session(60)
+    cmds = session._run_all_cases_cmds.split("\n")
+    assert cmds.count("case b737.case") == 1
+    assert cmds.count("case b737-1.case") == 1
+    assert cmds.count("case b737-2.case") == 1
+    assert cmds.count("oper") == 3
+    # output files use the global case number
+    assert "b737-60.ft" in cmds
+    assert cmds.index("case b737-2.case") < cmds.index("b737-51.ft")
+
+
+def test_mass_states():
+    session = get_session(60)
+    session.mass_dist = avl.MassDistribution.from_file(
+        os.path.join(RES_DIR, "b737.mass")
+    )
+    assert session._run_all_cases_cmds.split("\n").count("mset") == 3
+    # the units are loaded, the case states are kept
+    session.mass_states = True
+    cmds = session._run_all_cases_cmds.split("\n")
+    assert "mass b737.mass" in cmds
+    assert "mset" not in cmds
+
+
+def test_stdout_results():
+    session = get_session(2)
+    session.stdout_results = True
+    # the totals are printed by AVL, no totals files are written
+    cmds = session._run_all_cases_cmds.split("\n")
+    assert "ft" not in cmds
+    assert "st" in cmds
+
+    with open(os.path.join(RES_DIR, "b737.stdout")) as fp:
+        stdout = fp.read()
+    # no other outputs are requested
+    session.config = avl.Configuration()
+    session.config["output"] = {"totals": "yes"}
+    with TemporaryDirectory() as working_dir:
+        results = session._read_stdout_case_results(working_dir, stdout)
+    assert list(results) == [1, 2]
+    assert results[1]["Totals"]["CLtot"] == 0.54444
+    assert not results[2]["Convergence"]["converged"]
+
+
+def test_stdout_skipped_case(caplog):
+    session = get_session(2)
+    session.stdout_results = True
+    session.config = avl.Configuration()
+    session.config["output"] = {"totals": "yes"}
+
+    with open(os.path.join(RES_DIR, "b737.stdout")) as fp:
+        stdout = fp.read()
+    # AVL did not execute the first case
+    start = stdout.index(" OPER (case 1/2)")
+    stdout = stdout[:start] + stdout[stdout.index(" OPER (case 2/2)"):]
+    with TemporaryDirectory() as working_dir:
+        results = session._read_stdout_case_results(working_dir, stdout)
+    assert list(results) == [2]
+    assert results[2]["Totals"]["CLtot"] == 1.2
+    assert "no results of case 'cruise-0'" in caplog.text
+
+
+def test_unique_cases():
+    # the origin is part of both sweeps
+    base_case = avl.Case("origin", alpha=0.0, beta=0.0)
+    cases = avl.create_sweep_cases(
+        base_case, {"name": "alpha", "values": [-2.0, 0.0, 2.0]}
+    ) + avl.create_sweep_cases(
+        base_case, {"name": "beta", "values": [-2.0, 1e-9, 2.0]}
+    )
+    unique, inverse = avl.unique_cases(cases)
+    assert [case.name for case in unique] == [
+        "origin-0",
+        "origin-1",
+        "origin-2",
+        "origin-0",
+        "origin-2",
+    ]
+    assert inverse == [0, 1, 2, 3, 1, 4]
+
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    session = avl.Session(geometry=geometry, cases=cases, deduplicate=True)
+    unique, _ = session._unique_cases()
+    assert len(unique) == 5
+    unique_session = session._unique_session(unique)
+    assert [case.number for case in unique_session.cases] == [1, 2, 3, 4, 5]
+
+
+def test_duplicate_results():
+    schemas = avl.output.ResultSchemas()
+    results = {
+        "Name": "origin-0",
+        "Totals": schemas.record({"CLtot": 0.5, "CDtot": 0.02}),
+        "StripForces": {"Wing": {"cl": [0.4, 0.5]}},
+    }
+    duplicate = _duplicate_results(results, avl.Case("origin-1"))
+    assert duplicate["Name"] == "origin-1"
+    assert duplicate["Totals"] == results["Totals"]
+    # duplicates do not share mutable results
+    duplicate["StripForces"]["Wing"]["cl"][0] = 1.0
+    assert results["StripForces"]["Wing"]["cl"][0] == 0.4
+    assert duplicate["Totals"].values is not results["Totals"].values
+    assert duplicate["Totals"].schema is results["Totals"].schema
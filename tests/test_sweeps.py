@@ -0,0 +1,66 @@
+import math
+import os.path
+
+import avlwrapper as avl
+
+CDIR = os.path.dirname(os.path.realpath(__file__))
+RES_DIR = os.path.join(CDIR, "resources")
+
+
+class StepSweep(avl.AdaptiveSweep):
+    # analytic response with a steep change at alpha = 3.3
+    def _run_cases(self, cases):
+        results = []
+        for case in cases:
+            alpha = case.parameters["alpha"].value
+            elevator = case.parameters["elevator"].value
+            totals = {
+                "CLtot": math.tanh(5.0 * (alpha - 3.3)),
+                "Cmtot": 0.001 * elevator,
+            }
+            results.append({"Name": case.name, "Totals": totals})
+        return results
+
+
+def get_sweep(**kwargs):
+    geometry = avl.Aircraft.from_file(os.path.join(RES_DIR, "b737.avl"))
+    session = avl.Session(geometry=geometry)
+    return StepSweep(
+        session=session,
+        base_case=avl.Case("cruise", alpha=0.0, elevator=0.0),
+        parameters=[
+            {"name": "alpha", "values": [-10.0, -5.0, 0.0, 5.0, 10.0]},
+            {"name": "elevator", "values": [-10.0, 10.0]},
+        ],
+        outputs={"CLtot": 0.05, "Cmtot": 0.05},
+        **kwargs,
+    )
+
+
+def test_adaptive_sweep():
+    sweep = get_sweep(max_rounds=20)
+    results = sweep.run()
+    assert sweep.converged
+    assert len(results) == sum(sweep.rounds)
+
+    alphas = sorted({point[0] for point in results})
+    # refined around the step only, the flat regions keep the coarse grid
+    assert [a for a in alphas if a < 0.0] == [-10.0, -5.0]
+    steps = [upper - lower for lower, upper in zip(alphas, alphas[1:])]
+    assert min(steps) < 0.05
+    step_idx = min(range(len(alphas)), key=lambda i: abs(alphas[i] - 3.3))
+    assert abs(alphas[step_idx] - 3.3) < 0.05
+
+
+def test_adaptive_sweep_budget():
+    sweep = get_sweep(max_cases=20)
+    results = sweep.run()
+    assert len(results) == 20
+    assert not sweep.converged
+
+
+def test_adaptive_sweep_case_names():
+    sweep = get_sweep(max_rounds=3)
+    results = sweep.run()
+    names = [case_results["Name"] for case_results in results.values()]
+    assert len(set(names)) == len(names) == sum(sweep.rounds)